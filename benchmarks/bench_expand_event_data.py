@@ -0,0 +1,54 @@
+# benchmarks/bench_expand_event_data.py
+#
+# Compara la expansión de 'event_data' vectorizada con la expansión genérica por chunks
+# (json_normalize). Uso desde la raíz del repositorio:
+#
+#   PYTHONPATH=. python benchmarks/bench_expand_event_data.py --rows 10000000
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.transform.prints_transformer import PrintsTransformer
+
+
+def build_prints_frame(rows, seed=0):
+    """Construye un DataFrame de prints sin expandir con `rows` registros."""
+    rng = np.random.default_rng(seed)
+    value_props = np.array(["cellphone_recharge", "prepaid", "link_cobro", "point", "send_money"])
+    positions = rng.integers(0, 4, size=rows)
+    props = value_props[rng.integers(0, len(value_props), size=rows)]
+    return pd.DataFrame({
+        "day": "2020-11-01",
+        "user_id": rng.integers(1, 100000, size=rows),
+        "event_data": [{"position": int(p), "value_prop": v} for p, v in zip(positions, props)],
+    })
+
+
+def time_call(func, *args):
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de BaseTransformer.expand_event_data")
+    parser.add_argument("--rows", type=int, default=10_000_000, help="Número de registros a expandir")
+    args = parser.parse_args()
+
+    transformer = PrintsTransformer()
+    df = build_prints_frame(args.rows)
+
+    legacy = time_call(transformer._expand_event_data_chunked, df, "event_data", 10000)
+    vectorized = time_call(transformer.expand_event_data, df)
+
+    print(f"filas:           {args.rows}")
+    print(f"json_normalize:  {legacy:.2f}s")
+    print(f"vectorizada:     {vectorized:.2f}s")
+    print(f"aceleración:     {legacy / vectorized:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+# benchmarks/generate_data.py
+#
+# Genera prints.json, taps.json y pays.csv sintéticos con el formato crudo que esperan los
+# loaders (JSON lines con 'event_data' anidado y CSV de pagos). Uso desde la raíz del
+# repositorio:
+#
+#   PYTHONPATH=. python benchmarks/generate_data.py --rows 1000000 --output-dir /tmp/bench/raw
+
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+VALUE_PROPS = np.array(["cellphone_recharge", "prepaid", "link_cobro", "point", "send_money",
+                        "transport", "credits_consumer"])
+START_DATE = "2020-11-01"
+
+
+def user_weights(users, skew):
+    """
+    Probabilidad de actividad de cada usuario según una ley de Zipf: unos pocos usuarios
+    concentran la mayor parte de los prints, como en el tráfico real.
+    """
+    weights = 1.0 / np.arange(1, users + 1) ** skew
+    return weights / weights.sum()
+
+
+def _write_lines(path, lines, mode):
+    with open(path, mode) as file:
+        file.write("\n".join(lines))
+        file.write("\n")
+
+
+def _prints_lines(days, user_ids, positions, props):
+    """Formatea los registros como JSON lines con 'event_data' anidado."""
+    return ('{"day": "' + days + '", "event_data": {"position": ' + positions.astype(str)
+            + ', "value_prop": "' + props + '"}, "user_id": ' + user_ids.astype(str) + "}")
+
+
+def generate_dataset(output_dir, rows, users=None, days=30, skew=0.3, tap_rate=0.2, pay_rate=0.25,
+                     chunk_size=1_000_000, seed=0):
+    """
+    Escribe prints.json, taps.json y pays.csv en `output_dir`.
+
+    Los taps son una muestra de los prints (mismo día, usuario, posición y value_prop) y los
+    pagos caen sobre usuarios con la misma distribución de actividad. El tamaño del maestro y
+    del dataset final crece con el cuadrado de la actividad por usuario, por lo que un `skew`
+    alto concentra casi todo el coste en los usuarios más activos.
+
+    Args:
+        output_dir (str): Directorio de salida.
+        rows (int): Número de prints.
+        users (int, optional): Número de usuarios; por defecto uno cada 40 prints, la
+            proporción de los datos de ejemplo.
+        days (int): Días de prints a partir de START_DATE.
+        skew (float): Exponente de Zipf de la actividad por usuario.
+        tap_rate (float): Fracción de prints con tap.
+        pay_rate (float): Pagos por print.
+        chunk_size (int): Registros generados y escritos por lote.
+        seed (int): Semilla del generador aleatorio.
+
+    Returns:
+        dict: Filas escritas por archivo.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    users = users or max(rows // 40, 1)
+    weights = user_weights(users, skew)
+    calendar = pd.date_range(START_DATE, periods=days, freq="D").strftime("%Y-%m-%d").to_numpy()
+
+    paths = {name: os.path.join(output_dir, name) for name in ("prints.json", "taps.json", "pays.csv")}
+    counts = dict.fromkeys(paths, 0)
+    with open(paths["pays.csv"], "w") as file:
+        file.write("pay_date,total,user_id,value_prop\n")
+
+    for start in range(0, rows, chunk_size):
+        size = min(chunk_size, rows - start)
+        mode = "w" if start == 0 else "a"
+
+        day = pd.Series(calendar[rng.integers(0, days, size=size)])
+        user_id = pd.Series(rng.choice(users, size=size, p=weights) + 1)
+        position = pd.Series(rng.integers(0, 4, size=size))
+        value_prop = pd.Series(VALUE_PROPS[rng.integers(0, len(VALUE_PROPS), size=size)])
+        lines = _prints_lines(day, user_id, position, value_prop)
+        _write_lines(paths["prints.json"], lines, mode)
+        counts["prints.json"] += size
+
+        tapped = rng.random(size) < tap_rate
+        if tapped.any():
+            _write_lines(paths["taps.json"], lines[tapped], mode)
+        elif mode == "w":
+            open(paths["taps.json"], "w").close()
+        counts["taps.json"] += int(tapped.sum())
+
+        pay_count = int(round(size * pay_rate))
+        pays = pd.DataFrame({
+            "pay_date": calendar[rng.integers(0, days, size=pay_count)],
+            "total": np.round(rng.uniform(1, 200, size=pay_count), 2),
+            "user_id": rng.choice(users, size=pay_count, p=weights) + 1,
+            "value_prop": VALUE_PROPS[rng.integers(0, len(VALUE_PROPS), size=pay_count)],
+        })
+        pays.to_csv(paths["pays.csv"], mode="a", header=False, index=False)
+        counts["pays.csv"] += pay_count
+
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generador de datos sintéticos del pipeline")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Número de prints")
+    parser.add_argument("--users", type=int, default=None, help="Número de usuarios (por defecto rows / 40)")
+    parser.add_argument("--days", type=int, default=30, help="Días de prints")
+    parser.add_argument("--skew", type=float, default=0.3, help="Exponente de Zipf de la actividad por usuario")
+    parser.add_argument("--seed", type=int, default=0, help="Semilla del generador")
+    parser.add_argument("--output-dir", default="./data/raw", help="Directorio de salida")
+    args = parser.parse_args()
+
+    counts = generate_dataset(args.output_dir, args.rows, users=args.users, days=args.days,
+                              skew=args.skew, seed=args.seed)
+    for name, count in counts.items():
+        print(f"{name:12} {count} filas")
+
+
+if __name__ == "__main__":
+    main()
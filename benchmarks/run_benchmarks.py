@@ -0,0 +1,206 @@
+# benchmarks/run_benchmarks.py
+#
+# Ejecuta el pipeline completo sobre datos sintéticos de varios tamaños y guarda, por tamaño,
+# el tiempo y la memoria de cada etapa (ingesta por fuente, join, filtro, métricas,
+# optimización y exportación) en un JSON estable que se puede comparar con diff entre
+# versiones. Uso desde la raíz del repositorio:
+#
+#   PYTHONPATH=. python benchmarks/run_benchmarks.py --sizes 10k,1M,10M --output benchmarks/results/baseline.json
+#
+# Cada tamaño se ejecuta en un proceso nuevo, así el RSS máximo del informe corresponde solo
+# a esa ejecución. Un tamaño que falla (p. ej. por falta de memoria) queda registrado con su
+# código de salida y las etapas completadas, y se continúa con el siguiente.
+#
+# Con el join por clave (join.mode "key") cada print se replica por todos los taps y pagos
+# históricos de su (user_id, value_prop), así que el dataset final crece de forma cuadrática
+# con la actividad por usuario: 10k prints ya producen unos 7.8M filas finales. Por eso, con
+# --join-mode auto (por defecto), los tamaños de más de KEY_JOIN_MAX_ROWS prints se ejecutan
+# con join.mode "time_aware"; el modo usado queda registrado en cada resultado.
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import yaml
+
+from benchmarks.generate_data import generate_dataset
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SUFFIXES = {"k": 1_000, "m": 1_000_000}
+# Prints máximos con los que --join-mode auto mantiene el join por clave
+KEY_JOIN_MAX_ROWS = 100_000
+STAGE_FIELDS = ("rows_in", "rows_out", "frame_bytes", "wall_seconds", "cpu_seconds", "peak_rss_delta_bytes")
+
+
+def parse_size(size):
+    """Convierte '10k', '1M' o '2500' en número de filas."""
+    size = size.strip().lower()
+    if size[-1] in SUFFIXES:
+        return int(float(size[:-1]) * SUFFIXES[size[-1]])
+    return int(size)
+
+
+def resolve_join_mode(join_mode, rows):
+    """Modo de join de un tamaño: con "auto", "key" hasta KEY_JOIN_MAX_ROWS prints y "time_aware" por encima."""
+    if join_mode != "auto":
+        return join_mode
+    return "key" if rows <= KEY_JOIN_MAX_ROWS else "time_aware"
+
+
+def benchmark_config(work_dir, mode, backend, join_mode="key"):
+    """
+    Configuración del repositorio con las rutas de la ejecución de benchmark: sin caché (cada
+    ejecución mide la ingesta completa), con el informe de etapas activado y con el modo de
+    join indicado.
+    """
+    with open(os.path.join(REPO_ROOT, "config", "config.yaml")) as file:
+        config = yaml.safe_load(file)
+
+    raw_dir = os.path.join(work_dir, "raw")
+    config["data_paths"] = {
+        "prints": os.path.join(raw_dir, "prints.json"),
+        "taps": os.path.join(raw_dir, "taps.json"),
+        "pays": os.path.join(raw_dir, "pays.csv"),
+    }
+    config["output_paths"]["final"] = os.path.join(work_dir, "final", "final_dataset")
+    config["cache"]["enabled"] = False
+    config["profiling"].update({"enabled": True, "report_path": os.path.join(work_dir, "run_report.json")})
+    config["execution"]["backend"] = backend
+    config["join"]["mode"] = join_mode
+    for section in ("incremental", "sharding", "out_of_core"):
+        config[section]["enabled"] = section == mode
+    return config
+
+
+def run_pipeline(work_dir, config):
+    """
+    Ejecuta src/pipeline.py en un proceso nuevo con `work_dir` como directorio de trabajo; la
+    salida del proceso queda en `work_dir/pipeline.log`.
+
+    Returns:
+        tuple: Tiempo real, código de salida (negativo si el proceso murió por una señal, p. ej.
+        -9 al agotar la memoria) e informe de etapas (las completadas, si la ejecución falló).
+    """
+    os.makedirs(os.path.join(work_dir, "config"), exist_ok=True)
+    with open(os.path.join(work_dir, "config", "config.yaml"), "w") as file:
+        yaml.safe_dump(config, file, sort_keys=False)
+    report_path = config["profiling"]["report_path"]
+    if os.path.exists(report_path):
+        os.remove(report_path)
+
+    env = dict(os.environ, PYTHONPATH=REPO_ROOT)
+    start = time.perf_counter()
+    with open(os.path.join(work_dir, "pipeline.log"), "w") as log_file:
+        process = subprocess.run([sys.executable, os.path.join(REPO_ROOT, "src", "pipeline.py")],
+                                 cwd=work_dir, env=env, stdout=log_file, stderr=subprocess.STDOUT)
+    wall_seconds = time.perf_counter() - start
+
+    report = {"peak_rss_bytes": None, "stages": []}
+    if os.path.exists(report_path):
+        with open(report_path) as file:
+            report = json.load(file)
+    return wall_seconds, process.returncode, report
+
+
+def summarize(size_label, rows, source_rows, join_mode, wall_seconds, returncode, report, precision):
+    """Resultado de un tamaño: totales y métricas por etapa, ordenadas por nombre."""
+    stages = {}
+    for stage in report["stages"]:
+        values = {field: stage[field] for field in STAGE_FIELDS}
+        for field in ("wall_seconds", "cpu_seconds"):
+            values[field] = round(values[field], precision)
+        stages[stage["name"]] = values
+    return {
+        "size": size_label,
+        "rows": rows,
+        "source_rows": source_rows,
+        "join_mode": join_mode,
+        "returncode": returncode,
+        "wall_seconds": round(wall_seconds, precision),
+        "peak_rss_bytes": report["peak_rss_bytes"],
+        "stages": dict(sorted(stages.items())),
+    }
+
+
+def environment():
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "pyarrow": pa.__version__,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de escala del pipeline")
+    parser.add_argument("--sizes", default="10k,1M,10M", help="Tamaños en prints separados por comas")
+    parser.add_argument("--mode", default="full", choices=["full", "sharding", "out_of_core"],
+                        help="Modo de ejecución del pipeline")
+    parser.add_argument("--backend", default="pandas", help="Motor de ejecución (execution.backend)")
+    parser.add_argument("--join-mode", default="auto", choices=["auto", "key", "time_aware"],
+                        help="Modo de join (join.mode); auto usa 'time_aware' por encima de "
+                             f"{KEY_JOIN_MAX_ROWS} prints")
+    parser.add_argument("--work-dir", default="./data/benchmarks", help="Directorio de datos y salidas")
+    parser.add_argument("--output", default="benchmarks/results/results.json", help="Archivo JSON de resultados")
+    parser.add_argument("--reuse-data", action="store_true",
+                        help="Reutiliza los datos generados si ya existen para el tamaño")
+    parser.add_argument("--seed", type=int, default=0, help="Semilla del generador")
+    parser.add_argument("--precision", type=int, default=3, help="Decimales de los tiempos")
+    args = parser.parse_args()
+
+    results = {
+        "environment": environment(),
+        "mode": args.mode,
+        "backend": args.backend,
+        "seed": args.seed,
+        "runs": [],
+    }
+    for size_label in args.sizes.split(","):
+        rows = parse_size(size_label)
+        work_dir = os.path.abspath(os.path.join(args.work_dir, size_label.strip()))
+        raw_dir = os.path.join(work_dir, "raw")
+        counts_path = os.path.join(raw_dir, "counts.json")
+
+        if args.reuse_data and os.path.exists(counts_path):
+            with open(counts_path) as file:
+                counts = json.load(file)
+        else:
+            print(f"Generando {rows} prints en {raw_dir} ...", flush=True)
+            counts = generate_dataset(raw_dir, rows, seed=args.seed)
+            with open(counts_path, "w") as file:
+                json.dump(counts, file)
+
+        join_mode = resolve_join_mode(args.join_mode, rows)
+        print(f"Ejecutando el pipeline ({args.mode}, {args.backend}, join {join_mode}) con {rows} prints ...",
+              flush=True)
+        config = benchmark_config(work_dir, args.mode, args.backend, join_mode)
+        wall_seconds, returncode, report = run_pipeline(work_dir, config)
+        run = summarize(size_label.strip(), rows, counts, join_mode, wall_seconds, returncode, report,
+                        args.precision)
+        results["runs"].append(run)
+        if returncode != 0:
+            # Se guarda igualmente: las etapas completadas muestran dónde se agotó la memoria
+            print(f"  El pipeline terminó con código {returncode} tras {run['wall_seconds']:.2f}s", flush=True)
+        elif run["peak_rss_bytes"] is not None:
+            print(f"  {run['wall_seconds']:.2f}s, RSS máximo {run['peak_rss_bytes'] / 2 ** 20:.0f} MiB", flush=True)
+
+    output_dir = os.path.dirname(args.output)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    with open(args.output, "w") as file:
+        json.dump(results, file, indent=2, sort_keys=True)
+        file.write("\n")
+    print(f"Resultados escritos en {args.output}")
+
+
+if __name__ == "__main__":
+    main()
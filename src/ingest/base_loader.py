@@ -1,22 +1,98 @@
+import dask
+import dask.dataframe as dd
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+from src.utils.categories import concat_aligned
 from src.utils.data_loader import DataLoader
+from src.utils.date_parsing import to_datetime_memoized
 from src.utils.logger import logger
 
 
 class BaseLoader:
-    def __init__(self, file_path, transformer_class):
+    ENGINES = ("pandas", "arrow")
+
+    def __init__(self, file_path, transformer_class, chunk_size=None, engine="pandas", cache=None, date_window=None):
         """
         Inicializa el cargador base con la ruta del archivo y la clase del transformador.
 
         Args:
             file_path (str): Ruta del archivo de datos.
             transformer_class (class): Clase del transformador a utilizar.
+            chunk_size (int, optional): Si se indica, el archivo se lee y transforma por lotes
+                de este número de líneas, de modo que la memoria máxima depende del lote y no
+                del tamaño del archivo.
+            engine (str): Motor de lectura: "pandas" (por defecto) o "arrow", que usa los
+                lectores multihilo de pyarrow con el esquema explícito del transformador.
+                Si la lectura con pyarrow falla se recurre al lector de pandas.
+            cache (TransformCache, optional): Caché en disco del resultado transformado.
+            date_window (tuple, optional): Días (inicio, fin), ambos incluidos, que se conservan
+                según la primera columna de fecha del transformador; None en un extremo deja la
+                ventana abierta por ese lado. Las filas fuera de la ventana se descartan antes de
+                expandir, convertir fechas o limpiar: con el motor "arrow" y en la lectura por
+                lotes, bloque a bloque durante la lectura; con el lector de pandas sin
+                `chunk_size`, tras parsear el archivo completo.
         """
+        if engine not in self.ENGINES:
+            raise ValueError(f"Motor de lectura '{engine}' no soportado. Opciones: {self.ENGINES}.")
+
         self.file_path = file_path
         self.data_loader = DataLoader(self.file_path)
         self.transformer = transformer_class()
+        self.chunk_size = chunk_size
+        self.engine = engine
+        self.cache = cache
+        self.date_window = date_window
         logger.info(f"Inicializando {self.__class__.__name__} con archivo: {file_path}")
 
+    @property
+    def date_column(self):
+        return self.transformer.date_columns[0]
+
+    def max_date(self):
+        """
+        Fecha máxima de la columna de fecha del archivo, leyendo solo esa columna.
+
+        Returns:
+            pd.Timestamp: Fecha máxima (NaT si el archivo no tiene fechas válidas).
+        """
+        try:
+            values = self.data_loader.load_column_arrow(self.date_column, pa.timestamp("ns"))
+            return pd.Timestamp(pc.max(values).as_py())
+        except ValueError as e:
+            # Fechas que Arrow no parsea (se convierten en NaT como en la transformación)
+            logger.warning(f"Lectura de fechas con pyarrow fallida para {self.file_path}, se usa pandas: {e}")
+            df = self._load_data_pandas()
+            return to_datetime_memoized(df[self.date_column],
+                                        format=self.transformer.date_formats.get(self.date_column)).max()
+
+    def filter_window(self, df):
+        """
+        Descarta las filas crudas fuera de `date_window` (sin ventana devuelve `df`).
+        """
+        if self.date_window is None or self.date_column not in df.columns:
+            return df
+        start, end = self.date_window
+        dates = to_datetime_memoized(df[self.date_column], format=self.transformer.date_formats.get(self.date_column))
+        keep = np.ones(len(df), dtype=bool)
+        if start is not None:
+            keep &= (dates >= start).to_numpy()
+        if end is not None:
+            keep &= (dates <= end).to_numpy()
+        return df if keep.all() else df[keep]
+
+    def _arrow_window_filter(self):
+        if self.date_window is None:
+            return None
+        start, end = (None if day is None else pa.scalar(pd.Timestamp(day).as_unit("ns").to_datetime64(), pa.timestamp("ns"))
+                      for day in self.date_window)
+        if start is None:
+            return pc.field(self.date_column) <= end
+        if end is None:
+            return pc.field(self.date_column) >= start
+        return (pc.field(self.date_column) >= start) & (pc.field(self.date_column) <= end)
+
     def load_data(self):
         """
         Carga los datos desde el archivo.
@@ -25,12 +101,14 @@ class BaseLoader:
             pd.DataFrame: DataFrame cargado desde el archivo.
         """
         try:
-            if self.file_path.endswith(".json"):
-                df = self.data_loader.load_json()
-            elif self.file_path.endswith(".csv"):
-                df = self.data_loader.load_csv()
+            if self.engine == "arrow":
+                try:
+                    df = self._load_data_arrow()
+                except ValueError as e:
+                    logger.warning(f"Lectura con pyarrow fallida para {self.file_path}, se usa el lector de pandas: {e}")
+                    df = self.filter_window(self._load_data_pandas())
             else:
-                raise ValueError("Formato de archivo no soportado. Solo se admiten JSON y CSV.")
+                df = self.filter_window(self._load_data_pandas())
 
             logger.info(f"Archivo cargado exitosamente desde {self.file_path}")
             return df
@@ -38,6 +116,24 @@ class BaseLoader:
             logger.error(f"Error al cargar los datos desde {self.file_path}: {e}")
             raise
 
+    def _load_data_pandas(self):
+        dtype = self.transformer.read_dtypes()
+        if self.file_path.endswith(".json"):
+            return self.data_loader.load_json(dtype)
+        if self.file_path.endswith(".csv"):
+            return self.data_loader.load_csv(dtype)
+        raise ValueError("Formato de archivo no soportado. Solo se admiten JSON y CSV.")
+
+    def _load_data_arrow(self):
+        schema = self.transformer.arrow_read_schema()
+        row_filter = self._arrow_window_filter()
+        if self.file_path.endswith(".json"):
+            return self.data_loader.load_json_arrow(schema, row_filter=row_filter)
+        if self.file_path.endswith(".csv"):
+            column_types = {field.name: field.type for field in schema if not pa.types.is_struct(field.type)}
+            return self.data_loader.load_csv_arrow(column_types, row_filter=row_filter)
+        raise ValueError("Formato de archivo no soportado. Solo se admiten JSON y CSV.")
+
     def transform_data(self, df):
         """
         Aplica la transformación a los datos cargados.
@@ -56,12 +152,107 @@ class BaseLoader:
             logger.error(f"Error al transformar los datos: {e}")
             raise
 
+    def iter_chunks(self):
+        """
+        Lee el archivo por lotes de `chunk_size` registros.
+
+        Yields:
+            pd.DataFrame: Lote de datos sin transformar.
+        """
+        if not self.chunk_size or self.chunk_size <= 0:
+            raise ValueError("Se requiere un 'chunk_size' positivo para la lectura por lotes.")
+
+        dtype = self.transformer.read_dtypes()
+        if self.file_path.endswith(".json"):
+            chunks = self.data_loader.iter_json_chunks(self.chunk_size, dtype)
+        elif self.file_path.endswith(".csv"):
+            chunks = self.data_loader.iter_csv_chunks(self.chunk_size, dtype)
+        else:
+            logger.error(f"Error al cargar los datos desde {self.file_path}: formato no soportado.")
+            raise ValueError("Formato de archivo no soportado. Solo se admiten JSON y CSV.")
+
+        for chunk in chunks:
+            yield self.filter_window(chunk)
+
+    def iter_transformed_chunks(self):
+        """
+        Lee y transforma el archivo lote a lote (expansión, fechas, limpieza y esquema).
+
+        Yields:
+            pd.DataFrame: Lote limpio y tipado según el esquema del transformador.
+        """
+        for chunk_number, chunk in enumerate(self.iter_chunks(), start=1):
+            transformed_chunk = self.transform_data(chunk)
+            logger.info(f"Lote {chunk_number} de {self.file_path} transformado: {len(transformed_chunk)} registros")
+            yield transformed_chunk
+
+    def load_dask(self, blocksize="64MB"):
+        """
+        Crea un DataFrame de Dask perezoso que lee el archivo por bloques de `blocksize` bytes y
+        aplica la transformación a cada partición, sin cargar el archivo completo en memoria.
+
+        Args:
+            blocksize (str | int): Tamaño de cada bloque leído (p. ej. "64MB").
+
+        Returns:
+            dd.DataFrame: Datos transformados, particionados por bloques del archivo.
+        """
+        # Dask convertiría 'event_data' (diccionarios) a texto al construir las lecturas
+        with dask.config.set({"dataframe.convert-string": False}):
+            if self.file_path.endswith(".json"):
+                ddf = dd.read_json(self.file_path, lines=True, blocksize=blocksize)
+            elif self.file_path.endswith(".csv"):
+                ddf = dd.read_csv(self.file_path, blocksize=blocksize, dtype=self.transformer.read_dtypes())
+            else:
+                logger.error(f"Error al cargar los datos desde {self.file_path}: formato no soportado.")
+                raise ValueError("Formato de archivo no soportado. Solo se admiten JSON y CSV.")
+
+            meta = self.transformer.process_data(ddf._meta.copy())
+            transformed_ddf = ddf.map_partitions(self._filter_and_process, meta=meta)
+
+        logger.info(f"{self.file_path} preparado para lectura fuera de memoria en {ddf.npartitions} particiones.")
+        return transformed_ddf
+
+    def _filter_and_process(self, df):
+        return self.transformer.process_data(self.filter_window(df))
+
     def load_and_transform(self):
         """
         Ejecuta el proceso completo de carga y transformación de datos.
 
+        Con `chunk_size` definido, los lotes transformados se concatenan al final, por lo que
+        nunca se mantiene en memoria más de un lote sin procesar. Si hay caché configurada y el
+        archivo y el transformador no han cambiado, se devuelve el resultado guardado sin
+        volver a leer ni transformar.
+
         Returns:
             pd.DataFrame: DataFrame procesado.
         """
+        if self.cache is None:
+            return self._load_and_transform()
+
+        extra = None
+        if self.date_window is not None:
+            extra = {"date_window": [None if day is None else f"{pd.Timestamp(day):%Y-%m-%d}"
+                                     for day in self.date_window]}
+        cache_key = self.cache.fingerprint(self.file_path, self.transformer, extra=extra)
+        df = self.cache.get(cache_key)
+        if df is not None:
+            # El formato de la caché no conserva todos los dtypes de pandas (p. ej. object)
+            return self.transformer.schema_validator.enforce_schema(df)
+
+        df = self._load_and_transform()
+        self.cache.put(cache_key, df)
+        return df
+
+    def _load_and_transform(self):
+        if self.chunk_size:
+            chunks = list(self.iter_transformed_chunks())
+            if not chunks:
+                logger.error(f"Error al cargar los datos desde {self.file_path}: el archivo no contiene registros.")
+                raise ValueError(f"El archivo {self.file_path} no contiene registros.")
+            # Cada lote tiene su propio diccionario de categorías; se unifican antes de concatenar
+            return concat_aligned(chunks, ignore_index=True)
+
         df = self.load_data()
         return self.transform_data(df)
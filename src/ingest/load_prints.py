@@ -4,11 +4,12 @@ from src.ingest.base_loader import BaseLoader
 from src.transform.prints_transformer import PrintsTransformer
 
 class PrintsLoader(BaseLoader):
-    def __init__(self, file_path):
+    def __init__(self, file_path, **kwargs):
         """
         Inicializa el cargador de datos de prints con la ruta del archivo.
 
         Args:
             file_path (str): Ruta del archivo de datos de prints.
+            **kwargs: Opciones adicionales de BaseLoader (por ejemplo, `chunk_size`).
         """
-        super().__init__(file_path, PrintsTransformer)
+        super().__init__(file_path, PrintsTransformer, **kwargs)
@@ -5,11 +5,12 @@ from src.transform.taps_transformer import TapsTransformer
 
 
 class TapsLoader(BaseLoader):
-    def __init__(self, file_path):
+    def __init__(self, file_path, **kwargs):
         """
         Inicializa el cargador de datos de taps con la ruta del archivo.
 
         Args:
             file_path (str): Ruta del archivo de datos de taps.
+            **kwargs: Opciones adicionales de BaseLoader (por ejemplo, `chunk_size`).
         """
-        super().__init__(file_path, TapsTransformer)
+        super().__init__(file_path, TapsTransformer, **kwargs)
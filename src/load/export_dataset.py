@@ -1,7 +1,55 @@
-from utils.logger import logger
+from src.utils.logger import logger
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+import dask
 import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+# Opciones por defecto de la escritura Parquet
+DEFAULT_PARQUET_OPTIONS = {
+    "partition_by": None,
+    "batch_size": 256_000,
+    "row_group_size": 1_000_000,
+    "compression": "snappy",
+    "compression_level": None,
+    "use_dictionary": True,
+}
+
+# Opciones por defecto de la escritura CSV y JSON lines
+DEFAULT_TEXT_OPTIONS = {
+    "compression": None,
+    "chunk_size": 256_000,
+    "max_workers": None,
+}
+
+# Extensión añadida al archivo según el códec de compresión
+COMPRESSION_SUFFIXES = {"gzip": ".gz", "zstd": ".zst"}
 
 class DatasetExporter:
+    def __init__(self, parquet_options=None, text_options=None):
+        """
+        Inicializa el exportador.
+
+        Args:
+            parquet_options (dict, optional): Opciones de la escritura Parquet (ver
+                DEFAULT_PARQUET_OPTIONS): columnas de partición Hive, filas por lote y por grupo
+                de filas, códec y nivel de compresión y codificación por diccionario.
+            text_options (dict, optional): Opciones de la escritura CSV y JSON lines (ver
+                DEFAULT_TEXT_OPTIONS): compresión ("gzip", "zstd" o None), filas por bloque e
+                hilos que formatean los bloques.
+        """
+        self.parquet_options = {**DEFAULT_PARQUET_OPTIONS, **(parquet_options or {})}
+        self.text_options = {**DEFAULT_TEXT_OPTIONS, **(text_options or {})}
+        compression = self.text_options["compression"]
+        if compression is not None and compression not in COMPRESSION_SUFFIXES:
+            logger.error(f"Compresión '{compression}' no soportada.")
+            raise ValueError(f"Compresión '{compression}' no soportada. Opciones: {list(COMPRESSION_SUFFIXES)}.")
+
     def export(self, dataframe, file_path, format="csv"):
         """
         Exporta el DataFrame optimizado al formato especificado.
@@ -27,18 +75,277 @@ class DatasetExporter:
             logger.error(f"Error al exportar el dataset en formato {format}: {e}")
             raise
 
+    def export_partitioned(self, dataframe, directory, format="parquet"):
+        """
+        Exporta un DataFrame de Dask escribiendo cada partición como la parte part-NNNNN del
+        directorio indicado. Cada partición se calcula y se escribe en su propia tarea con
+        `export_part`, igual que las partes de los shards: mismo esquema y particiones Hive en
+        Parquet, y en CSV y JSON las opciones de `text_options` y la escritura atómica.
+
+        Args:
+            dataframe (dd.DataFrame): El DataFrame de Dask a exportar.
+            directory (str): Directorio de destino.
+            format (str): Formato de exportación ("csv", "json" o "parquet"). Por defecto es "parquet".
+        """
+        try:
+            if format not in ("csv", "json", "parquet"):
+                logger.error(f"Formato de exportación por particiones '{format}' no soportado.")
+                raise ValueError(f"Formato de exportación por particiones '{format}' no soportado.")
+            os.makedirs(directory, exist_ok=True)
+            writes = [dask.delayed(self.export_part)(partition, directory, part, format)
+                      for part, partition in enumerate(dataframe.to_delayed())]
+            dask.compute(*writes)
+            logger.info(f"Dataset exportado por particiones en formato {format} a {directory}")
+        except Exception as e:
+            logger.error(f"Error al exportar el dataset por particiones en formato {format}: {e}")
+            raise
+
     def _export_to_csv(self, dataframe, file_path):
-        dataframe.to_csv(file_path, index=False)
+        schema = self._text_schema(dataframe)
+
+        def format_block(start):
+            # El escritor CSV de Arrow formatea el bloque en C++ sin retener el GIL
+            block = dataframe.iloc[start:start + self.text_options["chunk_size"]]
+            batch = pa.RecordBatch.from_pandas(block, schema=schema, preserve_index=False)
+            sink = pa.BufferOutputStream()
+            pa_csv.write_csv(batch, sink, write_options=pa_csv.WriteOptions(include_header=start == 0))
+            return sink.getvalue()
+
+        file_path = self._write_text_blocks(len(dataframe), format_block, file_path)
         logger.info(f"Dataset exportado exitosamente en formato CSV a {file_path}")
 
     def _export_to_json(self, dataframe, file_path):
-        dataframe.to_json(file_path, orient="records", lines=True)
+        def format_block(start):
+            block = dataframe.iloc[start:start + self.text_options["chunk_size"]]
+            if block.empty:
+                return b""
+            text = block.to_json(orient="records", lines=True, date_format="iso")
+            return (text if text.endswith("\n") else text + "\n").encode("utf-8")
+
+        file_path = self._write_text_blocks(len(dataframe), format_block, file_path)
         logger.info(f"Dataset exportado exitosamente en formato JSON a {file_path}")
 
+    def _write_text_blocks(self, num_rows, format_block, file_path):
+        """
+        Formatea bloques de `chunk_size` filas en paralelo y los escribe en orden, con compresión
+        en streaming, en un archivo temporal que se renombra al terminar.
+
+        Args:
+            num_rows (int): Filas del DataFrame.
+            format_block (callable): Recibe la fila inicial del bloque y devuelve sus bytes.
+            file_path (str): Archivo de destino, sin la extensión de la compresión.
+
+        Returns:
+            str: Ruta final del archivo escrito.
+        """
+        compression = self.text_options["compression"]
+        file_path += COMPRESSION_SUFFIXES.get(compression, "")
+        starts = list(range(0, max(num_rows, 1), self.text_options["chunk_size"]))
+        max_workers = self.text_options["max_workers"] or os.cpu_count() or 1
+
+        with _atomic_output(file_path) as tmp_path, ThreadPoolExecutor(max_workers=max_workers) as executor:
+            sink = pa.CompressedOutputStream(tmp_path, compression) if compression else pa.OSFile(tmp_path, "wb")
+            with sink:
+                # Como máximo 2 bloques por hilo formateados y pendientes de escribir
+                window = 2 * max_workers
+                for window_start in range(0, len(starts), window):
+                    for data in executor.map(format_block, starts[window_start:window_start + window]):
+                        sink.write(data)
+        return file_path
+
+    @staticmethod
+    def _text_schema(dataframe):
+        """
+        Esquema de Arrow para la exportación de texto: las fechas sin hora se escriben como
+        día (2020-11-30), como hace pandas.
+        """
+        schema = pa.Schema.from_pandas(dataframe.iloc[:0], preserve_index=False)
+        for column, dtype in dataframe.dtypes.items():
+            if pd.api.types.is_datetime64_any_dtype(dtype) and \
+                    (dataframe[column].dropna().dt.normalize() == dataframe[column].dropna()).all():
+                schema = schema.set(schema.get_field_index(column), pa.field(column, pa.date32()))
+        return schema
+
     def _export_to_parquet(self, dataframe, file_path):
-        dataframe.to_parquet(file_path, index=False)
+        if self.parquet_options["partition_by"]:
+            self.write_parquet_dataset(self._iter_record_batches(dataframe), file_path,
+                                       self._arrow_schema(dataframe))
+        else:
+            with _atomic_output(file_path) as tmp_path:
+                self.write_parquet_file(self._iter_record_batches(dataframe), tmp_path,
+                                        self._arrow_schema(dataframe))
         logger.info(f"Dataset exportado exitosamente en formato Parquet a {file_path}")
 
+    def export_part(self, dataframe, directory, part, format="parquet"):
+        """
+        Escribe la parte `part` de un dataset escrito por partes en `directory`: en Parquet con
+        `export_parquet_part`, y en CSV o JSON como `part-NNNNN.<formato>` con las mismas
+        opciones (compresión, bloques) y escritura atómica que `export`.
+
+        Args:
+            dataframe (pd.DataFrame): Filas de la parte.
+            directory (str): Directorio del dataset.
+            part (int): Número de la parte.
+            format (str): Formato de exportación ("csv", "json" o "parquet").
+        """
+        if format == "parquet":
+            self.export_parquet_part(dataframe, directory, part)
+        else:
+            os.makedirs(directory, exist_ok=True)
+            self.export(dataframe, os.path.join(directory, f"part-{part:05d}.{format}"), format=format)
+
+    def export_parquet_part(self, dataframe, directory, part):
+        """
+        Escribe la parte `part` de un dataset Parquet escrito por varios procesos: dentro de las
+        particiones Hive del directorio si hay `partition_by`, o como `part-NNNNN.parquet` si no.
+
+        Args:
+            dataframe (pd.DataFrame): Filas de la parte.
+            directory (str): Directorio raíz del dataset.
+            part (int): Número de la parte.
+        """
+        schema = self._arrow_schema(dataframe)
+        if self.parquet_options["partition_by"]:
+            self.write_parquet_dataset(self._iter_record_batches(dataframe), directory, schema,
+                                       basename_template=f"part-{part:05d}-{{i}}.parquet", replace=False)
+        else:
+            os.makedirs(directory, exist_ok=True)
+            self.write_parquet_file(self._iter_record_batches(dataframe),
+                                    os.path.join(directory, f"part-{part:05d}.parquet"), schema)
+        logger.info(f"Parte {part} del dataset exportada en formato Parquet a {directory}")
+
+    def write_parquet_file(self, batches, file_path, schema):
+        """
+        Escribe lotes de Arrow en un único archivo Parquet, un grupo de filas tras otro, sin
+        reunir el dataset completo en memoria.
+
+        Args:
+            batches (iterable[pa.RecordBatch]): Lotes con el esquema `schema`.
+            file_path (str): Archivo de destino.
+            schema (pa.Schema): Esquema de los lotes.
+        """
+        options = self.parquet_options
+        with pq.ParquetWriter(file_path, schema, compression=options["compression"],
+                              compression_level=options["compression_level"],
+                              use_dictionary=options["use_dictionary"]) as writer:
+            for batch in batches:
+                writer.write_batch(batch, row_group_size=options["row_group_size"])
+
+    def write_parquet_dataset(self, batches, directory, schema, basename_template="part-{i}.parquet", replace=True):
+        """
+        Escribe lotes de Arrow como un dataset Parquet con particiones Hive
+        (`<columna>=<valor>/part-N.parquet`) según `partition_by`.
+
+        Args:
+            batches (iterable[pa.RecordBatch]): Lotes con el esquema `schema`.
+            directory (str): Directorio raíz del dataset.
+            schema (pa.Schema): Esquema de los lotes.
+            basename_template (str): Nombre de los archivos de cada partición ({i} es un contador).
+            replace (bool): Si el dataset sustituye al contenido previo del directorio. Se escribe
+                en un directorio temporal que reemplaza al anterior al terminar, de modo que un
+                fallo a mitad de escritura conserva el dataset previo.
+        """
+        if replace:
+            with _atomic_directory(directory) as tmp_directory:
+                self.write_parquet_dataset(batches, tmp_directory, schema, basename_template, replace=False)
+            return
+
+        options = self.parquet_options
+        partitioning = ds.partitioning(
+            pa.schema([schema.field(column) for column in options["partition_by"]]), flavor="hive"
+        )
+        file_options = ds.ParquetFileFormat().make_write_options(
+            compression=options["compression"],
+            compression_level=options["compression_level"],
+            use_dictionary=options["use_dictionary"],
+        )
+        ds.write_dataset(
+            batches, directory, schema=schema, format="parquet", partitioning=partitioning,
+            file_options=file_options, basename_template=basename_template,
+            max_rows_per_group=options["row_group_size"], min_rows_per_group=0,
+            existing_data_behavior="overwrite_or_ignore",
+        )
+
+    def _arrow_schema(self, dataframe):
+        """
+        Esquema de Arrow del DataFrame. Las columnas de partición con fechas se escriben como
+        date32, de modo que los directorios quedan como `day_prints=2020-11-30`.
+        """
+        schema = pa.Schema.from_pandas(dataframe.iloc[:0], preserve_index=False)
+        for column in self.parquet_options["partition_by"] or []:
+            field_index = schema.get_field_index(column)
+            if pa.types.is_timestamp(schema.field(field_index).type):
+                schema = schema.set(field_index, pa.field(column, pa.date32()))
+        return schema
+
+    def _iter_record_batches(self, dataframe):
+        """Convierte el DataFrame a lotes de Arrow de `batch_size` filas, uno cada vez."""
+        schema = self._arrow_schema(dataframe)
+        batch_size = self.parquet_options["batch_size"]
+        for start in range(0, len(dataframe), batch_size):
+            yield pa.RecordBatch.from_pandas(dataframe.iloc[start:start + batch_size], schema=schema,
+                                             preserve_index=False)
+
     def _export_to_feather(self, dataframe, file_path):
-        dataframe.to_feather(file_path)
+        with _atomic_output(file_path) as tmp_path:
+            dataframe.to_feather(tmp_path)
         logger.info(f"Dataset exportado exitosamente en formato Feather a {file_path}")
+
+
+@contextmanager
+def _atomic_directory(directory):
+    """
+    Entrega un directorio temporal junto a `directory` y lo mueve a `directory` al terminar.
+    El contenido anterior (directorio o archivo) se aparta y se borra solo cuando el nuevo ya
+    está en su sitio; si la escritura o el cambio fallan, el temporal se elimina y el anterior
+    vuelve a `directory`.
+    """
+    tmp_directory = f"{directory}.tmp-{os.getpid()}"
+    old_directory = f"{directory}.old-{os.getpid()}"
+    shutil.rmtree(tmp_directory, ignore_errors=True)
+    moved_aside = False
+    try:
+        yield tmp_directory
+        os.makedirs(tmp_directory, exist_ok=True)
+        if os.path.lexists(directory):
+            os.replace(directory, old_directory)
+            moved_aside = True
+        os.replace(tmp_directory, directory)
+    except BaseException:
+        if moved_aside:
+            os.replace(old_directory, directory)
+        raise
+    finally:
+        shutil.rmtree(tmp_directory, ignore_errors=True)
+    if moved_aside:
+        if os.path.isdir(old_directory):
+            shutil.rmtree(old_directory)
+        else:
+            os.remove(old_directory)
+
+@contextmanager
+def _atomic_output(file_path):
+    """
+    Entrega una ruta temporal en el mismo directorio que `file_path` y la renombra a
+    `file_path` al terminar, de modo que los lectores nunca ven un archivo a medio escribir.
+    Si la escritura falla, el temporal se elimina y el archivo anterior se conserva. Una salida
+    anterior escrita como directorio (dataset con particiones) se sustituye igualmente.
+    """
+    os.makedirs(os.path.dirname(file_path) or ".", exist_ok=True)
+    tmp_path = f"{file_path}.tmp-{os.getpid()}"
+    try:
+        yield tmp_path
+        if os.path.isdir(file_path):
+            old_directory = f"{file_path}.old-{os.getpid()}"
+            os.replace(file_path, old_directory)
+            try:
+                os.replace(tmp_path, file_path)
+            except BaseException:
+                os.replace(old_directory, file_path)
+                raise
+            shutil.rmtree(old_directory)
+        else:
+            os.replace(tmp_path, file_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
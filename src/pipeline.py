@@ -1,40 +1,185 @@
+import argparse
+import os
+import shutil
 import yaml
 import time
-from utils.logger import setup_logging, logger
+from functools import partial
+import dask.dataframe as dd
+import pandas as pd
+from utils.logger import init_worker_logging, setup_logging, logger, worker_log_queue
+from utils.transform_cache import TransformCache
+from utils.partition_store import DayPartitionStore
+from utils.categories import align_categories, concat_aligned
+from utils.execution import ExecutionBackend, hash_shards
+from utils.profiling import StageProfiler
+from utils.dag import StageGraph
+from utils.checkpoint import CheckpointStore, read_checkpoint, run_key, write_checkpoint
 from ingest.load_prints import PrintsLoader
 from ingest.load_taps import TapsLoader
 from ingest.load_pays import PaysLoader
 from preprocess.filter_last_week import LastWeekFilter
 from preprocess.aggregate_metrics import MetricsAggregator
+from preprocess.incremental import IncrementalPlanner
 from transform.join_data import DataJoiner
 from load.export_dataset import DatasetExporter
 from transform.optimize_data import DatasetOptimizer
 import concurrent.futures
 
+# Columnas categóricas compartidas por prints, taps y pagos
+CATEGORICAL_COLUMNS = ["value_prop"]
+SOURCES = ["prints", "taps", "pays"]
+
+
 def load_config(config_path="config/config.yaml"):
     with open(config_path, "r") as file:
         return yaml.safe_load(file)
 
 
-def load_data_parallel(loaders):
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Pipeline de procesamiento de prints, taps y pagos.")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Ignora la caché de fuentes transformadas y no la actualiza.")
+    parser.add_argument("--clear-cache", action="store_true",
+                        help="Vacía la caché de fuentes transformadas antes de ejecutar.")
+    parser.add_argument("--resume", action="store_true",
+                        help="Retoma la ejecución desde las salidas de etapa guardadas en los checkpoints.")
+    parser.add_argument("--cprofile-stage", action="append", default=[], metavar="ETAPA",
+                        help="Guarda un volcado de cProfile de la etapa indicada (repetible; 'all' para todas).")
+    return parser.parse_args(argv)
+
+
+def build_profiler(config, args):
     """
-    Carga los datos en paralelo desde múltiples fuentes.
+    Crea el perfilador de etapas según la sección 'profiling' y el flag --cprofile-stage.
     """
-    data_frames = {}
-    with concurrent.futures.ThreadPoolExecutor() as executor:
-        # Crear una lista de tareas para cargar y transformar cada archivo
-        future_to_loader = {executor.submit(loader.load_and_transform): name for name, loader in loaders.items()}
-
-        # Recoger los resultados conforme se vayan completando
-        for future in concurrent.futures.as_completed(future_to_loader):
-            name = future_to_loader[future]
-            try:
-                # Almacenamos el DataFrame cargado y transformado en el diccionario
-                data_frames[name] = future.result()
-                logger.info(f"{name.capitalize()} cargado y transformado: {data_frames[name].shape} registros")
-            except Exception as exc:
-                logger.error(f"{name} falló con la excepción: {exc}")
-    return data_frames
+    profiling_config = config.get("profiling") or {}
+    return StageProfiler(enabled=profiling_config.get("enabled", True),
+                         profile_stages=args.cprofile_stage,
+                         profile_dir=profiling_config.get("profile_dir"),
+                         deep_memory=profiling_config.get("deep_memory", False))
+
+
+def report_path(config):
+    """Ruta del informe JSON de la ejecución: junto al dataset final, salvo que se configure otra."""
+    configured_path = (config.get("profiling") or {}).get("report_path")
+    if configured_path:
+        return configured_path
+    return os.path.join(os.path.dirname(config["output_paths"]["final"]), "run_report.json")
+
+
+def build_transform_cache(config, args):
+    """
+    Crea la caché de fuentes transformadas según la configuración y los flags de la CLI.
+    """
+    cache_config = config.get("cache") or {}
+    cache_dir = cache_config.get("dir", "./data/cache")
+    max_size_mb = cache_config.get("max_size_mb")
+    max_size_bytes = int(max_size_mb * 1024 * 1024) if max_size_mb else None
+
+    if args.clear_cache:
+        TransformCache(cache_dir).clear()
+
+    if args.no_cache or not cache_config.get("enabled", False):
+        logger.info("Caché de fuentes transformadas deshabilitada.")
+        return None
+
+    return TransformCache(cache_dir, max_size_bytes=max_size_bytes,
+                          file_format=cache_config.get("format", "parquet"))
+
+
+def build_checkpoints(config, args):
+    """
+    Crea el almacén de checkpoints de las salidas de etapa según la sección 'checkpoint' y el
+    flag --resume (que los activa aunque la sección no lo haga).
+    """
+    checkpoint_config = config.get("checkpoint") or {}
+    if not (checkpoint_config.get("enabled", False) or args.resume):
+        return None
+    return CheckpointStore(checkpoint_config.get("run_dir", "./data/checkpoints"), run_key(config),
+                           values=checkpoint_config.get("values"), resume=args.resume)
+
+
+def resolve_window(prints_loader, config):
+    """
+    Calcula la fecha de referencia del análisis y la ventana de días que se empuja a la ingesta.
+
+    La ventana [referencia - lookback_weeks, referencia] cubre la última semana analizada y las
+    3 semanas de historia de las métricas. Solo se aplica con join.mode "time_aware": con el
+    join por clave cada fila del maestro se replica por todos los taps y pagos históricos de la
+    clave, así que descartar historia cambiaría las métricas.
+
+    Returns:
+        tuple: Fecha de referencia (None para usar la fecha máxima del maestro) y ventana
+        (inicio, fin), o None si no se empuja ninguna ventana.
+    """
+    window_config = config.get("window") or {}
+    configured_date = window_config.get("reference_date")
+    pushdown = window_config.get("pushdown", False)
+    if pushdown and (config.get("join") or {}).get("mode", "key") != "time_aware":
+        logger.info("La ventana de análisis solo se empuja a la ingesta con join.mode 'time_aware'; "
+                    "se lee toda la historia.")
+        pushdown = False
+
+    if configured_date is None and not pushdown:
+        return None, None
+
+    # Sin fecha configurada, la referencia es la fecha máxima de prints (se lee solo esa columna)
+    reference_date = pd.Timestamp(configured_date) if configured_date else prints_loader.max_date()
+    if not pushdown:
+        return reference_date, None
+
+    window = (reference_date - pd.Timedelta(weeks=window_config.get("lookback_weeks", 4)), reference_date)
+    logger.info(f"Ventana de análisis empujada a la ingesta: {window[0]:%Y-%m-%d} a {window[1]:%Y-%m-%d}.")
+    return reference_date, window
+
+
+def load_source(name, loader):
+    """
+    Carga y transforma una fuente (etapa 'ingest:<fuente>' del grafo).
+    """
+    df = loader.load_and_transform()
+    logger.info(f"{name.capitalize()} cargado y transformado: {df.shape} registros")
+    return df
+
+
+def align_sources(prints_df, taps_df, pays_df):
+    """
+    Un único diccionario de value_prop para que joins y agrupaciones comparen códigos.
+    """
+    align_categories([prints_df, taps_df, pays_df], CATEGORICAL_COLUMNS)
+    return prints_df, taps_df, pays_df
+
+
+def add_ingest_stages(graph, loaders):
+    """
+    Añade al grafo la ingesta de cada fuente (independientes entre sí) y la alineación de sus
+    categorías, que produce los valores "prints", "taps" y "pays".
+    """
+    for name, loader in loaders.items():
+        graph.add_stage(f"ingest:{name}", partial(load_source, name, loader), outputs=[f"{name}_raw"])
+    graph.add_stage("align_categories", align_sources,
+                    inputs=[f"{name}_raw" for name in SOURCES], outputs=SOURCES)
+
+
+def add_processing_stages(graph, config, backend, reference_date=None):
+    """
+    Añade al grafo join, filtro de la última semana, métricas, optimización y exportación.
+
+    Las fuentes se liberan en cuanto las consume su última etapa (prints y taps tras el join,
+    pagos tras las métricas) y el DataFrame maestro tras las métricas, antes de optimizar y
+    exportar. El valor "exported_rows" contiene las filas escritas.
+    """
+    graph.add_stage("join", partial(join_data, join_config=config.get("join"), backend=backend),
+                    inputs=SOURCES, outputs=["master"])
+    graph.add_stage("filter_last_week", partial(filter_data_last_week, reference_date=reference_date),
+                    inputs=["master"], outputs=["prints_last_week"])
+    # Las cuatro métricas van en un solo operador
+    graph.add_stage("metrics", partial(calculate_metrics_parallel, backend=backend, reference_date=reference_date),
+                    inputs=["master", "prints_last_week", "pays"], outputs=["final"])
+    graph.add_stage("optimize", partial(optimize_dataset, config=config, backend=backend),
+                    inputs=["final"], outputs=["optimized"])
+    graph.add_stage("export", partial(export_dataset, config=config),
+                    inputs=["optimized"], outputs=["exported_rows"])
 
 
 def load_data(loaders):
@@ -48,90 +193,476 @@ def load_data(loaders):
     return data_frames
 
 
-def join_data(prints_df, taps_df, pays_df):
-    data_joiner = DataJoiner()
+def join_data(prints_df, taps_df, pays_df, join_config=None, backend=None):
+    join_config = join_config or {}
+    data_joiner = DataJoiner(
+        mode=join_config.get("mode", "key"),
+        payment_window_weeks=join_config.get("payment_window_weeks", 3),
+        max_expansion_factor=join_config.get("max_expansion_factor"),
+        on_expansion=join_config.get("on_expansion", "warn"),
+        backend=backend,
+    )
     master_df = data_joiner.join_data(prints_df, taps_df, pays_df)
-    logger.info(f"DataFrame maestro unido: {master_df.shape} registros, columnas: {master_df.columns.tolist()}")
+    logger.info("DataFrame maestro unido: %d registros.", len(master_df))
+    logger.debug("Columnas del DataFrame maestro: %s", master_df.columns)
     return master_df
 
 
-def filter_data_last_week(master_df, date_column="day_prints"):
+def filter_data_last_week(master_df, date_column="day_prints", reference_date=None):
     last_week_filter = LastWeekFilter(date_column=date_column)
-    filtered_df = last_week_filter.filter(master_df)
+    filtered_df = last_week_filter.filter(master_df, reference_date=reference_date)
     logger.info(f"DataFrame filtrado por la última semana: {filtered_df.shape}")
     return filtered_df
 
 
-def calculate_metrics_parallel(master_df, prints_last_week, pays_df):
-    metrics_aggregator = MetricsAggregator()
-    final_df = prints_last_week[['user_id', 'value_prop', 'day_prints']].copy()
+def calculate_metrics_parallel(master_df, prints_last_week, pays_df, backend=None, reference_date=None):
+    # Las cuatro métricas se calculan en un solo operador que devuelve el DataFrame final
+    metrics_aggregator = MetricsAggregator(backend=backend)
+    final_df = metrics_aggregator.calculate_metrics(master_df, prints_last_week, pays_df, weeks=3,
+                                                    reference_date=reference_date)
+    logger.info("Indicador de clics, vistas, clics e importe acumulado calculados.")
+    return final_df
 
-    # Métricas de clics en paralelo
-    click_indicator = metrics_aggregator.calculate_click_indicator(master_df, prints_last_week)
-    final_df = final_df.merge(click_indicator, on=['user_id', 'value_prop', 'day_prints'], how='left')
-    logger.info("Indicador de clics agregado en paralelo.")
 
-    # Cantidad de vistas en paralelo
-    view_counts = metrics_aggregator.calculate_view_counts(master_df, prints_last_week, 3)
-    final_df = final_df.merge(view_counts, on=['user_id', 'value_prop', 'day_prints'], how='left')
-    logger.info("Cantidad de vistas agregada en paralelo.")
+def incremental_since(config):
+    """
+    Primer día que se vuelve a leer de los archivos fuente en una ejecución incremental: la
+    fecha máxima de la ejecución anterior menos 'incremental.reread_days', para recoger
+    correcciones y eliminaciones tardías. Solo esos días se leen, transforman y comparan con el
+    almacén.
+
+    Returns:
+        pd.Timestamp: Primer día a leer, o None para leer toda la historia (primera ejecución o
+        'reread_days' null).
+    """
+    incremental_config = config["incremental"]
+    reread_days = incremental_config.get("reread_days")
+    store = DayPartitionStore(incremental_config.get("store_dir", "./data/store"))
+    previous_max_day = store.get_metadata("max_day")
+    if previous_max_day is None or reread_days is None:
+        logger.info("Ejecución incremental: se lee toda la historia de las fuentes.")
+        return None
+    since = pd.Timestamp(previous_max_day) - pd.Timedelta(days=reread_days)
+    logger.info(f"Ejecución incremental: se leen las fuentes desde {since:%Y-%m-%d}.")
+    return since
+
+
+def run_incremental(loaders, data, config, backend=None, since=None):
+    """
+    Actualiza el almacén particionado por día con los datos nuevos y recalcula las métricas
+    solo para los días de prints cuya ventana de 3 semanas toca particiones modificadas.
 
-    # Cantidad de clics en paralelo
-    click_counts = metrics_aggregator.calculate_click_counts_per_value_prop(master_df, prints_last_week, 3)
-    final_df = final_df.merge(click_counts, on=['user_id', 'value_prop', 'day_prints'], how='left')
-    logger.info("Cantidad de clics agregada en paralelo.")
+    Args:
+        since (pd.Timestamp, optional): Primer día que cubren las fuentes de `data` (ver
+            `incremental_since`); None si cubren toda la historia.
 
-    # Importe acumulado de pagos en paralelo
-    cumulative_payment_amounts = metrics_aggregator.calculate_cumulative_payment_amounts(master_df, pays_df, 3)
-    final_df = final_df.merge(cumulative_payment_amounts, on=['user_id', 'value_prop', 'day_prints'], how='left')
-    logger.info("Importe acumulado agregado en paralelo.")
+    Returns:
+        pd.DataFrame: Métricas de la última semana (recalculadas y almacenadas).
+    """
+    store = DayPartitionStore(config["incremental"].get("store_dir", "./data/store"))
+    planner = IncrementalPlanner(lookback_weeks=3, window_weeks=1)
 
+    # Añadir solo los días nuevos o modificados de cada fuente y eliminar los desaparecidos
+    changed_days = set()
+    for name, loader in loaders.items():
+        date_column = loader.transformer.date_columns[0]
+        changed_days.update(store.append(name, data[name], date_column, since=since))
+
+    print_days = store.days("prints")
+    max_day = max(print_days)
+    previous_max_day = store.get_metadata("max_day")
+    analysis_days = planner.analysis_days(print_days)
+    full_history = config["incremental"].get("full_history", False)
+
+    # Con el join por (user_id, value_prop) cada fila del maestro se replica por todos los taps
+    # y pagos históricos de la clave, así que cualquier cambio afecta a toda la ventana
+    # analizada y solo leyendo todo el almacén se obtienen las mismas métricas que un recálculo
+    # completo. Con join.mode "time_aware" las métricas solo dependen de la ventana de 3
+    # semanas y basta con la lectura acotada.
+    if not full_history and (config.get("join") or {}).get("mode", "key") != "time_aware":
+        logger.info("La lectura acotada del almacén solo es exacta con join.mode 'time_aware'; "
+                    "se lee toda la historia.")
+        full_history = True
+
+    if full_history:
+        affected_days = analysis_days if changed_days or previous_max_day is None else []
+    else:
+        affected_days = planner.affected_print_days(print_days, changed_days, previous_max_day)
+
+    if affected_days:
+        # Leer del almacén solo la ventana necesaria para los días afectados
+        if full_history:
+            window_start, window_end = None, None
+        else:
+            window_start, window_end = planner.load_window(affected_days, max_day)
+        window_data = {}
+        for name, loader in loaders.items():
+            df = store.load(name, start=window_start, end=window_end)
+            if df is None:
+                df = data[name].iloc[0:0]
+            window_data[name] = loader.transformer.schema_validator.enforce_schema(df)
+        align_categories(window_data, CATEGORICAL_COLUMNS)
+
+        master_df = join_data(window_data["prints"], window_data["taps"], window_data["pays"], config.get("join"),
+                              backend)
+        prints_last_week = filter_data_last_week(master_df)
+        prints_last_week = prints_last_week[prints_last_week["day_prints"].isin(affected_days)]
+
+        metrics_df = calculate_metrics_parallel(master_df, prints_last_week, window_data["pays"], backend)
+        store.replace("metrics", metrics_df, "day_prints", affected_days)
+    else:
+        logger.info("Sin días de prints afectados; se reutilizan las métricas almacenadas.")
+
+    # Las métricas de días de prints eliminados de la fuente dejan de ser válidas
+    stale_days = sorted(set(store.days("metrics")) - set(print_days))
+    if stale_days:
+        store.replace("metrics", pd.DataFrame({"day_prints": pd.Series(dtype="datetime64[ns]")}), "day_prints",
+                      stale_days)
+
+    store.set_metadata("max_day", f"{max_day:%Y-%m-%d}")
+    final_df = store.load("metrics", start=min(analysis_days), end=max_day)
+    logger.info(f"Métricas incrementales de la última semana: {final_df.shape}")
     return final_df
 
 
-def optimize_and_export(final_df, config):
-    # Optimizar el dataset
-    optimizer = DatasetOptimizer(final_df)
-    final_df = optimizer.optimize()
+def output_file_path(config):
+    """
+    Ruta del dataset final. Un dataset Parquet con particiones Hive es un directorio y usa
+    `output_paths.final` sin extensión, igual que los modos por shards y fuera de memoria.
+    """
+    export_format = config["output_paths"].get("export_format", "csv").lower()
+    partition_by = ((config.get("export") or {}).get("parquet") or {}).get("partition_by")
+    if export_format == "parquet" and partition_by:
+        return config["output_paths"]["final"]
+    return f"{config['output_paths']['final']}.{export_format}"
+
+
+def build_exporter(config):
+    """Crea el exportador con las opciones de 'export' en config.yaml."""
+    export_config = config.get("export") or {}
+    return DatasetExporter(parquet_options=export_config.get("parquet"), text_options=export_config.get("text"))
+
+
+def build_optimizer(final_df, config, backend=None, partitioned=False):
+    """
+    Crea el optimizador con los tipos de 'optimizer' en config.yaml. Cuando cada shard o
+    partición escribe su propia parte (`partitioned`), los conteos usan un tipo fijo para que
+    todas las partes compartan el esquema.
+    """
+    optimizer_config = config.get("optimizer") or {}
+    count_dtype = optimizer_config.get("partitioned_count_dtype" if partitioned else "count_dtype")
+    return DatasetOptimizer(final_df, backend=backend, count_dtype=count_dtype,
+                            payment_dtype=optimizer_config.get("payment_dtype", "float64"),
+                            deep_memory=(config.get("profiling") or {}).get("deep_memory", False))
+
+
+def optimize_dataset(final_df, config, backend=None):
+    optimized_df = build_optimizer(final_df, config, backend).optimize()
     logger.info("Optimización del dataset final completada.")
+    return optimized_df
 
+
+def export_dataset(final_df, config, file_path=None):
     # Configurar la ruta y el formato de exportación
     export_format = config["output_paths"].get("export_format", "csv").lower()
-    file_path = f"{config['output_paths']['final']}.{export_format}"
+    file_path = file_path or output_file_path(config)
 
     # Exportar el dataset en el formato especificado
-    exporter = DatasetExporter()
-    exporter.export(final_df, file_path, format=export_format)
+    build_exporter(config).export(final_df, file_path, format=export_format)
     logger.info(f"Dataset exportado exitosamente a {file_path} en formato {export_format}.")
+    return len(final_df)
+
+
+def optimize_and_export(final_df, config, backend=None, file_path=None, profiler=None):
+    profiler = profiler or StageProfiler(enabled=False)
+
+    # Optimizar el dataset
+    with profiler.stage("optimize", rows_in=len(final_df)) as stage:
+        final_df = optimize_dataset(final_df, config, backend)
+        stage.set_output(final_df)
+
+    # Exportar el dataset en el formato especificado
+    with profiler.stage("export", rows_in=len(final_df)):
+        return export_dataset(final_df, config, file_path)
 
 
-def main():
+def reset_output_dir(output_dir):
+    """Vacía el directorio del dataset escrito por partes para no mezclar partes de ejecuciones anteriores."""
+    if os.path.isdir(output_dir):
+        shutil.rmtree(output_dir)
+    os.makedirs(output_dir)
+
+
+def process_shard(shard_data, config, reference_date):
+    """
+    Ejecuta join, filtro, métricas y optimización sobre las filas de un shard de usuarios.
+
+    Args:
+        shard_data (dict[str, pd.DataFrame]): Prints, taps y pagos del shard.
+        config (dict): Configuración del pipeline.
+        reference_date (pd.Timestamp): Fecha máxima global de prints.
+
+    Returns:
+        pd.DataFrame: Dataset final optimizado del shard.
+    """
+    align_categories(shard_data, CATEGORICAL_COLUMNS)
+    master_df = join_data(shard_data["prints"], shard_data["taps"], shard_data["pays"], config.get("join"))
+    prints_last_week = filter_data_last_week(master_df, reference_date=reference_date)
+    final_df = calculate_metrics_parallel(master_df, prints_last_week, shard_data["pays"],
+                                          reference_date=reference_date)
+    del master_df, prints_last_week
+    return build_optimizer(final_df, config, partitioned=True).optimize()
+
+
+def spill_source_shards(name, loader, num_shards, spill_dir):
+    """
+    Ingesta de una fuente repartida por shards de user_id (etapa 'shard:<fuente>' del grafo).
+
+    Cada lote transformado (o la fuente completa si no hay `ingest.chunk_size`) se reparte por
+    hash de user_id y cada trozo se escribe en Arrow IPC en `spill_dir/<fuente>`, así que el
+    proceso principal nunca mantiene en memoria más de un lote de la fuente.
+
+    Returns:
+        dict: Archivos de cada shard ("paths"), DataFrame vacío con el esquema de la fuente
+        ("empty"), filas escritas ("rows") y fecha máxima de la fuente ("max_date").
+    """
+    source_dir = os.path.join(spill_dir, name)
+    os.makedirs(source_dir, exist_ok=True)
+    chunks = loader.iter_transformed_chunks() if loader.chunk_size else iter([loader.load_and_transform()])
+
+    spilled = {"paths": {}, "empty": None, "rows": 0, "max_date": pd.NaT}
+    for chunk_number, chunk in enumerate(chunks):
+        if spilled["empty"] is None:
+            spilled["empty"] = chunk.iloc[:0]
+        spilled["rows"] += len(chunk)
+        spilled["max_date"] = pd.Series([spilled["max_date"], chunk[loader.date_column].max()]).max()
+
+        shard_ids = hash_shards(chunk["user_id"], num_shards)
+        for shard_id in pd.unique(shard_ids):
+            path = os.path.join(source_dir, f"shard-{shard_id:05d}-{chunk_number:05d}.arrow")
+            write_checkpoint(path, chunk[shard_ids == shard_id])
+            spilled["paths"].setdefault(int(shard_id), []).append(path)
+        del chunk
+
+    if spilled["empty"] is None:
+        logger.error(f"Error al cargar los datos desde {loader.file_path}: el archivo no contiene registros.")
+        raise ValueError(f"El archivo {loader.file_path} no contiene registros.")
+    logger.info(f"{name.capitalize()} repartido en {len(spilled['paths'])} shards: {spilled['rows']} registros.")
+    return spilled
+
+
+def load_shard_source(spilled, shard_id):
+    """Lee los trozos de un shard escritos por `spill_source_shards`; sin trozos, la fuente vacía."""
+    frames = [read_checkpoint(path) for path in spilled["paths"].get(shard_id, [])]
+    if not frames:
+        return spilled["empty"]
+    # Cada lote tiene su propio diccionario de categorías; se unifican antes de concatenar
+    return concat_aligned(frames, ignore_index=True)
+
+
+def run_shard(shard_id, spilled_sources, config, reference_date):
+    """
+    Lee los trozos de un shard, lo procesa y escribe su parte del dataset final. Se ejecuta en
+    un proceso del pool de `run_sharded`.
+
+    Returns:
+        int: Filas escritas por el shard.
+    """
+    shard_data = {name: load_shard_source(spilled, shard_id) for name, spilled in spilled_sources.items()}
+    final_df = process_shard(shard_data, config, reference_date)
+    export_format = config["output_paths"].get("export_format", "csv").lower()
+    build_exporter(config).export_part(final_df, config["output_paths"]["final"], shard_id, export_format)
+    return len(final_df)
+
+
+def run_sharded(loaders, config, reference_date=None, graph=None, profiler=None):
+    """
+    Reparte prints, taps y pagos por hash de user_id durante la ingesta y procesa cada shard en
+    un proceso independiente.
+
+    La ingesta de cada fuente (etapas 'shard:<fuente>' del grafo) escribe cada lote ya repartido
+    en `sharding.spill_dir`, de modo que ni el proceso principal ni ningún otro mantiene las
+    fuentes completas: cada proceso de trabajo lee solo los trozos de su shard. Todas las
+    métricas dependen solo de filas del mismo user_id, salvo la fecha de referencia (la fecha
+    máxima de prints), que se obtiene durante la ingesta y se pasa a cada shard. Cada shard
+    escribe su parte como `part-NNNNN` en el directorio `output_paths.final`.
+
+    Args:
+        loaders (dict): Cargadores de prints, taps y pagos.
+        config (dict): Configuración del pipeline.
+        reference_date (pd.Timestamp, optional): Fecha de referencia; por defecto, la máxima de prints.
+        graph (StageGraph, optional): Grafo en el que se añaden las etapas de ingesta.
+        profiler (StageProfiler, optional): Perfilador de la etapa 'sharded'.
+
+    Returns:
+        int: Filas escritas en total.
+    """
+    sharding_config = config.get("sharding") or {}
+    num_shards = sharding_config.get("num_shards") or os.cpu_count() or 1
+    max_workers = sharding_config.get("max_workers") or min(num_shards, os.cpu_count() or 1)
+    spill_dir = sharding_config.get("spill_dir") or "./data/shards"
+    graph = graph or StageGraph()
+    profiler = profiler or StageProfiler(enabled=False)
+
+    output_dir = config["output_paths"]["final"]
+    reset_output_dir(output_dir)
+    reset_output_dir(spill_dir)
+    for name, loader in loaders.items():
+        graph.add_stage(f"shard:{name}", partial(spill_source_shards, name, loader, num_shards, spill_dir),
+                        outputs=[f"{name}_shards"])
+
+    try:
+        spilled_sources = graph.run([f"{name}_shards" for name in SOURCES])
+        spilled_sources = {name: spilled_sources[f"{name}_shards"] for name in SOURCES}
+        if reference_date is None:
+            reference_date = spilled_sources["prints"]["max_date"]
+        logger.info(f"Ejecución por shards: {num_shards} shards de user_id en {max_workers} procesos, "
+                    f"fecha de referencia {reference_date}.")
+
+        total_rows = 0
+        with profiler.stage("sharded", rows_in=sum(spilled["rows"] for spilled in spilled_sources.values())) as stage, \
+                concurrent.futures.ProcessPoolExecutor(max_workers=max_workers, initializer=init_worker_logging,
+                                                       initargs=(worker_log_queue(),)) as executor:
+            futures = {}
+            # Los shards sin prints no producen filas
+            for shard_id in sorted(spilled_sources["prints"]["paths"]):
+                futures[executor.submit(run_shard, shard_id, spilled_sources, config, reference_date)] = shard_id
+
+            for future in concurrent.futures.as_completed(futures):
+                try:
+                    rows = future.result()
+                except Exception as e:
+                    logger.error(f"Error al procesar el shard {futures[future]}: {e}")
+                    raise
+                total_rows += rows
+                logger.info(f"Shard {futures[future]} completado: {rows} filas.")
+            stage.rows_out = total_rows
+    finally:
+        shutil.rmtree(spill_dir, ignore_errors=True)
+
+    logger.info(f"Dataset final escrito por partes en {output_dir}: {total_rows} filas.")
+    return total_rows
+
+
+def _process_partition(prints_df, taps_df, pays_df, config, reference_date):
+    return process_shard({"prints": prints_df, "taps": taps_df, "pays": pays_df}, config, reference_date)
+
+
+def run_out_of_core(loaders, config, reference_date=None):
+    """
+    Ejecuta el pipeline sin materializar las fuentes ni el DataFrame maestro en memoria.
+
+    Cada archivo se lee por bloques en particiones de Dask transformadas con `map_partitions`;
+    las tres fuentes se redistribuyen por user_id en el mismo número de particiones, de modo que
+    la partición i de prints, taps y pagos contiene los mismos usuarios y el join, las métricas
+    y la optimización se resuelven partición a partición. Todo el grafo es perezoso hasta que
+    la exportación escribe cada partición como una parte del directorio `output_paths.final`.
+    """
+    out_of_core_config = config.get("out_of_core") or {}
+    blocksize = out_of_core_config.get("blocksize", "64MB")
+    npartitions = out_of_core_config.get("npartitions") or os.cpu_count() or 1
+
+    sources = {name: loader.load_dask(blocksize) for name, loader in loaders.items()}
+
+    # La fecha de referencia es el único valor global: si no se configura, se calcula con una
+    # pasada sobre prints
+    if reference_date is None:
+        reference_date = sources["prints"]["day"].max().compute()
+    logger.info(f"Ejecución fuera de memoria: {npartitions} particiones por user_id, "
+                f"fecha de referencia {reference_date}.")
+
+    shuffled = {name: ddf.shuffle("user_id", npartitions=npartitions) for name, ddf in sources.items()}
+    meta = process_shard({name: ddf._meta.copy() for name, ddf in sources.items()}, config, reference_date)
+    final_ddf = dd.map_partitions(
+        _process_partition, shuffled["prints"], shuffled["taps"], shuffled["pays"],
+        config=config, reference_date=reference_date, meta=meta, align_dataframes=False
+    )
+
+    output_dir = config["output_paths"]["final"]
+    reset_output_dir(output_dir)
+    export_format = config["output_paths"].get("export_format", "csv").lower()
+    build_exporter(config).export_partitioned(final_ddf, output_dir, format=export_format)
+
+
+def main(argv=None):
+    args = parse_args(argv)
     setup_logging()
     logger.info("Iniciando el pipeline de procesamiento de datos.")
 
     # Cargar configuración
     config = load_config()
 
-    # Cargar datos
+    # El informe se escribe también si la ejecución falla, con las etapas completadas
+    profiler = build_profiler(config, args)
+    try:
+        run_pipeline(config, args, profiler)
+    finally:
+        profiler.write_report(report_path(config))
+
+
+def run_pipeline(config, args, profiler):
+    # Cargar datos (por lotes si se configura 'ingest.chunk_size')
+    ingest_config = config.get("ingest") or {}
+    loader_options = {
+        "chunk_size": ingest_config.get("chunk_size"),
+        "engine": ingest_config.get("engine", "pandas"),
+        "cache": build_transform_cache(config, args),
+    }
     loaders = {
-        "prints": PrintsLoader(config["data_paths"]["prints"]),
-        "taps": TapsLoader(config["data_paths"]["taps"]),
-        "pays": PaysLoader(config["data_paths"]["pays"])
+        "prints": PrintsLoader(config["data_paths"]["prints"], **loader_options),
+        "taps": TapsLoader(config["data_paths"]["taps"], **loader_options),
+        "pays": PaysLoader(config["data_paths"]["pays"], **loader_options)
     }
-    #data = load_data(loaders)
-    data = load_data_parallel(loaders)
-
-    # Unir datos en el DataFrame maestro
-    master_df = join_data(data["prints"], data["taps"], data["pays"])
-
-    # Filtrar últimos registros de la semana
-    prints_last_week = filter_data_last_week(master_df)
-
-    # Calcular métricas y unirlas al DataFrame final
-    final_df = calculate_metrics_parallel(master_df, prints_last_week, data["pays"])
 
-    # Optimizar y exportar el dataset final
-    optimize_and_export(final_df, config)
+    # El modo incremental mantiene toda la historia en su almacén y solo lee los días recientes
+    reference_date = None
+    since = None
+    if (config.get("incremental") or {}).get("enabled", False):
+        since = incremental_since(config)
+        for loader in loaders.values():
+            loader.date_window = None if since is None else (since, None)
+    else:
+        with profiler.stage("scan_window"):
+            reference_date, date_window = resolve_window(loaders["prints"], config)
+        for loader in loaders.values():
+            loader.date_window = date_window
+
+    if (config.get("out_of_core") or {}).get("enabled", False):
+        with profiler.stage("out_of_core"):
+            run_out_of_core(loaders, config, reference_date)
+        logger.info("Pipeline fuera de memoria completado exitosamente.")
+        return
+
+    # Grafo de etapas: la ingesta de las tres fuentes se ejecuta en paralelo y cada valor
+    # intermedio se libera cuando ya no lo necesita ninguna etapa
+    graph = StageGraph.from_config(config.get("scheduler"), profiler, build_checkpoints(config, args))
+    incremental = (config.get("incremental") or {}).get("enabled", False)
+
+    if (config.get("sharding") or {}).get("enabled", False) and not incremental:
+        run_sharded(loaders, config, reference_date, graph, profiler)
+        logger.info("Pipeline por shards completado exitosamente.")
+        return
+
+    add_ingest_stages(graph, loaders)
+
+    # Un mismo motor de ejecución para el join, las métricas y la optimización
+    backend = ExecutionBackend.from_config(config.get("execution"))
+    logger.info(f"Motor de ejecución: {backend.name} ({backend.npartitions} particiones).")
+    try:
+        if incremental:
+            data = graph.run(SOURCES)
+            with profiler.stage("incremental", rows_in=sum(len(df) for df in data.values())) as stage:
+                final_df = run_incremental(loaders, data, config, backend, since)
+                stage.set_output(final_df)
+            optimize_and_export(final_df, config, backend, profiler=profiler)
+            logger.info("Pipeline incremental completado exitosamente.")
+            return
+
+        # Unir, filtrar la última semana, calcular las métricas, optimizar y exportar
+        add_processing_stages(graph, config, backend, reference_date)
+        graph.run(["exported_rows"])
+    finally:
+        backend.close()
 
     logger.info("Pipeline de procesamiento completado exitosamente.")
 
@@ -1,12 +1,15 @@
-import dask.dataframe as dd
 from datetime import timedelta
+import numpy as np
 import pandas as pd
+from src.preprocess.window_engine import SortedWindowIndex
+from src.utils.execution import ExecutionBackend
 from src.utils.logger import logger
 
 class MetricsAggregator:
-    def __init__(self, user_id_col="user_id", value_prop_col="value_prop"):
+    def __init__(self, user_id_col="user_id", value_prop_col="value_prop", backend=None):
         self.user_id_col = user_id_col
         self.value_prop_col = value_prop_col
+        self.backend = backend or ExecutionBackend("pandas")
         logger.info("Inicializando MetricsAggregator con columnas: user_id_col=%s, value_prop_col=%s",
                     user_id_col, value_prop_col)
 
@@ -21,109 +24,183 @@ class MetricsAggregator:
 
     def calculate_click_indicator(self, dataframe, prints_last_week):
         """
-        Calcula el indicador de clics (clicked) para cada print en la última semana utilizando Dask.
+        Calcula el indicador de clics (clicked) para cada print en la última semana con el motor
+        de ejecución configurado.
         """
         self.validate_columns(dataframe, ['day_taps', 'user_id', 'value_prop'])
         self.validate_columns(prints_last_week, ['day_prints', 'user_id', 'value_prop'])
 
-        # Convertir a Dask DataFrames
-        ddf = dd.from_pandas(dataframe, npartitions=4)
-        prints_last_week_ddf = dd.from_pandas(prints_last_week, npartitions=4)
-
         # Marcar los registros con clics y hacer el merge con prints_last_week
-        ddf['clicked'] = (~ddf['day_taps'].isnull()).map({True: "Sí", False: "No"})  # Usar `isnull()` y negarlo
-        clicks_merged = dd.merge(prints_last_week_ddf,
-                                 ddf[['user_id', 'value_prop', 'day_prints', 'clicked']],
-                                 on=['user_id', 'value_prop', 'day_prints'],
-                                 how='left')
+        clicks = dataframe[['user_id', 'value_prop', 'day_prints']].copy()
+        clicks['clicked'] = np.where(dataframe['day_taps'].isna(), "No", "Sí")
+        clicks_merged = self.backend.merge(prints_last_week, clicks,
+                                           on=['user_id', 'value_prop', 'day_prints'],
+                                           how='left')
         clicks_merged['clicked'] = clicks_merged['clicked'].fillna("No")
-        return clicks_merged[['user_id', 'value_prop', 'day_prints', 'clicked']].compute()
+        return clicks_merged[['user_id', 'value_prop', 'day_prints', 'clicked']]
+
+    def _print_groups(self, prints_last_week):
+        """
+        Agrupa los prints por (user_id, value_prop, day_prints) con el número de filas repetidas.
+        """
+        key_columns = [self.user_id_col, self.value_prop_col, 'day_prints']
+        return (prints_last_week
+                .groupby(key_columns, sort=False, observed=True)
+                .size()
+                .reset_index(name='_print_rows'))
+
+    def _window_event_counts(self, events, time_column, groups, start_date):
+        """
+        Cuenta, para cada grupo de prints, las filas de `events` de la misma clave con
+        `start_date <= time_column < day_prints`.
+
+        Se ordenan los eventos por clave y fecha y cada grupo se resuelve con búsqueda binaria,
+        sin el merge evento × print.
+        """
+        key_columns = [self.user_id_col, self.value_prop_col]
+        index = SortedWindowIndex([events[col] for col in key_columns], events[time_column])
+        return index.count([groups[col] for col in key_columns], start_date, groups['day_prints'])
+
+    def _window_payment_amounts(self, pays_df, groups, weeks):
+        """
+        Suma, para cada grupo de prints, el `total` de los pagos de la misma clave con
+        `day_prints - weeks <= pay_date < day_prints`.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: Importe y número de pagos por grupo.
+        """
+        key_columns = [self.user_id_col, self.value_prop_col]
+        index = SortedWindowIndex([pays_df[col] for col in key_columns], pays_df['pay_date'], pays_df['total'])
+        window_start = groups['day_prints'] - pd.Timedelta(weeks=weeks)
+        return index.sum([groups[col] for col in key_columns], window_start, groups['day_prints'])
+
+    def _count_events_per_print(self, events, time_column, prints_last_week, start_date, count_column):
+        """
+        Cuenta los eventos de la ventana de cada print. El resultado coincide con el merge
+        anterior: el conteo se multiplica por las filas repetidas del print y se omiten los
+        grupos sin eventos.
+        """
+        groups = self._print_groups(prints_last_week)
+        event_counts = self._window_event_counts(events, time_column, groups, start_date)
+
+        groups[count_column] = groups['_print_rows'].to_numpy() * event_counts
+        counts = groups[groups[count_column] > 0]
+        return counts[[self.user_id_col, self.value_prop_col, 'day_prints', count_column]].reset_index(drop=True)
 
     def calculate_view_counts(self, dataframe, prints_last_week, weeks=3):
         """
-        Calcula la cantidad de vistas para los registros de las últimas tres semanas utilizando Dask.
+        Calcula la cantidad de vistas previas de cada print de la última semana, contando las
+        vistas desde tres semanas antes de la fecha máxima hasta el día del print.
         """
         self.validate_columns(dataframe, ['day_prints', self.user_id_col, self.value_prop_col])
         self.validate_columns(prints_last_week, ['day_prints', self.user_id_col, self.value_prop_col])
 
-        # Convertir a Dask DataFrames
-        ddf = dd.from_pandas(dataframe, npartitions=4)
-        prints_last_week_ddf = dd.from_pandas(prints_last_week, npartitions=4)
-
-        # Filtrar registros de las últimas tres semanas y realizar el merge
-        last_date = ddf['day_prints'].max().compute()
+        last_date = dataframe['day_prints'].max()
         start_date = last_date - pd.Timedelta(weeks=weeks)
-        ddf_recent = ddf[(ddf['day_prints'] >= start_date) & (ddf['day_prints'] <= last_date)]
-
-        merged_df = dd.merge(ddf_recent,
-                             prints_last_week_ddf[['user_id', 'value_prop', 'day_prints']],
-                             on=['user_id', 'value_prop'],
-                             suffixes=('', '_print_last_week'))
-        merged_df = merged_df[merged_df['day_prints'] < merged_df['day_prints_print_last_week']]
-
-        # Contar vistas y usar rename para ajustar el nombre
-        view_counts = (merged_df.groupby(['user_id', 'value_prop', 'day_prints_print_last_week'])
-                       .size()
-                       .reset_index()
-                       .rename(columns={0: 'view_count', 'day_prints_print_last_week': 'day_prints'}))
-        return view_counts[['user_id', 'value_prop', 'day_prints', 'view_count']].compute()
+        return self._count_events_per_print(dataframe, 'day_prints', prints_last_week, start_date, 'view_count')
 
     def calculate_click_counts_per_value_prop(self, dataframe, prints_last_week, weeks=3):
         """
-        Calcula la cantidad de clics por usuario y value_prop en las últimas tres semanas utilizando Dask.
+        Calcula la cantidad de clics previos por usuario y value_prop de cada print de la última
+        semana, contando los clics desde tres semanas antes de la fecha máxima hasta el día del print.
         """
         self.validate_columns(dataframe, ['day_taps', self.user_id_col, self.value_prop_col])
         self.validate_columns(prints_last_week, ['day_prints', self.user_id_col, self.value_prop_col])
 
-        # Convertir a Dask DataFrames
-        ddf = dd.from_pandas(dataframe, npartitions=4)
-        prints_last_week_ddf = dd.from_pandas(prints_last_week, npartitions=4)
-
-        # Filtrar registros de las últimas tres semanas y realizar el merge
-        last_date = ddf['day_prints'].max().compute()
+        last_date = dataframe['day_prints'].max()
         start_date = last_date - pd.Timedelta(weeks=weeks)
-        ddf_recent = ddf[(ddf['day_taps'] >= start_date) & (ddf['day_taps'] <= last_date)]
-
-        merged_df = dd.merge(ddf_recent,
-                             prints_last_week_ddf[['user_id', 'value_prop', 'day_prints']],
-                             on=['user_id', 'value_prop'],
-                             suffixes=('', '_print_last_week'))
-        merged_df = merged_df[merged_df['day_taps'] < merged_df['day_prints_print_last_week']]
-
-        # Contar clics y usar rename para ajustar el nombre
-        click_counts = (merged_df.groupby(['user_id', 'value_prop', 'day_prints_print_last_week'])
-                        .size()
-                        .reset_index()
-                        .rename(columns={0: 'click_count', 'day_prints_print_last_week': 'day_prints'}))
-        return click_counts[['user_id', 'value_prop', 'day_prints', 'click_count']].compute()
+        return self._count_events_per_print(dataframe, 'day_taps', prints_last_week, start_date, 'click_count')
 
     def calculate_cumulative_payment_amounts(self, dataframe, pays_df, weeks=3):
         """
-        Calcula el importe acumulado por usuario y value_prop en las últimas tres semanas utilizando Dask.
-        """
-        self.validate_columns(pays_df, ['pay_date', 'total', 'user_id', 'value_prop'])
-        self.validate_columns(dataframe, ['day_prints', 'user_id', 'value_prop'])
+        Calcula el importe acumulado por usuario y value_prop en las tres semanas previas a cada
+        día de prints (`day_prints - weeks <= pay_date < day_prints`).
 
-        # Convertir a Dask DataFrames
-        ddf = dd.from_pandas(dataframe, npartitions=4)
-        pays_ddf = dd.from_pandas(pays_df, npartitions=4)
-
-        # Crear columna de referencia temporal y realizar el merge
-        ddf['three_weeks_ago'] = ddf['day_prints'] - pd.Timedelta(weeks=weeks)
-        merged_df = dd.merge(pays_ddf,
-                             ddf[['user_id', 'value_prop', 'day_prints', 'three_weeks_ago']],
-                             left_on=['user_id', 'value_prop'],
-                             right_on=['user_id', 'value_prop'],
-                             how='inner',
-                             suffixes=('', '_print'))
-        filtered_pays = merged_df[
-            (merged_df['pay_date'] >= merged_df['three_weeks_ago']) & (merged_df['pay_date'] < merged_df['day_prints'])
-            ]
+        Los pagos se ordenan por clave y fecha con sumas prefijas de `total`; cada print obtiene
+        su suma con dos búsquedas binarias, en O((P + N) log P) en lugar del join pagos × filas
+        del maestro. Como en el join anterior, el importe se multiplica por las filas repetidas
+        de cada print y se omiten los prints sin pagos en la ventana.
+        """
+        self.validate_columns(pays_df, ['pay_date', 'total', self.user_id_col, self.value_prop_col])
+        self.validate_columns(dataframe, ['day_prints', self.user_id_col, self.value_prop_col])
 
-        # Sumar pagos y renombrar la columna después de reset_index
-        cumulative_amounts = (filtered_pays.groupby(['user_id', 'value_prop', 'day_prints'])
-                              ['total'].sum().reset_index()
-                              .rename(columns={'total': 'cumulative_payment_amount'}))
-        return cumulative_amounts[['user_id', 'value_prop', 'day_prints', 'cumulative_payment_amount']].compute()
+        groups = self._print_groups(dataframe)
+        amounts, payments = self._window_payment_amounts(pays_df, groups, weeks)
 
+        groups['cumulative_payment_amount'] = groups['_print_rows'].to_numpy() * amounts
+        cumulative_amounts = groups[payments > 0]
+        return cumulative_amounts[[self.user_id_col, self.value_prop_col, 'day_prints',
+                                   'cumulative_payment_amount']].reset_index(drop=True)
 
+    def calculate_metrics(self, dataframe, prints_last_week, pays_df, weeks=3, reference_date=None):
+        """
+        Calcula en un solo operador `clicked`, `view_count`, `click_count` y
+        `cumulative_payment_amount` para los prints de la última semana y devuelve el
+        DataFrame final, sin merges intermedios ni conversiones a Dask.
+
+        Todas las métricas comparten la misma agrupación de prints por
+        (user_id, value_prop, day_prints). El resultado contiene las mismas filas que unir por
+        separado las cuatro métricas a `prints_last_week`: cada fila del maestro del grupo
+        aporta su indicador `clicked` repetido una vez por cada par de filas del print.
+
+        Args:
+            dataframe (pd.DataFrame): DataFrame maestro (prints unidos con taps y pagos).
+            prints_last_week (pd.DataFrame): Prints de la última semana.
+            pays_df (pd.DataFrame): Pagos transformados.
+            weeks (int): Semanas de historia de las métricas.
+            reference_date (pd.Timestamp, optional): Fecha máxima global de prints; por defecto, la
+                de `dataframe`. Debe indicarse cuando `dataframe` es solo un shard de usuarios.
+
+        Returns:
+            pd.DataFrame: Una fila por combinación print × indicador de clic con las cuatro métricas.
+        """
+        self.validate_columns(dataframe, ['day_prints', 'day_taps', self.user_id_col, self.value_prop_col])
+        self.validate_columns(prints_last_week, ['day_prints', self.user_id_col, self.value_prop_col])
+        self.validate_columns(pays_df, ['pay_date', 'total', self.user_id_col, self.value_prop_col])
+
+        # La fecha de referencia es global; el resto de métricas solo depende de cada usuario,
+        # así que el motor puede repartir el cálculo por shards de user_id
+        last_date = dataframe['day_prints'].max() if reference_date is None else pd.Timestamp(reference_date)
+        return self.backend.map_shards([prints_last_week, dataframe, pays_df], self._calculate_metrics,
+                                       key=self.user_id_col, weeks=weeks, last_date=last_date)
+
+    def _calculate_metrics(self, prints_last_week, dataframe, pays_df, weeks, last_date):
+        key_columns = [self.user_id_col, self.value_prop_col, 'day_prints']
+        groups = self._print_groups(prints_last_week)
+        print_rows = groups['_print_rows'].to_numpy()
+
+        # Filas del maestro de cada grupo, ordenadas por grupo conservando su orden original
+        group_index = pd.MultiIndex.from_frame(groups[key_columns])
+        master_groups = group_index.get_indexer(pd.MultiIndex.from_frame(dataframe[key_columns]))
+        in_groups = np.flatnonzero(master_groups >= 0)
+        master_order = in_groups[np.argsort(master_groups[in_groups], kind="stable")]
+        master_rows = np.bincount(master_groups[in_groups], minlength=len(groups))
+        master_starts = np.concatenate(([0], np.cumsum(master_rows)[:-1]))
+        master_clicked = np.where(pd.isna(dataframe['day_taps'].to_numpy()[master_order]), "No", "Sí")
+
+        # Métricas por grupo
+        start_date = last_date - pd.Timedelta(weeks=weeks)
+        view_counts = print_rows * self._window_event_counts(dataframe, 'day_prints', groups, start_date)
+        click_counts = print_rows * self._window_event_counts(dataframe, 'day_taps', groups, start_date)
+        amounts, payments = self._window_payment_amounts(pays_df, groups, weeks)
+        payment_amounts = np.where(payments > 0, master_rows * amounts, np.nan)
+
+        # Cada fila de prints se repite por cada fila del grupo en el maestro y por cada fila
+        # repetida del print (un grupo sin filas en el maestro aporta un único "No")
+        prints_groups = group_index.get_indexer(pd.MultiIndex.from_frame(prints_last_week[key_columns]))
+        block_sizes = np.maximum(master_rows, 1)
+        repeats = (print_rows * block_sizes)[prints_groups]
+        out_groups = np.repeat(prints_groups, repeats)
+        offsets = np.arange(repeats.sum()) - np.repeat(np.cumsum(repeats) - repeats, repeats)
+        positions = np.where(master_rows[out_groups] > 0,
+                             master_starts[out_groups] + offsets % block_sizes[out_groups],
+                             len(master_clicked))
+        clicked = np.append(master_clicked, "No")[positions]
+
+        final_df = groups.loc[out_groups, key_columns].reset_index(drop=True)
+        final_df['clicked'] = clicked
+        final_df['view_count'] = np.where(view_counts > 0, view_counts, np.nan)[out_groups]
+        final_df['click_count'] = np.where(click_counts > 0, click_counts, np.nan)[out_groups]
+        final_df['cumulative_payment_amount'] = payment_amounts[out_groups]
+        logger.info(f"Métricas calculadas en un solo paso: {final_df.shape}")
+        return final_df
@@ -1,17 +1,21 @@
 import pandas as pd
 from datetime import timedelta
+from src.utils.date_parsing import to_datetime_memoized
 from src.utils.logger import logger
 
 class LastWeekFilter:
     def __init__(self, date_column):
         self.date_column = date_column
 
-    def filter(self, df):
+    def filter(self, df, reference_date=None):
         """
         Filtra los datos para conservar solo las filas de la última semana.
 
         Args:
             df (pd.DataFrame): El DataFrame de entrada.
+            reference_date (pd.Timestamp, optional): Fecha máxima global. Si se indica, la semana
+                se calcula desde ella en lugar de la fecha máxima de `df` (p. ej. al filtrar un shard)
+                y se descartan las filas posteriores.
 
         Returns:
             pd.DataFrame: DataFrame filtrado.
@@ -24,17 +28,27 @@ class LastWeekFilter:
                 logger.error(f"La columna '{self.date_column}' no se encuentra en el DataFrame.")
                 raise KeyError(f"La columna '{self.date_column}' no se encuentra en el DataFrame.")
 
-            max_date = pd.to_datetime(df[self.date_column]).max()
+            # Una sola conversión (sin copia si la columna ya es de fecha) para la fecha máxima y el filtro
+            column = df[self.date_column]
+            dates = to_datetime_memoized(column)
+            if dates is not column:
+                df[self.date_column] = dates
+
+            if reference_date is not None:
+                max_date = pd.Timestamp(reference_date)
+            else:
+                max_date = dates.max()
             if not isinstance(max_date, pd.Timestamp):
                 raise TypeError(f"max_date debería ser pd.Timestamp, pero es {type(max_date)}")
 
             last_week_date = max_date - pd.Timedelta(weeks=1)
             logger.info(f"Fecha máxima encontrada: {max_date}. Filtrando desde: {last_week_date}.")
 
-            df[self.date_column] = pd.to_datetime(df[self.date_column], errors='coerce')
-
             # Filtramos el DataFrame
-            filtered_df = df[df[self.date_column] >= last_week_date]
+            in_week = dates >= last_week_date
+            if reference_date is not None:
+                in_week &= dates <= max_date
+            filtered_df = df[in_week]
             logger.info(f"Número de registros después del filtrado: {filtered_df.shape[0]}.")
 
             return filtered_df
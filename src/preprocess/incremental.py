@@ -0,0 +1,64 @@
+import pandas as pd
+from src.utils.logger import logger
+
+
+class IncrementalPlanner:
+    def __init__(self, lookback_weeks=3, window_weeks=1):
+        """
+        Planifica qué días de prints deben recalcularse en una ejecución incremental.
+
+        Args:
+            lookback_weeks (int): Semanas de historia que usan las métricas (ver MetricsAggregator).
+            window_weeks (int): Semanas de prints analizadas (ver LastWeekFilter).
+        """
+        self.lookback = pd.Timedelta(weeks=lookback_weeks)
+        self.window = pd.Timedelta(weeks=window_weeks)
+
+    def analysis_days(self, print_days):
+        """
+        Devuelve los días de prints de la ventana analizada (la última semana).
+        """
+        if not print_days:
+            return []
+        max_day = max(print_days)
+        return [day for day in print_days if day >= max_day - self.window]
+
+    def affected_print_days(self, print_days, changed_days, previous_max_day=None):
+        """
+        Determina los días de prints cuyas métricas cambian con los días modificados.
+
+        Un día de prints `d` se ve afectado si algún día modificado `c` cumple
+        `d - lookback <= c <= d`. Si la fecha máxima avanza, la ventana de referencia de las
+        métricas también se desplaza y se recalcula toda la ventana analizada.
+
+        Args:
+            print_days (list[pd.Timestamp]): Días de prints almacenados.
+            changed_days (iterable[pd.Timestamp]): Días nuevos o modificados de cualquier fuente.
+            previous_max_day (pd.Timestamp, optional): Fecha máxima de la ejecución anterior.
+
+        Returns:
+            list[pd.Timestamp]: Días de prints a recalcular, ordenados.
+        """
+        analysis_days = self.analysis_days(print_days)
+        if not analysis_days:
+            return []
+
+        max_day = max(print_days)
+        if previous_max_day is None or pd.Timestamp(previous_max_day) != max_day:
+            logger.info(f"Fecha máxima {max_day} distinta de la anterior ({previous_max_day}): "
+                        f"se recalcula toda la ventana analizada.")
+            return analysis_days
+
+        changed_days = sorted(set(changed_days))
+        affected = [
+            day for day in analysis_days
+            if any(day - self.lookback <= changed <= day for changed in changed_days)
+        ]
+        logger.info(f"{len(affected)} de {len(analysis_days)} días de prints afectados por {len(changed_days)} días modificados.")
+        return affected
+
+    def load_window(self, affected_days, max_day):
+        """
+        Devuelve el rango de días [inicio, fin] que hay que leer para recalcular `affected_days`.
+        """
+        return min(affected_days) - self.lookback, max_day
@@ -0,0 +1,129 @@
+import numpy as np
+import pandas as pd
+
+
+class SortedWindowIndex:
+    def __init__(self, key_columns, times, weights=None):
+        """
+        Índice de eventos ordenados por clave y fecha para agregar eventos en ventanas temporales.
+
+        Los eventos se ordenan una sola vez por (clave, fecha) y cada consulta
+        "¿cuántos eventos de la clave k hay en [inicio, fin)?" se resuelve con dos búsquedas
+        binarias vectorizadas, sin generar el producto cruzado entre eventos y consultas. Si se
+        indican pesos, se guardan en el mismo orden y la suma de cada ventana se calcula solo con
+        sus propios eventos (no como diferencia de sumas acumuladas, que arrastraría el error
+        de redondeo de los eventos anteriores).
+
+        Args:
+            key_columns (list): Columnas (Series o arrays) que forman la clave de cada evento.
+            times (pd.Series): Fecha de cada evento; los eventos sin fecha se ignoran.
+            weights (pd.Series, optional): Valor a sumar de cada evento (los nulos cuentan como 0).
+        """
+        self._key_uniques = []
+        self._key_sizes = []
+        key_codes = np.zeros(len(times), dtype=np.int64)
+        valid = ~np.asarray(pd.isna(times))
+        for column in key_columns:
+            codes, uniques = pd.factorize(column)
+            self._key_uniques.append(pd.Index(uniques))
+            self._key_sizes.append(len(uniques))
+            valid &= codes >= 0
+            key_codes = key_codes * len(uniques) + codes
+
+        event_times = _to_int64(times)[valid]
+        key_codes = key_codes[valid]
+
+        # Las fechas se comprimen a su rango para que (clave, rango) quepa en un int64
+        self._time_values = np.unique(event_times)
+        self._time_stride = len(self._time_values) + 1
+        time_ranks = np.searchsorted(self._time_values, event_times)
+
+        composite = key_codes * self._time_stride + time_ranks
+        self._order = np.argsort(composite, kind="stable")
+        self._sorted_composite = composite[self._order]
+
+        self._sorted_weights = None
+        if weights is not None:
+            sorted_weights = np.nan_to_num(np.asarray(weights, dtype=np.float64)[valid][self._order])
+            # Un cero al final para que el fin de ventana `len(self)` sea un índice válido en reduceat
+            self._sorted_weights = np.append(sorted_weights, 0.0)
+
+    def __len__(self):
+        return len(self._sorted_composite)
+
+    def _query_key_codes(self, key_columns):
+        key_codes = np.zeros(len(key_columns[0]), dtype=np.int64)
+        known = np.ones(len(key_columns[0]), dtype=bool)
+        for column, uniques, size in zip(key_columns, self._key_uniques, self._key_sizes):
+            codes = uniques.get_indexer(column)
+            known &= codes >= 0
+            key_codes = key_codes * size + codes
+        return key_codes, known
+
+    def _positions(self, key_codes, bound, side):
+        """
+        Posición en el índice ordenado del primer evento de la clave con fecha >= `bound`
+        (`side="left"`) o > `bound` (`side="right"`).
+        """
+        bound = np.broadcast_to(_to_int64(bound), key_codes.shape)
+        ranks = np.searchsorted(self._time_values, bound, side=side)
+        return np.searchsorted(self._sorted_composite, key_codes * self._time_stride + ranks, side="left")
+
+    def window_bounds(self, key_columns, start, end, inclusive_end=False):
+        """
+        Devuelve, para cada consulta, el rango [lo, hi) del índice ordenado con sus eventos.
+
+        Args:
+            key_columns (list): Columnas de clave de las consultas, en el mismo orden que el índice.
+            start: Inicio de la ventana (incluido); escalar o array por consulta.
+            end: Fin de la ventana (excluido salvo `inclusive_end`); escalar o array por consulta.
+            inclusive_end (bool): Si el fin de la ventana se incluye.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: Posiciones inicial y final de cada consulta.
+        """
+        key_codes, known = self._query_key_codes(key_columns)
+        lo = self._positions(key_codes, start, "left")
+        hi = self._positions(key_codes, end, "right" if inclusive_end else "left")
+        hi = np.maximum(hi, lo)
+        # Las claves sin eventos no tienen rango en el índice
+        lo[~known] = 0
+        hi[~known] = 0
+        return lo, hi
+
+    def count(self, key_columns, start, end, inclusive_end=False):
+        """
+        Cuenta los eventos de cada consulta dentro de su ventana [start, end).
+
+        Returns:
+            np.ndarray: Número de eventos (int64) por consulta.
+        """
+        lo, hi = self.window_bounds(key_columns, start, end, inclusive_end)
+        return (hi - lo).astype(np.int64)
+
+    def sum(self, key_columns, start, end, inclusive_end=False):
+        """
+        Suma los pesos de los eventos de cada consulta dentro de su ventana [start, end).
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: Suma (float64) y número de eventos por consulta.
+        """
+        if self._sorted_weights is None:
+            raise ValueError("El índice se creó sin pesos; no se pueden calcular sumas.")
+        lo, hi = self.window_bounds(key_columns, start, end, inclusive_end)
+        sums = np.zeros(len(lo), dtype=np.float64)
+        filled = np.flatnonzero(hi > lo)
+        if len(filled):
+            # reduceat suma [lo, hi) en las posiciones pares; las impares son los huecos entre
+            # ventanas, que con las consultas ordenadas por `lo` recorren el índice una sola vez
+            filled = filled[np.argsort(lo[filled], kind="stable")]
+            bounds = np.column_stack((lo[filled], hi[filled])).ravel()
+            sums[filled] = np.add.reduceat(self._sorted_weights, bounds)[::2]
+        return sums, (hi - lo).astype(np.int64)
+
+
+def _to_int64(times):
+    """Convierte fechas (escalares, Series o arrays) a nanosegundos int64; NaT queda como el mínimo int64."""
+    if isinstance(times, (pd.Timestamp, np.datetime64)) or np.ndim(times) == 0:
+        return np.int64(pd.Timestamp(times).as_unit("ns").value)
+    return np.asarray(times, dtype="datetime64[ns]").view(np.int64)
@@ -1,11 +1,24 @@
 import pandas as pd
-from concurrent.futures import ThreadPoolExecutor
+import pyarrow as pa
 from src.utils.logger import logger
 from src.utils.data_cleaner import DataCleaner
+from src.utils.date_parsing import convert_dates
 from src.utils.data_validation import SchemaValidator
 
+# Tipos de Arrow usados al extraer las claves de 'event_data'
+_ARROW_TYPES = {
+    "int64": pa.int64(),
+    "float64": pa.float64(),
+    "object": pa.string(),
+    "category": pa.string(),
+}
+
+# Tipo de Arrow con el que se leen las columnas categóricas (se convierte a pandas sin copia)
+_ARROW_DICTIONARY = pa.dictionary(pa.int32(), pa.string())
+
 class BaseTransformer:
-    def __init__(self, schema, critical_columns, non_critical_columns, date_columns=None):
+    def __init__(self, schema, critical_columns, non_critical_columns, date_columns=None, event_data_fields=None,
+                 date_formats=None):
         self.schema = schema
         self.cleaner = DataCleaner(
             critical_columns=critical_columns,
@@ -13,54 +26,137 @@ class BaseTransformer:
         )
         self.schema_validator = SchemaValidator(self.schema)
         self.date_columns = date_columns or []
+        self.date_formats = date_formats or {}
+        self.event_data_fields = event_data_fields or {}
 
     def expand_event_data(self, df, column_name="event_data", chunk_size=10000):
         """
-        Expande la columna 'event_data' de manera eficiente en chunks.
+        Expande la columna 'event_data' en columnas tipadas.
+
+        Si el transformador declara las claves conocidas de 'event_data' (`event_data_fields`),
+        cada clave se extrae directamente en una columna en una sola pasada vectorizada con
+        pyarrow; las claves no declaradas se descartan. En otro caso, o si los valores no se
+        ajustan a los tipos declarados, se usa la expansión genérica con `pd.json_normalize`.
         """
         try:
             logger.info("Iniciando expansión de 'event_data'.")
 
             if column_name in df.columns:
-                # Expansión en chunks para mejorar el rendimiento
-                expanded_chunks = []
-                for i in range(0, len(df), chunk_size):
-                    chunk = df.iloc[i:i + chunk_size]
-                    event_data_expanded = pd.json_normalize(chunk[column_name])
-                    expanded_chunk = chunk.drop(columns=[column_name]).reset_index(drop=True).join(event_data_expanded)
-                    expanded_chunks.append(expanded_chunk)
-
-                # Concatenar los chunks expandidos en un solo DataFrame
-                df = pd.concat(expanded_chunks, ignore_index=True)
+                expanded = None
+                if self.event_data_fields:
+                    expanded = self._extract_event_data_fields(df[column_name])
+
+                if expanded is None:
+                    df = self._expand_event_data_chunked(df, column_name, chunk_size)
+                else:
+                    df = df.drop(columns=[column_name]).reset_index(drop=True)
+                    for field_name, values in expanded.items():
+                        df[field_name] = values
                 logger.info("Expansión de 'event_data' completada.")
             else:
                 logger.warning(f"La columna '{column_name}' no está en el DataFrame.")
 
-            logger.info(f"Columnas en df después de la expansión de 'event_data': {df.columns.tolist()}")
+            logger.debug("Columnas en df después de la expansión de 'event_data': %s", df.columns)
             return df
         except (KeyError, ValueError) as e:
             logger.error(f"Error al expandir 'event_data': {e}")
             raise
 
-    def convert_dates_parallel(self, df):
+    def _extract_event_data_fields(self, event_data):
         """
-        Convierte las columnas especificadas a tipo datetime en el DataFrame de manera paralela.
+        Extrae las claves declaradas de 'event_data' a arrays tipados sin crear DataFrames intermedios.
+
+        Returns:
+            dict | None: Columnas extraídas por clave, o None si los datos no admiten la ruta rápida.
         """
-        def convert_column(col):
-            try:
-                df[col] = pd.to_datetime(df[col], errors='coerce')
-                if df[col].isna().sum() > 0:
-                    logger.warning(f"Algunos valores en la columna '{col}' no se pudieron convertir a datetime.")
-            except Exception as e:
-                logger.error(f"Error al convertir columna '{col}' a datetime: {e}")
-            return df
+        struct_type = pa.struct([
+            (field_name, _ARROW_TYPES[dtype]) for field_name, dtype in self.event_data_fields.items()
+        ])
+        try:
+            struct_array = pa.array(event_data.to_numpy(), type=struct_type, from_pandas=True)
+        except (pa.ArrowInvalid, pa.ArrowTypeError, TypeError) as e:
+            logger.warning(f"'event_data' no admite la expansión vectorizada, se usa json_normalize: {e}")
+            return None
 
-        with ThreadPoolExecutor() as executor:
-            futures = [executor.submit(convert_column, col) for col in self.date_columns]
-            for future in futures:
-                future.result()
+        # flatten() propaga los nulos del registro padre a cada campo
+        return {
+            field_name: child.to_pandas()
+            for field_name, child in zip(self.event_data_fields, struct_array.flatten())
+        }
 
-        return df
+    def _expand_event_data_chunked(self, df, column_name, chunk_size):
+        """
+        Expansión genérica de 'event_data' en chunks con `pd.json_normalize`.
+        """
+        expanded_chunks = []
+        for i in range(0, len(df), chunk_size):
+            # Se reinicia el índice para que la expansión se alinee con el chunk
+            chunk = df.iloc[i:i + chunk_size].reset_index(drop=True)
+            event_data_expanded = pd.json_normalize(chunk[column_name])
+            expanded_chunk = chunk.drop(columns=[column_name]).join(event_data_expanded)
+            expanded_chunks.append(expanded_chunk)
+
+        # Concatenar los chunks expandidos en un solo DataFrame
+        return pd.concat(expanded_chunks, ignore_index=True)
+
+    def _arrow_read_type(self, column, dtype):
+        if column in self.date_columns:
+            return pa.timestamp("ns")
+        if self.schema.get(column) == "category":
+            return _ARROW_DICTIONARY
+        return _ARROW_TYPES.get(dtype)
+
+    def arrow_read_schema(self, struct_column="event_data"):
+        """
+        Construye el esquema de Arrow con el que se parsean los datos crudos de esta fuente.
+
+        Cada columna se declara con el tipo final del esquema (fechas como timestamp y
+        categóricas como diccionario), de modo que la conversión a pandas ya produce los tipos
+        esperados y `enforce_schema` no copia ninguna columna. Las claves de 'event_data' se
+        declaran dentro del struct anidado para desanidarlas al leer.
+
+        Returns:
+            pa.Schema: Esquema explícito para los lectores de pyarrow.
+        """
+        fields = []
+        for column, dtype in self.schema.items():
+            if column in self.event_data_fields:
+                continue
+            arrow_type = self._arrow_read_type(column, dtype)
+            if arrow_type is not None:
+                fields.append(pa.field(column, arrow_type))
+
+        if self.event_data_fields:
+            fields.append(pa.field(struct_column, pa.struct([
+                (field_name, self._arrow_read_type(field_name, dtype))
+                for field_name, dtype in self.event_data_fields.items()
+            ])))
+        return pa.schema(fields)
+
+    def read_dtypes(self):
+        """
+        Tipos de pandas con los que los lectores de pandas parsean las columnas de primer nivel.
+
+        Las fechas se convierten después (admiten valores inválidos como nulos) y los enteros se
+        infieren: una columna entera con nulos se lee como float y se convierte tras descartar
+        esas filas.
+
+        Returns:
+            dict: Tipo por columna.
+        """
+        return {
+            column: dtype for column, dtype in self.schema.items()
+            if column not in self.date_columns and column not in self.event_data_fields
+            and not pd.api.types.is_integer_dtype(dtype)
+        }
+
+    def convert_dates(self, df):
+        """
+        Convierte las columnas de fecha a datetime parseando cada día distinto una sola vez, con
+        el formato declarado por el transformador (`date_formats`). Las columnas ya leídas como
+        fecha (lector de Arrow) no se vuelven a convertir.
+        """
+        return convert_dates(df, self.date_columns, self.date_formats)
 
     def process_data(self, df):
         """
@@ -69,15 +165,14 @@ class BaseTransformer:
         """
         logger.info("Iniciando el procesamiento completo de datos.")
         try:
-            # Expande la columna 'event_data' en chunks
+            # Expande la columna 'event_data'
             df = self.expand_event_data(df)
 
-            # Convertir las columnas de fecha especificadas de manera paralela
-            df = self.convert_dates_parallel(df)
+            # Convertir las columnas de fecha especificadas
+            df = self.convert_dates(df)
 
-            # Limpia los datos con el limpiador DataCleaner
-            df = self.cleaner.remove_critical_missing(df)
-            df = self.cleaner.impute_non_critical_missing(df)
+            # Limpia los datos con el limpiador DataCleaner (una sola pasada)
+            df = self.cleaner.clean(df)
 
             # Valida el esquema del DataFrame usando SchemaValidator
             df = self.schema_validator.enforce_schema(df)
@@ -1,11 +1,95 @@
+import io
+import logging
 import pandas as pd
+from src.utils.execution import ExecutionBackend
 from src.utils.logger import logger
 
 
 class DataJoiner:
-    def __init__(self, user_id_col="user_id", value_prop_col="value_prop"):
+    MODES = ("key", "time_aware")
+    EXPANSION_ACTIONS = ("warn", "raise")
+
+    def __init__(self, user_id_col="user_id", value_prop_col="value_prop", mode="key",
+                 payment_window_weeks=3, max_expansion_factor=None, on_expansion="warn", backend=None):
+        """
+        Inicializa el unificador de prints, taps y pagos.
+
+        Args:
+            user_id_col (str): Columna de usuario.
+            value_prop_col (str): Columna de value_prop.
+            mode (str): "key" une solo por (user_id, value_prop), como hasta ahora; "time_aware"
+                une prints y taps del mismo día y asocia a cada print el último pago de la clave
+                dentro de las `payment_window_weeks` semanas anteriores.
+            payment_window_weeks (int): Ventana de pagos del modo "time_aware".
+            max_expansion_factor (float, optional): Máximo de filas del maestro por fila de prints
+                estimado antes de unir. Sin límite si es None.
+            on_expansion (str): "warn" registra un aviso y continúa; "raise" aborta el join.
+            backend (ExecutionBackend, optional): Motor de ejecución; por defecto, pandas.
+        """
+        if mode not in self.MODES:
+            raise ValueError(f"Modo de join '{mode}' no soportado. Opciones: {self.MODES}.")
+        if on_expansion not in self.EXPANSION_ACTIONS:
+            raise ValueError(f"Acción '{on_expansion}' no soportada. Opciones: {self.EXPANSION_ACTIONS}.")
+
         self.user_id_col = user_id_col
         self.value_prop_col = value_prop_col
+        self.mode = mode
+        self.payment_window = pd.Timedelta(weeks=payment_window_weeks)
+        self.max_expansion_factor = max_expansion_factor
+        self.on_expansion = on_expansion
+        self.backend = backend or ExecutionBackend("pandas")
+
+    def estimate_join_rows(self, prints_df, taps_df, payments_df):
+        """
+        Estima las filas del DataFrame maestro a partir del número de filas por clave de cada
+        fuente, sin realizar el join.
+
+        En el modo "key" cada print se replica por todos los taps y pagos de su clave; en el modo
+        "time_aware" solo por los taps del mismo día (el pago asociado es como máximo uno).
+
+        Returns:
+            int: Número estimado de filas del maestro.
+        """
+        keys = [self.user_id_col, self.value_prop_col]
+        if self.mode == "key":
+            prints_counts = self._key_counts(prints_df, keys)
+            taps_counts = self._key_counts(taps_df, keys)
+            pays_counts = self._key_counts(payments_df, keys)
+            taps_factor = taps_counts.reindex(prints_counts.index, fill_value=1).clip(lower=1)
+            pays_factor = pays_counts.reindex(prints_counts.index, fill_value=1).clip(lower=1)
+            return int((prints_counts * taps_factor * pays_factor).sum())
+
+        prints_counts = self._key_counts(prints_df, keys + ["day"])
+        taps_counts = self._key_counts(taps_df, keys + ["day"])
+        taps_factor = taps_counts.reindex(prints_counts.index, fill_value=1).clip(lower=1)
+        return int((prints_counts * taps_factor).sum())
+
+    @staticmethod
+    def _key_counts(df, keys):
+        return df.groupby(keys, sort=False, observed=True).size()
+
+    def check_expansion(self, prints_df, taps_df, payments_df):
+        """
+        Compara la cardinalidad estimada del join con `max_expansion_factor`.
+
+        Raises:
+            ValueError: Si se supera el umbral y `on_expansion` es "raise".
+        """
+        if self.max_expansion_factor is None or prints_df.empty:
+            return
+
+        estimated_rows = self.estimate_join_rows(prints_df, taps_df, payments_df)
+        expansion_factor = estimated_rows / len(prints_df)
+        logger.info(f"Join estimado: {estimated_rows} filas ({expansion_factor:.1f}x las filas de prints).")
+        if expansion_factor <= self.max_expansion_factor:
+            return
+
+        message = (f"El join ({self.mode}) generaría {estimated_rows} filas, {expansion_factor:.1f}x las "
+                   f"{len(prints_df)} filas de prints (máximo permitido: {self.max_expansion_factor}x).")
+        if self.on_expansion == "raise":
+            logger.error(message)
+            raise ValueError(message)
+        logger.warning(message)
 
     def join_data(self, prints_df, taps_df, payments_df):
         """
@@ -20,7 +104,7 @@ class DataJoiner:
         Returns:
             pd.DataFrame: DataFrame maestro con la información consolidada de prints, taps y payments.
         """
-        logger.info("Iniciando el join entre prints, taps y payments...")
+        logger.info(f"Iniciando el join ({self.mode}) entre prints, taps y payments...")
 
         # Verificar que las columnas necesarias estén en los DataFrames
         required_columns = [self.user_id_col, self.value_prop_col]
@@ -37,6 +121,24 @@ class DataJoiner:
             logger.error("Columna 'pay_date' no encontrada en payments_df.")
             raise KeyError("Columna 'pay_date' no encontrada en payments_df.")
 
+        self.check_expansion(prints_df, taps_df, payments_df)
+
+        # Ambos modos unen por user_id, así que el motor puede repartir el join por shards de usuario
+        join_function = self._join_time_aware if self.mode == "time_aware" else self._join_by_key
+        final_merged_df = self.backend.map_shards([prints_df, taps_df, payments_df], join_function,
+                                                  key=self.user_id_col)
+
+        logger.info("Join final completado: %d filas.", len(final_merged_df))
+        # info() recorre todo el maestro: solo se calcula con el nivel DEBUG activo
+        if logger.isEnabledFor(logging.DEBUG):
+            buffer = io.StringIO()
+            final_merged_df.info(buf=buffer)
+            logger.debug("Estructura del DataFrame maestro:\n%s", buffer.getvalue())
+            logger.debug("Primeras filas del DataFrame maestro:\n%s", final_merged_df.head())
+
+        return final_merged_df
+
+    def _join_by_key(self, prints_df, taps_df, payments_df):
         # Join entre prints y taps usando user_id y value_prop
         prints_taps_merged = pd.merge(
             prints_df,
@@ -46,7 +148,7 @@ class DataJoiner:
             suffixes=("_prints", "_taps")
         )
 
-        logger.info(f"Join entre prints y taps completado. Columnas actuales: {prints_taps_merged.columns.tolist()}")
+        logger.debug("Join entre prints y taps completado. Columnas actuales: %s", prints_taps_merged.columns)
 
         # Join entre prints_taps_merged y payments usando user_id y value_prop
         final_merged_df = pd.merge(
@@ -58,11 +160,34 @@ class DataJoiner:
         )
 
         # Eliminamos la columna duplicada pay_date de payments
-        final_merged_df = final_merged_df.drop(columns=["pay_date"])
+        return final_merged_df.drop(columns=["pay_date"])
 
-        logger.info("Join final completado. Estructura del DataFrame maestro:")
-        logger.info(final_merged_df.info())
-        logger.info("Primeras filas del DataFrame maestro:")
-        logger.info(final_merged_df.head())
+    def _join_time_aware(self, prints_df, taps_df, payments_df):
+        keys = [self.user_id_col, self.value_prop_col]
 
-        return final_merged_df
+        # Join entre prints y taps del mismo día
+        prints_taps_merged = pd.merge(
+            prints_df.rename(columns={"day": "day_prints"}),
+            taps_df.rename(columns={"day": "day_taps"}),
+            left_on=keys + ["day_prints"],
+            right_on=keys + ["day_taps"],
+            how="left",
+            suffixes=("_prints", "_taps")
+        )
+
+        logger.debug("Join por día entre prints y taps completado. Columnas actuales: %s", prints_taps_merged.columns)
+
+        # Último pago de la clave dentro de la ventana anterior al día del print
+        final_merged_df = pd.merge_asof(
+            prints_taps_merged.sort_values("day_prints", kind="stable"),
+            payments_df.sort_values("pay_date", kind="stable"),
+            left_on="day_prints",
+            right_on="pay_date",
+            by=keys,
+            direction="backward",
+            allow_exact_matches=False,
+            tolerance=self.payment_window
+        )
+
+        # Eliminamos la columna pay_date de payments, como en el join por clave
+        return final_merged_df.drop(columns=["pay_date"]).reset_index(drop=True)
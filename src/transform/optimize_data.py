@@ -1,16 +1,42 @@
+import numpy as np
 import pandas as pd
-from concurrent.futures import ThreadPoolExecutor
-from utils.logger import logger
+from src.utils.execution import ExecutionBackend
+from src.utils.logger import logger
+
+# Columnas de conteo y de importes del dataset final
+COUNT_COLUMNS = ("view_count", "click_count")
+PAYMENT_COLUMNS = ("monto_total_pagos", "monto_ultimo_pago")
+
+# Enteros con signo candidatos para los conteos, de menor a mayor
+_INTEGER_DTYPES = (np.int8, np.int16, np.int32, np.int64)
 
 
 class DatasetOptimizer:
-    def __init__(self, dataframe):
+    def __init__(self, dataframe, backend=None, count_dtype=None, payment_dtype="float64", deep_memory=False):
+        """
+        Inicializa el optimizador del dataset final.
+
+        Args:
+            dataframe (pd.DataFrame): Dataset final con las métricas.
+            backend (ExecutionBackend, optional): Motor de ejecución de los pasos fila a fila.
+            count_dtype (str, optional): Tipo entero fijo de los conteos. Si es None se usa el
+                entero más pequeño que admite los valores; conviene fijarlo cuando cada shard o
+                partición escribe su parte por separado, para que todas compartan el esquema.
+            payment_dtype (str): Tipo de las columnas de importes ("float64" o "float32").
+            deep_memory (bool): Mide en el informe de memoria el contenido de cada celda de
+                texto u objeto (recorre todas las filas); por defecto solo los buffers.
+        """
         self.dataframe = dataframe
         self.available_columns = set(dataframe.columns)
+        self.backend = backend or ExecutionBackend("pandas")
+        self.count_dtype = count_dtype
+        self.payment_dtype = payment_dtype
+        self.deep_memory = deep_memory
+        self.memory_report = None
 
     def validate_columns(self):
         """Valida y registra las columnas disponibles en el DataFrame inicial."""
-        logger.info(f"Columnas disponibles al inicio: {self.available_columns}")
+        logger.debug("Columnas disponibles al inicio: %s", self.available_columns)
 
     def consolidate_date_columns(self):
         """Consolidar columnas de fecha redundantes."""
@@ -36,24 +62,70 @@ class DatasetOptimizer:
     def convert_clicked_to_binary(self):
         """Convertir la columna 'clicked' a valores binarios si existe."""
         if 'clicked' in self.available_columns:
-            self.dataframe['clicked'] = self.dataframe['clicked'].apply(lambda x: 1 if x == "Sí" else 0)
+            self.dataframe['clicked'] = self.dataframe['clicked'].eq("Sí").astype(np.int8)
             logger.info("Columna 'clicked' convertida a formato binario.")
         else:
             logger.warning("La columna 'clicked' no se encontró en el DataFrame.")
 
     def fill_missing_payment_values(self):
         """Rellenar valores nulos en columnas de pagos si están presentes."""
-        if 'monto_total_pagos' in self.available_columns:
-            self.dataframe['monto_total_pagos'] = self.dataframe['monto_total_pagos'].fillna(0.0)
-        if 'monto_ultimo_pago' in self.available_columns:
-            self.dataframe['monto_ultimo_pago'] = self.dataframe['monto_ultimo_pago'].fillna(0.0)
+        for column in PAYMENT_COLUMNS:
+            if column in self.available_columns:
+                self._fill_column(column, 0.0)
         logger.info("Valores nulos en columnas de pagos rellenados con 0.")
 
     def fill_missing_values(self):
-        """Rellenar todos los valores NaN en el DataFrame con 0."""
-        self.dataframe = self.dataframe.fillna(0)
+        """Rellenar todos los valores NaN en el DataFrame con 0 (las columnas categóricas no admiten el 0)."""
+        for column, dtype in self.dataframe.dtypes.items():
+            if not isinstance(dtype, pd.CategoricalDtype):
+                self._fill_column(column, 0)
         logger.info("Todos los valores NaN en el DataFrame han sido reemplazados con 0.")
 
+    def _fill_column(self, column, value):
+        # Solo se reescriben las columnas con nulos, sin copiar el resto del DataFrame
+        if self.dataframe[column].isna().any():
+            self.dataframe[column] = self.dataframe[column].fillna(value)
+
+    def downcast_columns(self):
+        """
+        Reduce el tipo de cada columna: conteos al entero más pequeño que los admite (o a
+        `count_dtype`), importes a `payment_dtype` y columnas de texto a categóricas.
+        """
+        for column in COUNT_COLUMNS:
+            if column in self.dataframe.columns:
+                values = self.dataframe[column]
+                target = self.count_dtype or _smallest_integer_dtype(values)
+                self.dataframe[column] = values.astype(target)
+
+        for column in PAYMENT_COLUMNS:
+            if column in self.dataframe.columns:
+                self.dataframe[column] = self.dataframe[column].astype(self.payment_dtype)
+
+        for column, dtype in self.dataframe.dtypes.items():
+            if pd.api.types.is_string_dtype(dtype) and not isinstance(dtype, pd.CategoricalDtype):
+                self.dataframe[column] = self.dataframe[column].astype("category")
+        logger.debug("Tipos tras la reducción:\n%s", self.dataframe.dtypes)
+
+    def build_memory_report(self, bytes_before):
+        """
+        Compara los bytes por columna antes y después de la optimización y los registra.
+
+        Args:
+            bytes_before (pd.Series): Bytes por columna del DataFrame inicial (`memory_usage`).
+
+        Returns:
+            pd.DataFrame: Bytes antes y después por columna, con la fila 'total'.
+        """
+        bytes_after = self.dataframe.memory_usage(index=False, deep=self.deep_memory)
+        report = pd.DataFrame({"bytes_before": bytes_before, "bytes_after": bytes_after})
+        report.loc["total"] = report.sum()
+        report = report.fillna(0).astype("int64")
+
+        logger.info("Memoria del dataset final: %d -> %d bytes.", *report.loc["total"])
+        logger.debug("Memoria por columna (bytes):\n%s", report)
+        self.memory_report = report
+        return report
+
     def filter_irrelevant_rows(self):
         """Eliminar filas con valores irrelevantes si las columnas requeridas están presentes."""
         if 'monto_total_pagos' in self.dataframe.columns and 'clicked' in self.dataframe.columns:
@@ -64,28 +136,40 @@ class DatasetOptimizer:
             logger.warning("Las columnas 'monto_total_pagos' o 'clicked' no están presentes para aplicar el filtrado.")
 
     def optimize(self):
-        """Ejecutar todas las optimizaciones en secuencia para pasos críticos y en paralelo para pasos independientes."""
+        """Ejecutar las optimizaciones: primero las que dependen de todo el DataFrame, después, por particiones del motor de ejecución, las que trabajan fila a fila y al final la reducción de tipos."""
         self.validate_columns()  # Validar y registrar las columnas iniciales
 
         # Ejecución secuencial de renombrado y consolidación, garantizando que las columnas necesarias existen
         self.rename_payment_columns()  # Renombrar columnas de pagos si están presentes
+        bytes_before = self.dataframe.memory_usage(index=False, deep=self.deep_memory)
         self.consolidate_date_columns()  # Consolidar columnas de fecha redundantes si es posible
 
-        # Ejecución en paralelo para los pasos restantes
-        with ThreadPoolExecutor() as executor:
-            futures = [
-                executor.submit(self.convert_clicked_to_binary),  # Convertir 'clicked' a binario
-                executor.submit(self.fill_missing_payment_values),  # Rellenar valores nulos en columnas de pagos
-                executor.submit(self.fill_missing_values),  # Rellenar todos los NaN con 0
-            ]
-
-            # Manejar excepciones en tareas paralelas
-            for future in futures:
-                try:
-                    future.result()
-                except Exception as e:
-                    logger.error(f"Error en una de las tareas de optimización: {e}")
-
-        # Filtrar filas irrelevantes después de las otras optimizaciones
-        self.filter_irrelevant_rows()
+        # Los pasos restantes son independientes entre filas y se aplican a cada partición
+        self.dataframe = self.backend.map_partitions(self.dataframe, _optimize_rows)
+
+        # La reducción de tipos se decide con todos los valores, no por partición
+        self.downcast_columns()
+        self.build_memory_report(bytes_before)
         return self.dataframe
+
+
+def _optimize_rows(partition):
+    """Aplica los pasos fila a fila del optimizador a una partición del DataFrame."""
+    optimizer = DatasetOptimizer(partition)
+    optimizer.convert_clicked_to_binary()  # Convertir 'clicked' a binario
+    optimizer.fill_missing_payment_values()  # Rellenar valores nulos en columnas de pagos
+    optimizer.fill_missing_values()  # Rellenar todos los NaN con 0
+    optimizer.filter_irrelevant_rows()  # Filtrar filas irrelevantes después de las otras optimizaciones
+    return optimizer.dataframe
+
+
+def _smallest_integer_dtype(values):
+    """Devuelve el entero con signo más pequeño que admite el rango de `values`."""
+    if values.empty:
+        return np.int8
+    low, high = values.min(), values.max()
+    for dtype in _INTEGER_DTYPES:
+        info = np.iinfo(dtype)
+        if info.min <= low and high <= info.max:
+            return dtype
+    return np.int64
@@ -6,12 +6,18 @@ PAYS_SCHEMA = {
     "pay_date": "datetime64[ns]",
     "total": "float64",
     "user_id": "int64",
-    "value_prop": "object"
+    "value_prop": "category"
+}
+
+# Formato de las columnas de fecha en los archivos crudos
+PAYS_DATE_FORMATS = {
+    "pay_date": "ISO8601"
 }
 
 class PaysTransformer(BaseTransformer):
     def __init__(self, schema=None):
         critical_columns = list(PAYS_SCHEMA.keys())
         non_critical_columns = []
-        super().__init__(schema or PAYS_SCHEMA, critical_columns, non_critical_columns, date_columns=["pay_date"])
+        super().__init__(schema or PAYS_SCHEMA, critical_columns, non_critical_columns, date_columns=["pay_date"],
+                         date_formats=PAYS_DATE_FORMATS)
 
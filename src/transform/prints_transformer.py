@@ -5,6 +5,17 @@ from src.utils.logger import logger
 PRINTS_SCHEMA = {
     "day": "datetime64[ns]",
     "user_id": "int64",
+    "position": "int64",
+    "value_prop": "category"
+}
+
+# Formato de las columnas de fecha en los archivos crudos
+PRINTS_DATE_FORMATS = {
+    "day": "ISO8601"
+}
+
+# Claves de 'event_data' que se extraen directamente a columnas tipadas
+PRINTS_EVENT_DATA_FIELDS = {
     "position": "int64",
     "value_prop": "object"
 }
@@ -13,7 +24,8 @@ class PrintsTransformer(BaseTransformer):
     def __init__(self, schema=None):
         critical_columns = list(PRINTS_SCHEMA.keys())
         non_critical_columns = ["event_data.value_prop"]
-        super().__init__(schema or PRINTS_SCHEMA, critical_columns, non_critical_columns, date_columns=["day"])
+        super().__init__(schema or PRINTS_SCHEMA, critical_columns, non_critical_columns, date_columns=["day"],
+                         event_data_fields=PRINTS_EVENT_DATA_FIELDS, date_formats=PRINTS_DATE_FORMATS)
 
     def process_data(self, df):
         """
@@ -27,8 +39,7 @@ class PrintsTransformer(BaseTransformer):
         """
         logger.info("Iniciando el procesamiento completo de datos de prints.")
 
-        # Expande los datos de eventos antes de otros procesamientos
-        df = self.expand_event_data(df)
+        # La expansión de 'event_data' se realiza una sola vez en BaseTransformer
         df = super().process_data(df)
-        logger.info(f"Columnas en df después de expandir y procesar: {df.columns.tolist()}")
+        logger.debug("Columnas en df después de expandir y procesar: %s", df.columns)
         return df
@@ -7,6 +7,17 @@ from src.utils.logger import logger
 TAPS_SCHEMA = {
     "day": "datetime64[ns]",
     "user_id": "int64",
+    "position": "int64",
+    "value_prop": "category"
+}
+
+# Formato de las columnas de fecha en los archivos crudos
+TAPS_DATE_FORMATS = {
+    "day": "ISO8601"
+}
+
+# Claves de 'event_data' que se extraen directamente a columnas tipadas
+TAPS_EVENT_DATA_FIELDS = {
     "position": "int64",
     "value_prop": "object"
 }
@@ -15,11 +26,12 @@ class TapsTransformer(BaseTransformer):
     def __init__(self, schema=None):
         critical_columns = list(TAPS_SCHEMA.keys())
         non_critical_columns = ["event_data.value_prop"]
-        super().__init__(schema or TAPS_SCHEMA, critical_columns, non_critical_columns, date_columns=["day"])
+        super().__init__(schema or TAPS_SCHEMA, critical_columns, non_critical_columns, date_columns=["day"],
+                         event_data_fields=TAPS_EVENT_DATA_FIELDS, date_formats=TAPS_DATE_FORMATS)
 
     def process_data(self, df):
         logger.info("Iniciando el procesamiento completo de datos de taps.")
-        df = self.expand_event_data(df)
+        # La expansión de 'event_data' se realiza una sola vez en BaseTransformer
         df = super().process_data(df)
-        logger.info(f"Columnas en df después de expandir y procesar: {df.columns.tolist()}")
+        logger.debug("Columnas en df después de expandir y procesar: %s", df.columns)
         return df
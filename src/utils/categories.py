@@ -0,0 +1,61 @@
+# src/utils/categories.py
+
+import pandas as pd
+from src.utils.logger import logger
+
+
+def shared_categorical_dtype(series_list):
+    """
+    Construye un tipo categórico cuyo diccionario contiene los valores de todas las series.
+
+    Args:
+        series_list (list[pd.Series]): Series categóricas o de texto.
+
+    Returns:
+        pd.CategoricalDtype: Tipo con las categorías ordenadas de la unión.
+    """
+    values = set()
+    for series in series_list:
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            values.update(series.cat.categories)
+        else:
+            values.update(series.dropna().unique())
+    return pd.CategoricalDtype(pd.Index(sorted(values, key=str)).astype(str))
+
+
+def align_categories(frames, columns):
+    """
+    Recodifica las columnas indicadas de varios DataFrames con un único diccionario de
+    categorías, para que joins, groupbys y concatenaciones trabajen sobre códigos compatibles.
+
+    Args:
+        frames (dict[str, pd.DataFrame] | list[pd.DataFrame]): DataFrames a alinear (se modifican).
+        columns (list[str]): Columnas categóricas a alinear.
+
+    Returns:
+        El mismo contenedor de DataFrames, con las columnas recodificadas.
+    """
+    frame_list = list(frames.values()) if isinstance(frames, dict) else list(frames)
+    for column in columns:
+        present = [df for df in frame_list if column in df.columns]
+        if not present:
+            continue
+        dtype = shared_categorical_dtype([df[column] for df in present])
+        for df in present:
+            if df[column].dtype != dtype:
+                df[column] = df[column].astype(dtype)
+        logger.info(f"Columna '{column}' alineada con {len(dtype.categories)} categorías compartidas.")
+    return frames
+
+
+def concat_aligned(frames, **kwargs):
+    """
+    Concatena DataFrames conservando las columnas categóricas (pd.concat las convierte a
+    object si sus categorías difieren).
+    """
+    categorical_columns = {
+        column for df in frames for column, dtype in df.dtypes.items()
+        if isinstance(dtype, pd.CategoricalDtype)
+    }
+    align_categories(frames, sorted(categorical_columns))
+    return pd.concat(frames, **kwargs)
@@ -0,0 +1,172 @@
+# src/utils/checkpoint.py
+
+import hashlib
+import json
+import os
+import pandas as pd
+import pyarrow as pa
+from src.utils.logger import logger
+
+CHECKPOINT_SUFFIX = ".arrow"
+MANIFEST_NAME = "manifest.json"
+# Secciones de la configuración que no cambian los resultados de las etapas
+RUN_KEY_IGNORED_SECTIONS = ("checkpoint", "profiling", "scheduler")
+# Paquete cuyo código fuente forma parte de la clave de la ejecución
+CODE_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def code_version(root=CODE_ROOT):
+    """
+    Hash del contenido de los módulos .py bajo `root`: cualquier cambio en la ingesta, los
+    transformadores o las etapas produce otra versión.
+    """
+    code_hash = hashlib.blake2b(digest_size=16)
+    for directory, subdirectories, files in os.walk(root):
+        subdirectories.sort()
+        for name in sorted(files):
+            if name.endswith(".py"):
+                path = os.path.join(directory, name)
+                code_hash.update(os.path.relpath(path, root).encode("utf-8"))
+                with open(path, "rb") as file:
+                    code_hash.update(file.read())
+    return code_hash.hexdigest()
+
+
+def run_key(config):
+    """
+    Clave de una ejecución: la configuración (salvo RUN_KEY_IGNORED_SECTIONS), la versión del
+    código (`code_version`) y el tamaño y la fecha de modificación de los archivos fuente. Los
+    checkpoints de otra clave no se reutilizan.
+    """
+    relevant = {section: value for section, value in config.items() if section not in RUN_KEY_IGNORED_SECTIONS}
+    sources = {}
+    for name, path in (config.get("data_paths") or {}).items():
+        if os.path.exists(path):
+            stat = os.stat(path)
+            sources[name] = [stat.st_size, stat.st_mtime_ns]
+    serialized = json.dumps({"config": relevant, "code": code_version(), "sources": sources},
+                            sort_keys=True, default=str)
+    return hashlib.blake2b(serialized.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def write_checkpoint(path, df):
+    """Escribe `df` como Arrow IPC sin compresión, de forma atómica (archivo temporal y renombrado)."""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    table = pa.Table.from_pandas(df)
+    with pa.OSFile(tmp_path, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    os.replace(tmp_path, path)
+
+
+def read_checkpoint(path):
+    """
+    Lee un checkpoint Arrow IPC mapeándolo en memoria: las columnas numéricas sin nulos se
+    convierten a pandas sin copiar sus datos (quedan de solo lectura, respaldadas por el archivo).
+    """
+    table = pa.ipc.open_file(pa.memory_map(path, "r")).read_all()
+    return table.to_pandas(split_blocks=True)
+
+
+class CheckpointRef:
+    def __init__(self, path):
+        """
+        Referencia serializable a un checkpoint: los procesos de trabajo la reciben en lugar
+        del DataFrame y mapean el archivo sin copiarlo a través de pickle.
+        """
+        self.path = path
+
+    def load(self):
+        return read_checkpoint(self.path)
+
+
+class CheckpointStore:
+    def __init__(self, run_dir, key, values=None, resume=False):
+        """
+        Checkpoints de las salidas de las etapas en archivos Arrow IPC (formato Feather v2 sin
+        compresión, que se puede mapear en memoria) dentro de `run_dir`.
+
+        El manifiesto registra la clave de la ejecución y los valores completos. Sin `resume`,
+        o si la clave no coincide, se borran los checkpoints y el manifiesto (solo esos archivos:
+        el resto del directorio se conserva) y la ejecución empieza de cero.
+
+        Args:
+            run_dir (str): Directorio de los checkpoints de la ejecución.
+            key (str): Clave de la ejecución (ver `run_key`).
+            values (iterable[str], optional): Valores a guardar; por defecto, todos los DataFrames.
+            resume (bool): Reutiliza los checkpoints de una ejecución anterior con la misma clave.
+        """
+        self.run_dir = run_dir
+        self.key = key
+        self.values = set(values) if values is not None else None
+        self.completed = set()
+
+        manifest = self._read_manifest()
+        if resume and manifest is not None and manifest.get("run_key") == key:
+            self.completed = {value for value in manifest.get("completed", [])
+                              if os.path.exists(self.path(value))}
+            logger.info(f"Reanudando desde los checkpoints de {run_dir}: {sorted(self.completed)}.")
+        else:
+            if resume:
+                logger.warning(f"Sin checkpoints compatibles en {run_dir}; la ejecución empieza de cero.")
+            self._clear()
+            self._write_manifest()
+
+    def path(self, value):
+        return os.path.join(self.run_dir, f"{value}{CHECKPOINT_SUFFIX}")
+
+    def tracks(self, value, output=None):
+        """Indica si `value` (con salida `output`, si se conoce) se guarda como checkpoint."""
+        if output is not None and not isinstance(output, pd.DataFrame):
+            return False
+        return self.values is None or value in self.values
+
+    def has(self, value):
+        return value in self.completed
+
+    def save(self, value, df):
+        """
+        Escribe `df` de forma atómica (archivo temporal y renombrado). Se ejecuta en el hilo o
+        proceso de la etapa; el valor no cuenta como completo hasta `mark_completed`.
+        """
+        path = self.path(value)
+        write_checkpoint(path, df)
+        logger.info(f"Checkpoint de '{value}' guardado en {path}: {df.shape} registros.")
+
+    def mark_completed(self, value):
+        """Registra `value` en el manifiesto (desde el proceso principal)."""
+        self.completed.add(value)
+        self._write_manifest()
+
+    def reference(self, value):
+        return CheckpointRef(self.path(value))
+
+    @staticmethod
+    def resolve(value):
+        """Lee el checkpoint si `value` es una referencia; cualquier otro valor se devuelve tal cual."""
+        return value.load() if isinstance(value, CheckpointRef) else value
+
+    def load(self, value):
+        df = read_checkpoint(self.path(value))
+        logger.info(f"Checkpoint de '{value}' leído de {self.path(value)}: {df.shape} registros.")
+        return df
+
+    def _clear(self):
+        """Borra los checkpoints, sus temporales y el manifiesto de `run_dir`."""
+        os.makedirs(self.run_dir, exist_ok=True)
+        for name in os.listdir(self.run_dir):
+            if name.endswith(CHECKPOINT_SUFFIX) or (f"{CHECKPOINT_SUFFIX}." in name and name.endswith(".tmp")) \
+                    or name in (MANIFEST_NAME, f"{MANIFEST_NAME}.tmp"):
+                os.remove(os.path.join(self.run_dir, name))
+
+    def _read_manifest(self):
+        try:
+            with open(os.path.join(self.run_dir, MANIFEST_NAME)) as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return None
+
+    def _write_manifest(self):
+        path = os.path.join(self.run_dir, MANIFEST_NAME)
+        with open(f"{path}.tmp", "w") as file:
+            json.dump({"run_key": self.key, "completed": sorted(self.completed)}, file)
+        os.replace(f"{path}.tmp", path)
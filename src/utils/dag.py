@@ -0,0 +1,353 @@
+# src/utils/dag.py
+
+import concurrent.futures
+import pickle
+import sys
+from contextlib import ExitStack
+import pandas as pd
+from src.utils.logger import init_worker_logging, logger, worker_log_queue
+from src.utils.profiling import StageProfiler
+
+
+class Stage:
+    def __init__(self, name, func, inputs=(), outputs=()):
+        """
+        Etapa del grafo del pipeline.
+
+        Args:
+            name (str): Nombre de la etapa (también el de su registro en el perfilador).
+            func (callable): Recibe los valores de `inputs` como argumentos posicionales y
+                devuelve el valor de su única salida o una tupla con un valor por salida. Con
+                el ejecutor de procesos debe poder serializarse con pickle.
+            inputs (iterable[str]): Nombres de los valores que consume.
+            outputs (iterable[str]): Nombres de los valores que produce.
+        """
+        self.name = name
+        self.func = func
+        self.inputs = tuple(inputs)
+        self.outputs = tuple(outputs)
+
+
+def _frame_rows(values):
+    frames = [value for value in values if isinstance(value, pd.DataFrame)]
+    return sum(len(frame) for frame in frames) if frames else None
+
+
+def _record_outputs(record, values):
+    frames = [value for value in values if isinstance(value, pd.DataFrame)]
+    if len(frames) == 1:
+        record.set_output(frames[0])
+    elif frames:
+        record.rows_out = sum(len(frame) for frame in frames)
+
+
+def _run_stage(stage, values, checkpoints=None, by_reference=False):
+    """
+    Ejecuta la etapa y guarda el checkpoint de sus salidas.
+
+    Returns:
+        tuple: Salidas de la etapa y valores guardados. Con `by_reference` (procesos) las
+        salidas guardadas se devuelven como referencias al checkpoint en lugar de serializarlas.
+    """
+    saved = []
+    if checkpoints is not None:
+        values = [checkpoints.resolve(value) for value in values]
+    outputs = list(_output_values(stage, stage.func(*values)))
+    if checkpoints is not None:
+        for position, (value, output) in enumerate(zip(stage.outputs, outputs)):
+            if checkpoints.tracks(value, output):
+                checkpoints.save(value, output)
+                saved.append(value)
+                if by_reference:
+                    outputs[position] = checkpoints.reference(value)
+    return tuple(outputs), saved
+
+
+def _run_profiled(profiler, stage, values, checkpoints=None):
+    """Ejecuta la etapa dentro de su registro del perfilador (en el hilo de trabajo)."""
+    with profiler.stage(stage.name, rows_in=_frame_rows(values)) as record:
+        outputs, saved = _run_stage(stage, values, checkpoints)
+        _record_outputs(record, outputs)
+    return outputs, saved
+
+
+def _output_values(stage, result):
+    if not stage.outputs:
+        return ()
+    if len(stage.outputs) == 1:
+        return (result,)
+    if not isinstance(result, tuple) or len(result) != len(stage.outputs):
+        raise ValueError(f"La etapa '{stage.name}' debe devolver {len(stage.outputs)} valores: {stage.outputs}.")
+    return result
+
+
+class StageGraph:
+    EXECUTORS = ("thread", "process")
+
+    def __init__(self, executor="thread", max_workers=None, profiler=None, checkpoints=None):
+        """
+        Ejecuta un grafo de etapas según sus dependencias: cada etapa se lanza en cuanto sus
+        entradas están disponibles, así que las etapas independientes se solapan y el tiempo
+        real se acerca al del camino crítico. Cada valor intermedio se libera en cuanto la
+        última etapa que lo consume termina, en lugar de vivir hasta el final de la ejecución.
+
+        Args:
+            executor (str): "thread" (los valores se comparten sin copia) o "process" (cada
+                etapa recibe una copia serializada de sus entradas).
+            max_workers (int, optional): Etapas simultáneas; por defecto, el del ejecutor.
+            profiler (StageProfiler, optional): Perfilador en el que se registra cada etapa.
+                Con procesos la etapa se mide desde el proceso principal (sin cProfile).
+            checkpoints (CheckpointStore, optional): Guarda las salidas de las etapas y, al
+                reanudar, omite las etapas cuyas salidas ya están guardadas. Con procesos, los
+                valores guardados viajan como referencias al archivo mapeado en memoria.
+
+        Raises:
+            ValueError: Si el ejecutor no está soportado.
+        """
+        if executor not in self.EXECUTORS:
+            logger.error(f"Ejecutor de etapas '{executor}' no soportado.")
+            raise ValueError(f"Ejecutor de etapas '{executor}' no soportado. Opciones: {self.EXECUTORS}.")
+
+        self.executor = executor
+        self.max_workers = max_workers
+        self.profiler = profiler or StageProfiler(enabled=False)
+        self.checkpoints = checkpoints
+        self.stages = {}
+        self._producers = {}
+
+    @classmethod
+    def from_config(cls, scheduler_config=None, profiler=None, checkpoints=None):
+        """
+        Crea el grafo a partir de la sección 'scheduler' de config.yaml.
+        """
+        scheduler_config = scheduler_config or {}
+        return cls(scheduler_config.get("executor", "thread"), scheduler_config.get("max_workers"), profiler,
+                   checkpoints)
+
+    def add_stage(self, name, func, inputs=(), outputs=()):
+        """
+        Añade una etapa al grafo (ver `Stage`).
+
+        Raises:
+            ValueError: Si ya existe una etapa con ese nombre o otra etapa produce alguna de
+                sus salidas.
+        """
+        stage = Stage(name, func, inputs, outputs)
+        if name in self.stages:
+            logger.error(f"La etapa '{name}' ya existe en el grafo.")
+            raise ValueError(f"La etapa '{name}' ya existe en el grafo.")
+        duplicated = [output for output in stage.outputs if output in self._producers]
+        if duplicated:
+            logger.error(f"Las salidas {duplicated} de la etapa '{name}' ya las produce otra etapa.")
+            raise ValueError(f"Las salidas {duplicated} de la etapa '{name}' ya las produce otra etapa.")
+
+        self.stages[name] = stage
+        self._producers.update(dict.fromkeys(stage.outputs, name))
+        return stage
+
+    def _needed_stages(self, targets, available):
+        missing = [target for target in targets if target not in self._producers and target not in available]
+        needed = set()
+        pending = [self._producers[target] for target in targets
+                   if target in self._producers and target not in available]
+        while pending:
+            name = pending.pop()
+            if name in needed:
+                continue
+            needed.add(name)
+            for value in self.stages[name].inputs:
+                if value in available:
+                    continue
+                if value in self._producers:
+                    pending.append(self._producers[value])
+                else:
+                    missing.append(value)
+        if missing:
+            logger.error(f"Ninguna etapa produce los valores {sorted(set(missing))}.")
+            raise ValueError(f"Ninguna etapa produce los valores {sorted(set(missing))}.")
+        return needed
+
+    def _plan(self, targets, available=frozenset()):
+        """
+        Etapas necesarias para producir `targets` a partir de los valores `available` (los
+        checkpoints), en orden topológico.
+
+        Returns:
+            tuple: Etapas en orden y valores disponibles que se usan sin ejecutar su etapa (las
+            salidas de una etapa que se vuelve a ejecutar se recalculan).
+
+        Raises:
+            ValueError: Si algún valor no lo produce ninguna etapa o el grafo tiene ciclos.
+        """
+        available = set(available)
+        needed = self._needed_stages(targets, available)
+        while any(value in available for name in needed for value in self.stages[name].outputs):
+            available -= {value for name in needed for value in self.stages[name].outputs}
+            needed = self._needed_stages(targets, available)
+
+        order, done = [], set()
+        remaining = [name for name in self.stages if name in needed]
+        while remaining:
+            ready = [name for name in remaining
+                     if all(value in available or self._producers[value] in done
+                            for value in self.stages[name].inputs)]
+            if not ready:
+                logger.error(f"El grafo de etapas tiene un ciclo entre {remaining}.")
+                raise ValueError(f"El grafo de etapas tiene un ciclo entre {remaining}.")
+            order.extend(ready)
+            done.update(ready)
+            remaining = [name for name in remaining if name not in done]
+        return order, available
+
+    def _executor(self):
+        if self.executor == "process":
+            return concurrent.futures.ProcessPoolExecutor(max_workers=self.max_workers,
+                                                          initializer=init_worker_logging,
+                                                          initargs=(worker_log_queue(),))
+        return concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers)
+
+    def run(self, targets):
+        """
+        Ejecuta las etapas necesarias para producir `targets`.
+
+        Cada valor lleva la cuenta de las etapas pendientes que lo consumen (más una si es un
+        objetivo); al llegar a cero se elimina, y el grafo deja de retener el DataFrame. Con
+        checkpoints, las etapas cuyas salidas ya están guardadas no se ejecutan y sus salidas
+        se leen mapeando el archivo en memoria.
+
+        Args:
+            targets (iterable[str]): Valores a devolver.
+
+        Returns:
+            dict: Valor de cada objetivo.
+
+        Raises:
+            ValueError: Si el grafo no puede producir los objetivos.
+            Exception: La excepción de la primera etapa que falla (las pendientes se cancelan).
+        """
+        targets = list(targets)
+        order, available = self._plan(targets, self.checkpoints.completed if self.checkpoints else ())
+        refcounts = dict.fromkeys(targets, 1)
+        unresolved = {}
+        for name in order:
+            inputs = set(self.stages[name].inputs)
+            unresolved[name] = len(inputs - available)
+            for value in inputs:
+                refcounts[value] = refcounts.get(value, 0) + 1
+
+        values = {}
+        for value in sorted(available):
+            if refcounts.get(value, 0) > 0:
+                values[value] = (self.checkpoints.reference(value) if self.executor == "process"
+                                 else self.checkpoints.load(value))
+        skipped = [name for name in self.stages if name not in order and
+                   any(value in values for value in self.stages[name].outputs)]
+        if skipped:
+            logger.info(f"Etapas omitidas (salidas leídas de los checkpoints): {skipped}.")
+
+        running = {}
+        executor = self._executor()
+        try:
+            ready = [name for name in order if unresolved[name] == 0]
+            while ready or running:
+                for name in ready:
+                    running.update(self._submit(executor, self.stages[name], values))
+                ready = []
+
+                done, _ = concurrent.futures.wait(running, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    stage, scope, record = running.pop(future)
+                    ready.extend(self._complete(stage, future, scope, record, values, refcounts, unresolved))
+                # El futuro guarda el resultado de la etapa: no se retiene hasta la siguiente espera
+                future = done = None
+        except BaseException:
+            self._abort(executor, running)
+            raise
+        executor.shutdown(wait=True)
+        if self.checkpoints is not None:
+            return {target: self.checkpoints.resolve(values[target]) for target in targets}
+        return {target: values[target] for target in targets}
+
+    def _submit(self, executor, stage, values):
+        stage_values = [values[value] for value in stage.inputs]
+        logger.debug("Etapa '%s' lanzada.", stage.name)
+        if self.executor == "thread":
+            future = executor.submit(_run_profiled, self.profiler, stage, stage_values, self.checkpoints)
+            return {future: (stage, None, None)}
+
+        # Un error al serializar dentro del pool deja al proceso gestor esperando un resultado
+        # que no llega: la función de la etapa se comprueba antes de enviarla
+        try:
+            pickle.dumps((stage, self.checkpoints))
+        except Exception as e:
+            logger.error(f"La etapa '{stage.name}' no se puede enviar a un proceso de trabajo: {e}")
+            raise TypeError(f"La etapa '{stage.name}' no se puede enviar a un proceso de trabajo: {e}") from e
+
+        # El perfilador no se comparte con los procesos: la etapa se mide desde aquí
+        scope = ExitStack()
+        record = scope.enter_context(self.profiler.stage(stage.name, rows_in=_frame_rows(stage_values)))
+        future = executor.submit(_run_stage, stage, stage_values, self.checkpoints, True)
+        return {future: (stage, scope, record)}
+
+    def _abort(self, executor, running):
+        """
+        Termina la ejecución tras un error: cancela las etapas pendientes, cierra los registros
+        del perfilador de las que estaban en curso y, con procesos, termina los procesos de
+        trabajo en lugar de esperar a que acaben.
+        """
+        error = sys.exc_info()
+        for stage, scope, _ in running.values():
+            logger.warning(f"Etapa '{stage.name}' interrumpida por el error de otra etapa.")
+            if scope is not None:
+                scope.__exit__(*error)
+        running.clear()
+
+        if self.executor == "thread":
+            executor.shutdown(wait=True, cancel_futures=True)
+            return
+        # Los procesos de trabajo se guardan antes de cerrar el pool, que olvida la referencia
+        processes = list((getattr(executor, "_processes", None) or {}).values())
+        executor.shutdown(wait=False, cancel_futures=True)
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.join()
+
+    def _complete(self, stage, future, scope, record, values, refcounts, unresolved):
+        """
+        Guarda las salidas de la etapa, libera las entradas que ya no necesita ninguna etapa
+        y devuelve las etapas que quedan listas.
+        """
+        try:
+            outputs, saved = future.result()
+        except Exception as e:
+            logger.error(f"Error en la etapa '{stage.name}': {e}")
+            if scope is not None:
+                scope.__exit__(*sys.exc_info())
+            raise
+        if scope is not None:
+            _record_outputs(record, outputs)
+            scope.close()
+        for value in saved:
+            self.checkpoints.mark_completed(value)
+
+        for value, output in zip(stage.outputs, outputs):
+            if refcounts.get(value, 0) > 0:
+                values[value] = output
+            else:
+                logger.debug("La salida '%s' de la etapa '%s' no la consume ninguna etapa.", value, stage.name)
+
+        for value in set(stage.inputs):
+            refcounts[value] -= 1
+            if refcounts[value] == 0:
+                del values[value]
+                logger.debug("Valor intermedio '%s' liberado tras la etapa '%s'.", value, stage.name)
+
+        ready = []
+        for value in stage.outputs:
+            for name, count in unresolved.items():
+                if value in self.stages[name].inputs:
+                    unresolved[name] = count - 1
+                    if unresolved[name] == 0:
+                        ready.append(name)
+        return ready
@@ -1,5 +1,6 @@
 # src/utils/data_cleaner.py
 
+import numpy as np
 import pandas as pd
 from src.utils.logger import logger
 
@@ -16,6 +17,62 @@ class DataCleaner:
         self.critical_columns = critical_columns
         self.non_critical_columns = non_critical_columns
         self.critical_threshold = critical_threshold
+        self.null_counts = None
+
+    def clean(self, df):
+        """
+        Limpieza en una sola pasada: calcula una vez la máscara de nulos de las columnas críticas
+        y no críticas, elimina las filas con datos críticos faltantes con una única selección
+        booleana e imputa en el sitio las columnas no críticas que conservan nulos.
+
+        Los nulos por columna del DataFrame de entrada quedan en `null_counts`.
+
+        Args:
+            df (pd.DataFrame): El DataFrame a limpiar.
+
+        Returns:
+            pd.DataFrame: DataFrame limpio (el mismo objeto si no hay filas que eliminar).
+
+        Raises:
+            KeyError: Si faltan columnas críticas en el DataFrame.
+        """
+        missing_columns = [col for col in self.critical_columns if col not in df.columns]
+        if missing_columns:
+            logger.error(f"Columnas críticas faltantes en el DataFrame: {missing_columns}")
+            raise KeyError(f"Columnas críticas faltantes: {missing_columns}")
+
+        try:
+            non_critical_columns = [col for col in self.non_critical_columns if col in df.columns]
+            null_masks = {col: df[col].isna().to_numpy() for col in self.critical_columns + non_critical_columns}
+            self.null_counts = pd.Series({col: int(mask.sum()) for col, mask in null_masks.items()}, dtype="int64")
+
+            missing_critical = np.zeros(len(df), dtype=bool)
+            for col in self.critical_columns:
+                if self.null_counts[col]:
+                    missing_critical |= null_masks[col]
+            num_missing_critical = int(missing_critical.sum())
+
+            keep = None
+            if num_missing_critical > 0:
+                logger.warning(f"Se encontraron {num_missing_critical} registros con datos críticos faltantes.")
+                if num_missing_critical > self.critical_threshold:
+                    logger.critical(f"Eliminación de {num_missing_critical} filas por datos críticos faltantes.")
+                keep = ~missing_critical
+                df = df[keep]
+
+            for column in non_critical_columns:
+                if not self.null_counts[column]:
+                    continue
+                remaining = null_masks[column] if keep is None else null_masks[column][keep]
+                if remaining.any():
+                    df.loc[remaining, column] = "desconocido"
+                    logger.info(f"Valores nulos en la columna '{column}' imputados con 'desconocido'.")
+
+            logger.debug("Nulos por columna:\n%s", self.null_counts)
+            return df
+        except Exception as e:
+            logger.error(f"Error durante la limpieza de datos: {e}")
+            raise
 
     def remove_critical_missing(self, df):
         """
@@ -1,4 +1,8 @@
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pa_csv
+import pyarrow.json as pa_json
 from src.utils.logger import logger  # Asegúrate de que tienes una clase de logger configurada
 
 class DataLoader:
@@ -11,15 +15,18 @@ class DataLoader:
         """
         self.file_path = file_path
 
-    def load_json(self):
+    def load_json(self, dtype=None):
         """
         Carga un archivo JSON y devuelve un DataFrame.
 
+        Args:
+            dtype (dict, optional): Tipos de pandas por columna aplicados al parsear.
+
         Returns:
             pd.DataFrame: DataFrame con los datos cargados desde JSON lines.
         """
         try:
-            df = pd.read_json(self.file_path, lines=True)
+            df = pd.read_json(self.file_path, lines=True, dtype=dtype or True)
             logger.info(f"Archivo JSON cargado exitosamente desde {self.file_path}")
             return df
         except ValueError as e:
@@ -30,15 +37,18 @@ class DataLoader:
             logger.error(f"Error: No se encontró el archivo '{self.file_path}'. Verifique que la ruta del archivo sea correcta.")
             raise FileNotFoundError("Archivo JSON no encontrado.") from e
 
-    def load_csv(self):
+    def load_csv(self, dtype=None):
         """
         Carga un archivo CSV y devuelve un DataFrame.
 
+        Args:
+            dtype (dict, optional): Tipos de pandas por columna aplicados al parsear.
+
         Returns:
             pd.DataFrame: DataFrame con los datos cargados desde CSV.
         """
         try:
-            df = pd.read_csv(self.file_path)
+            df = pd.read_csv(self.file_path, dtype=dtype)
             logger.info(f"Archivo CSV cargado exitosamente desde {self.file_path}")
             return df
         except pd.errors.EmptyDataError as e:
@@ -47,3 +57,228 @@ class DataLoader:
         except FileNotFoundError as e:
             logger.error(f"Error: No se encontró el archivo '{self.file_path}'. Verifique que la ruta del archivo sea correcta.")
             raise FileNotFoundError("Archivo CSV no encontrado.") from e
+
+    def iter_json_chunks(self, chunk_size, dtype=None):
+        """
+        Lee un archivo JSON lines por lotes de líneas, sin materializar el archivo completo.
+
+        Args:
+            chunk_size (int): Número de líneas por lote.
+            dtype (dict, optional): Tipos de pandas por columna aplicados al parsear.
+
+        Yields:
+            pd.DataFrame: Lote con como máximo `chunk_size` registros.
+        """
+        try:
+            with pd.read_json(self.file_path, lines=True, chunksize=chunk_size, dtype=dtype or True) as reader:
+                for chunk in reader:
+                    yield chunk
+            logger.info(f"Archivo JSON leído por lotes de {chunk_size} líneas desde {self.file_path}")
+        except ValueError as e:
+            logger.error(
+                f"Error: No se pudo cargar el archivo JSON en '{self.file_path}'. Asegúrese de que el formato sea correcto y que el archivo no esté vacío.")
+            raise ValueError("Error de formato en el archivo JSON.") from e
+        except FileNotFoundError as e:
+            logger.error(f"Error: No se encontró el archivo '{self.file_path}'. Verifique que la ruta del archivo sea correcta.")
+            raise FileNotFoundError("Archivo JSON no encontrado.") from e
+
+    def iter_csv_chunks(self, chunk_size, dtype=None):
+        """
+        Lee un archivo CSV por lotes de filas, sin materializar el archivo completo.
+
+        Args:
+            chunk_size (int): Número de filas por lote.
+            dtype (dict, optional): Tipos de pandas por columna aplicados al parsear.
+
+        Yields:
+            pd.DataFrame: Lote con como máximo `chunk_size` registros.
+        """
+        try:
+            with pd.read_csv(self.file_path, chunksize=chunk_size, dtype=dtype) as reader:
+                for chunk in reader:
+                    yield chunk
+            logger.info(f"Archivo CSV leído por lotes de {chunk_size} filas desde {self.file_path}")
+        except pd.errors.EmptyDataError as e:
+            logger.error(f"Error: El archivo CSV en '{self.file_path}' está vacío. Asegúrese de que contenga datos.")
+            raise ValueError("Archivo CSV vacío.") from e
+        except FileNotFoundError as e:
+            logger.error(f"Error: No se encontró el archivo '{self.file_path}'. Verifique que la ruta del archivo sea correcta.")
+            raise FileNotFoundError("Archivo CSV no encontrado.") from e
+
+    def load_json_arrow(self, schema=None, struct_column="event_data", row_filter=None):
+        """
+        Carga un archivo JSON lines con el lector multihilo de pyarrow.
+
+        Los campos declarados en `schema` se parsean directamente a su tipo; el resto se infiere.
+        El lector JSON no admite diccionarios, así que esos campos se leen como texto y se
+        codifican tras la lectura. Si la columna `struct_column` es un struct, sus campos
+        declarados se desanidan en columnas de primer nivel durante la lectura.
+
+        Args:
+            schema (pa.Schema, optional): Esquema explícito de Arrow para la lectura.
+            struct_column (str): Columna anidada a desanidar.
+            row_filter (pc.Expression, optional): Filtro de filas. Con filtro el archivo se lee
+                en streaming y cada bloque se filtra en cuanto se parsea, antes de desanidar y
+                de convertir a pandas, de modo que solo se acumulan las filas que lo cumplen.
+
+        Returns:
+            pd.DataFrame: DataFrame con los tipos de pandas que corresponden al esquema.
+        """
+        try:
+            parse_schema = self._without_dictionaries(schema) if schema is not None else None
+            parse_options = pa_json.ParseOptions(explicit_schema=parse_schema, unexpected_field_behavior="infer")
+            if row_filter is not None:
+                table = self._read_filtered(pa_json.open_json(self.file_path, parse_options=parse_options),
+                                            row_filter)
+            else:
+                table = pa_json.read_json(self.file_path, parse_options=parse_options)
+            table = self._unnest_struct_column(table, struct_column, schema)
+            if schema is not None:
+                table = self._encode_dictionaries(table, schema)
+            df = self._to_pandas(table)
+            logger.info(f"Archivo JSON cargado con pyarrow desde {self.file_path}")
+            return df
+        except pa.ArrowInvalid as e:
+            logger.error(
+                f"Error: No se pudo cargar el archivo JSON en '{self.file_path}'. Asegúrese de que el formato sea correcto y que el archivo no esté vacío.")
+            raise ValueError("Error de formato en el archivo JSON.") from e
+        except FileNotFoundError as e:
+            logger.error(f"Error: No se encontró el archivo '{self.file_path}'. Verifique que la ruta del archivo sea correcta.")
+            raise FileNotFoundError("Archivo JSON no encontrado.") from e
+
+    def load_csv_arrow(self, column_types=None, row_filter=None):
+        """
+        Carga un archivo CSV con el lector multihilo de pyarrow.
+
+        Args:
+            column_types (dict, optional): Tipos de Arrow por columna para parsear sin inferencia.
+            row_filter (pc.Expression, optional): Filtro de filas. Con filtro el archivo se lee en
+                streaming y cada bloque se filtra en cuanto se parsea, antes de convertir a pandas.
+
+        Returns:
+            pd.DataFrame: DataFrame con los tipos de pandas que corresponden a `column_types`.
+        """
+        try:
+            convert_options = pa_csv.ConvertOptions(column_types=column_types or {})
+            if row_filter is not None:
+                table = self._read_filtered(pa_csv.open_csv(self.file_path, convert_options=convert_options),
+                                            row_filter)
+            else:
+                table = pa_csv.read_csv(self.file_path, convert_options=convert_options)
+            df = self._to_pandas(table)
+            logger.info(f"Archivo CSV cargado con pyarrow desde {self.file_path}")
+            return df
+        except pa.ArrowInvalid as e:
+            logger.error(f"Error: No se pudo cargar el archivo CSV en '{self.file_path}': {e}")
+            if "Empty CSV file" in str(e):
+                raise ValueError("Archivo CSV vacío.") from e
+            raise ValueError("Error de formato en el archivo CSV.") from e
+        except FileNotFoundError as e:
+            logger.error(f"Error: No se encontró el archivo '{self.file_path}'. Verifique que la ruta del archivo sea correcta.")
+            raise FileNotFoundError("Archivo CSV no encontrado.") from e
+
+    def load_column_arrow(self, column, arrow_type):
+        """
+        Lee una sola columna del archivo con pyarrow, sin construir el resto de columnas.
+
+        Args:
+            column (str): Columna de primer nivel a leer.
+            arrow_type (pa.DataType): Tipo con el que se parsea la columna.
+
+        Returns:
+            pa.ChunkedArray: Valores de la columna.
+        """
+        try:
+            if self.file_path.endswith(".json"):
+                parse_options = pa_json.ParseOptions(explicit_schema=pa.schema([(column, arrow_type)]),
+                                                     unexpected_field_behavior="ignore")
+                table = pa_json.read_json(self.file_path, parse_options=parse_options)
+            else:
+                convert_options = pa_csv.ConvertOptions(include_columns=[column], column_types={column: arrow_type})
+                table = pa_csv.read_csv(self.file_path, convert_options=convert_options)
+            return table.column(column)
+        except pa.ArrowInvalid as e:
+            logger.error(f"Error: No se pudo leer la columna '{column}' de '{self.file_path}': {e}")
+            raise ValueError(f"Error de formato en la columna '{column}'.") from e
+        except FileNotFoundError as e:
+            logger.error(f"Error: No se encontró el archivo '{self.file_path}'. Verifique que la ruta del archivo sea correcta.")
+            raise FileNotFoundError("Archivo no encontrado.") from e
+
+    @staticmethod
+    def _read_filtered(reader, row_filter):
+        """
+        Lee los bloques de un lector en streaming de pyarrow y conserva de cada uno solo las
+        filas que cumplen `row_filter`; la tabla completa sin filtrar nunca llega a construirse.
+        """
+        batches = []
+        for batch in reader:
+            batch = batch.filter(row_filter)
+            if batch.num_rows:
+                batches.append(batch)
+        return pa.Table.from_batches(batches, schema=reader.schema)
+
+    @staticmethod
+    def _to_pandas(table):
+        """
+        Convierte la tabla a pandas con tipos nativos (int64, float64, datetime64[ns], category),
+        los mismos que declaran los esquemas, para que la validación no tenga que copiar columnas.
+        """
+        return table.to_pandas(split_blocks=True, self_destruct=True)
+
+    @staticmethod
+    def _without_dictionaries(schema):
+        """Esquema con los diccionarios (también dentro de structs) sustituidos por sus valores."""
+        def plain(arrow_type):
+            if pa.types.is_dictionary(arrow_type):
+                return arrow_type.value_type
+            if pa.types.is_struct(arrow_type):
+                return pa.struct([field.with_type(plain(field.type)) for field in arrow_type])
+            return arrow_type
+        return pa.schema([field.with_type(plain(field.type)) for field in schema])
+
+    @staticmethod
+    def _encode_dictionaries(table, schema):
+        """Codifica como diccionario las columnas declaradas así en `schema` (o en sus structs)."""
+        dictionary_columns = set()
+        for field in schema:
+            fields = field.type if pa.types.is_struct(field.type) else [field]
+            dictionary_columns.update(child.name for child in fields if pa.types.is_dictionary(child.type))
+
+        for name in dictionary_columns:
+            if name in table.column_names and not pa.types.is_dictionary(table.column(name).type):
+                index = table.column_names.index(name)
+                table = table.set_column(index, name, pc.dictionary_encode(table.column(name)))
+        return table
+
+    @staticmethod
+    def _unnest_struct_column(table, struct_column, schema=None):
+        """
+        Reemplaza la columna struct por sus campos declarados como columnas de primer nivel.
+
+        Si la columna no existe, no es un struct o es completamente nula (archivo ya expandido),
+        se elimina sin añadir columnas.
+        """
+        if struct_column not in table.column_names:
+            return table
+
+        index = table.column_names.index(struct_column)
+        column = table.column(struct_column)
+        table = table.remove_column(index)
+        if not pa.types.is_struct(column.type) or 0 < len(column) == column.null_count:
+            return table
+
+        if schema is not None and struct_column in schema.names:
+            field_names = [field.name for field in schema.field(struct_column).type]
+        else:
+            field_names = [field.name for field in column.type]
+
+        for field_name in field_names:
+            # struct_field propaga los nulos del registro padre a cada campo
+            values = pc.struct_field(column, field_name)
+            if field_name in table.column_names:
+                existing = table.column(field_name)
+                values = pc.coalesce(existing, values.cast(existing.type))
+                table = table.set_column(table.column_names.index(field_name), field_name, values)
+            else:
+                table = table.append_column(field_name, values)
+        return table
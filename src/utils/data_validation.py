@@ -1,9 +1,32 @@
 # src/utils/data_validation.py
 
 import pandas as pd
+from src.utils.date_parsing import to_datetime_memoized
 from src.utils.logger import logger
 
+# Tipo de texto por defecto de pandas (str en pandas 3, object en versiones anteriores)
+_TEXT_DTYPE = pd.Index([], dtype=object).astype(str).dtype
+
+class SchemaValidationError(ValueError):
+    def __init__(self, report):
+        """
+        Error de esquema con el detalle de todas las filas y valores que no admiten el tipo esperado.
+
+        Args:
+            report (pd.DataFrame): Informe con las columnas 'column', 'row', 'value' y 'expected_dtype'.
+        """
+        self.report = report
+        counts = report.groupby("column", sort=False).size()
+        details = ", ".join(
+            f"'{column}' ({count} filas, p. ej. {report.loc[report['column'] == column, 'value'].iloc[0]!r})"
+            for column, count in counts.items()
+        )
+        super().__init__(f"Valores incompatibles con el esquema en {details}.")
+
+
 class SchemaValidator:
+    REPORT_COLUMNS = ["column", "row", "value", "expected_dtype"]
+
     def __init__(self, schema):
         """
         Inicializa el validador de esquema con un esquema específico.
@@ -17,23 +40,98 @@ class SchemaValidator:
         """
         Aplica el esquema esperado para cualquier DataFrame.
 
+        Las columnas que ya tienen el tipo esperado (lo habitual, porque los lectores parsean
+        con el esquema) no se tocan; solo se convierten las que difieren. Las conversiones se
+        comprueban de forma vectorizada y todos los valores incompatibles de todas las columnas
+        se devuelven juntos en el informe de `SchemaValidationError`.
+
         Args:
             df (pd.DataFrame): El DataFrame a validar.
 
         Returns:
             pd.DataFrame: DataFrame con el esquema aplicado.
+
+        Raises:
+            KeyError: Si faltan columnas del esquema.
+            SchemaValidationError: Si algún valor no admite el tipo esperado.
         """
         try:
             logger.info("Iniciando la validación del esquema.")
+            missing_columns = [column for column in self.schema if column not in df.columns]
+            if missing_columns:
+                logger.warning(f"Columnas esperadas no encontradas: {missing_columns}")
+                raise KeyError(f"Columnas esperadas no encontradas: {missing_columns}")
+
+            converted, reports = {}, []
             for column, dtype in self.schema.items():
-                if column in df.columns:
-                    df[column] = df[column].astype(dtype)
-                    logger.debug(f"Columna '{column}' convertida a {dtype}.")
+                if self._matches(df[column].dtype, dtype):
+                    continue
+                values, offending = self._convert(df[column], dtype)
+                if offending is not None and offending.any():
+                    reports.append(pd.DataFrame({
+                        "column": column,
+                        "row": df.index[offending],
+                        "value": df[column][offending].astype(object).to_numpy(),
+                        "expected_dtype": dtype,
+                    }))
                 else:
-                    logger.warning(f"Columna '{column}' esperada no encontrada.")
-                    raise KeyError(f"Columna '{column}' esperada no encontrada.")
-            logger.info("Esquema validado exitosamente.")
+                    converted[column] = values
+                    logger.debug("Columna '%s' convertida de %s a %s.", column, df[column].dtype, dtype)
+
+            if reports:
+                raise SchemaValidationError(pd.concat(reports, ignore_index=True)[self.REPORT_COLUMNS])
+
+            for column, values in converted.items():
+                df[column] = values
+            logger.info(f"Esquema validado exitosamente ({len(converted)} columnas convertidas).")
             return df
         except (KeyError, ValueError) as e:
             logger.error(f"Error en el esquema de datos: {e}")
             raise
+
+    @staticmethod
+    def _matches(current_dtype, dtype):
+        if dtype == "category":
+            return isinstance(current_dtype, pd.CategoricalDtype) and current_dtype.categories.dtype == _TEXT_DTYPE
+        return current_dtype == pd.api.types.pandas_dtype(dtype)
+
+    def _convert(self, series, dtype):
+        """
+        Convierte la columna al tipo esperado.
+
+        Returns:
+            tuple: Valores convertidos (None si hay valores incompatibles) y máscara de filas
+            incompatibles (None si la conversión no puede fallar).
+        """
+        if dtype == "category":
+            return self._to_category(series), None
+
+        target = pd.api.types.pandas_dtype(dtype)
+        if pd.api.types.is_datetime64_dtype(target):
+            parsed = to_datetime_memoized(series)
+            offending = (parsed.isna() & series.notna()).to_numpy()
+        elif pd.api.types.is_numeric_dtype(target) and not pd.api.types.is_bool_dtype(target):
+            parsed = pd.to_numeric(series, errors="coerce")
+            if pd.api.types.is_integer_dtype(target):
+                # Un entero no admite nulos ni decimales
+                offending = (parsed.isna() | (parsed % 1 != 0)).to_numpy()
+            else:
+                offending = (parsed.isna() & series.notna()).to_numpy()
+        else:
+            return series.astype(target), None
+
+        if offending.any():
+            return None, offending
+        return parsed.astype(target), offending
+
+    @staticmethod
+    def _to_category(series):
+        """
+        Convierte una columna a categórica con categorías de texto nativas de pandas, sea cual sea
+        el lector (pandas u Arrow), para que las fuentes compartan el mismo tipo de diccionario.
+        """
+        categorical = series if isinstance(series.dtype, pd.CategoricalDtype) else series.astype("category")
+        categories = categorical.cat.categories
+        if pd.api.types.is_string_dtype(categories.dtype) and categories.dtype != _TEXT_DTYPE:
+            categorical = categorical.cat.rename_categories(categories.astype(str))
+        return categorical
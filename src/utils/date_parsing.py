@@ -0,0 +1,64 @@
+# src/utils/date_parsing.py
+
+import numpy as np
+import pandas as pd
+from src.utils.logger import logger
+
+# Tipo de las columnas de fecha de los esquemas
+DATETIME_DTYPE = "datetime64[ns]"
+
+
+def to_datetime_memoized(series, format=None, errors="coerce"):
+    """
+    Convierte una columna a fecha parseando cada valor distinto una sola vez.
+
+    Las columnas de días tienen unos pocos cientos de valores distintos repetidos en millones
+    de filas: se factoriza la columna, se parsean solo los valores únicos y el resultado se
+    reparte a todas las filas con los códigos. Las columnas que ya son de fecha se devuelven
+    sin copia.
+
+    Args:
+        series (pd.Series): Columna a convertir.
+        format (str, optional): Formato explícito (p. ej. "%Y-%m-%d" o "ISO8601"); sin él,
+            pandas infiere el formato a partir de los valores.
+        errors (str): "coerce" convierte los valores inválidos en NaT; "raise" lanza ValueError.
+
+    Returns:
+        pd.Series: Columna de tipo datetime64[ns] con el mismo índice.
+    """
+    if pd.api.types.is_datetime64_dtype(series.dtype):
+        return series
+
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        codes, uniques = series.cat.codes.to_numpy(), series.cat.categories
+    else:
+        codes, uniques = pd.factorize(series, use_na_sentinel=True)
+
+    parsed = pd.to_datetime(pd.Index(uniques), format=format, errors=errors).astype(DATETIME_DTYPE)
+    # El código -1 (nulo) apunta al NaT añadido al final
+    values = np.append(parsed.to_numpy(), np.datetime64("NaT", "ns"))[codes]
+    return pd.Series(values, index=series.index, name=series.name)
+
+
+def convert_dates(df, date_columns, formats=None):
+    """
+    Convierte las columnas de fecha de `df` con `to_datetime_memoized`.
+
+    Args:
+        df (pd.DataFrame): DataFrame a convertir (se modifica en el sitio).
+        date_columns (list): Columnas de fecha.
+        formats (dict, optional): Formato explícito por columna.
+
+    Returns:
+        pd.DataFrame: El mismo DataFrame con las columnas convertidas.
+    """
+    formats = formats or {}
+    for column in date_columns:
+        if column not in df.columns or pd.api.types.is_datetime64_dtype(df[column].dtype):
+            continue
+        converted = to_datetime_memoized(df[column], format=formats.get(column))
+        invalid = int(converted.isna().sum() - df[column].isna().sum())
+        if invalid > 0:
+            logger.warning(f"{invalid} valores de la columna '{column}' no se pudieron convertir a datetime.")
+        df[column] = converted
+    return df
@@ -0,0 +1,146 @@
+# src/utils/execution.py
+
+import os
+from functools import partial
+import dask
+import dask.dataframe as dd
+import numpy as np
+import pandas as pd
+from src.utils.logger import init_worker_logging, logger, worker_log_queue
+
+
+class ExecutionBackend:
+    BACKENDS = ("pandas", "dask-threads", "dask-processes")
+
+    def __init__(self, name="pandas", npartitions=None):
+        """
+        Motor de ejecución compartido por las etapas de join, métricas y optimización.
+
+        Con "pandas" cada operación se ejecuta directamente sobre el DataFrame, sin planificación
+        de Dask. Con "dask-threads" y "dask-processes" el DataFrame se reparte en `npartitions`
+        particiones que se procesan en paralelo con hilos o con procesos (un LocalCluster de
+        dask.distributed si está instalado, o el planificador de procesos de Dask si no).
+
+        Args:
+            name (str): Motor a utilizar ("pandas", "dask-threads" o "dask-processes").
+            npartitions (int, optional): Número de particiones; por defecto, el número de núcleos.
+
+        Raises:
+            ValueError: Si el motor no está soportado.
+        """
+        if name not in self.BACKENDS:
+            logger.error(f"Motor de ejecución '{name}' no soportado.")
+            raise ValueError(f"Motor de ejecución '{name}' no soportado. Opciones: {self.BACKENDS}.")
+
+        self.name = name
+        self.npartitions = max(1, int(npartitions or os.cpu_count() or 1))
+        self._client = None
+
+    @classmethod
+    def from_config(cls, execution_config=None):
+        """
+        Crea el motor a partir de la sección 'execution' de config.yaml.
+        """
+        execution_config = execution_config or {}
+        return cls(execution_config.get("backend", "pandas"), execution_config.get("npartitions"))
+
+    @property
+    def is_parallel(self):
+        return self.name != "pandas"
+
+    def _scheduler(self):
+        if self.name == "dask-threads":
+            return {"scheduler": "threads", "num_workers": self.npartitions}
+
+        if self._client is None:
+            try:
+                from dask.distributed import Client, LocalCluster
+            except ImportError:
+                logger.info("dask.distributed no está instalado; se usa el planificador de procesos de Dask.")
+                return {"scheduler": "processes", "num_workers": self.npartitions,
+                        "initializer": partial(init_worker_logging, worker_log_queue())}
+            cluster = LocalCluster(n_workers=self.npartitions, threads_per_worker=1, processes=True)
+            self._client = Client(cluster)
+        return {"scheduler": self._client}
+
+    def _run(self, func, argument_list):
+        """
+        Ejecuta `func` sobre cada tupla de argumentos y devuelve los resultados en el mismo orden.
+        """
+        if not self.is_parallel or len(argument_list) == 1:
+            return [func(*arguments) for arguments in argument_list]
+        tasks = [dask.delayed(func)(*arguments) for arguments in argument_list]
+        return list(dask.compute(*tasks, **self._scheduler()))
+
+    def map_partitions(self, df, func, *args):
+        """
+        Aplica `func` a particiones contiguas de filas y concatena los resultados en el orden
+        original. `func` solo debe depender de los valores de cada fila.
+        """
+        if not self.is_parallel or len(df) < 2:
+            return func(df, *args)
+        bounds = np.linspace(0, len(df), min(self.npartitions, len(df)) + 1).astype(int)
+        partitions = [(df.iloc[start:end], *args) for start, end in zip(bounds[:-1], bounds[1:])]
+        return pd.concat(self._run(func, partitions))
+
+    def map_shards(self, frames, func, key="user_id", **kwargs):
+        """
+        Reparte varios DataFrames por el hash de `key` y aplica `func(*shards, **kwargs)` a cada
+        shard; todas las filas de una misma clave quedan en el mismo shard, así que joins y
+        agregaciones por clave son exactos dentro de cada uno.
+
+        Los shards cuyo primer DataFrame está vacío se omiten.
+
+        Returns:
+            pd.DataFrame: Concatenación de los resultados de todos los shards.
+        """
+        if not self.is_parallel:
+            return func(*frames, **kwargs)
+
+        shard_ids = [hash_shards(df[key], self.npartitions) for df in frames]
+        argument_list = []
+        for shard in range(self.npartitions):
+            shards = tuple(df[ids == shard] for df, ids in zip(frames, shard_ids))
+            if not shards[0].empty:
+                argument_list.append(shards)
+        if not argument_list:
+            return func(*frames, **kwargs)
+
+        results = self._run(lambda *shards: func(*shards, **kwargs), argument_list)
+        return pd.concat(results, ignore_index=True)
+
+    def merge(self, left, right, **kwargs):
+        """
+        pd.merge con el motor configurado (dd.merge sobre `npartitions` particiones con Dask).
+        """
+        if not self.is_parallel:
+            return pd.merge(left, right, **kwargs)
+        merged = dd.merge(
+            dd.from_pandas(left, npartitions=self.npartitions),
+            dd.from_pandas(right, npartitions=self.npartitions),
+            **kwargs
+        )
+        return merged.compute(**self._scheduler()).reset_index(drop=True)
+
+    def close(self):
+        """Cierra el cluster local de dask.distributed, si se creó."""
+        if self._client is not None:
+            cluster = self._client.cluster
+            self._client.close()
+            cluster.close()
+            self._client = None
+
+
+def hash_shards(keys, num_shards):
+    """
+    Asigna cada fila a un shard según el hash de su clave; una misma clave siempre cae en el
+    mismo shard, sea cual sea el DataFrame.
+
+    Args:
+        keys (pd.Series): Columna de clave (p. ej. user_id).
+        num_shards (int): Número de shards.
+
+    Returns:
+        np.ndarray: Número de shard (uint64) de cada fila.
+    """
+    return pd.util.hash_array(keys.to_numpy()) % np.uint64(num_shards)
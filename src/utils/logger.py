@@ -1,5 +1,9 @@
+import atexit
 import logging
 import logging.config
+import logging.handlers
+import multiprocessing
+import queue
 import yaml
 import os
 
@@ -7,9 +11,62 @@ import os
 LOGGING_CONFIG_PATH = "config/logging_config.yaml"
 LOGS_DIR = "logs"
 LOG_FILE_PATH = f"{LOGS_DIR}/pipeline.log"
+LOGGER_NAME = "pipeline_logger"
+
+
+class PipelineQueueHandler(logging.handlers.QueueHandler):
+    """
+    Encola los registros de log para que un QueueListener los escriba en un hilo aparte: las
+    etapas (y sus hilos y procesos de trabajo) nunca esperan a la escritura del archivo.
+    """
+
+    def __init__(self, log_queue, handlers):
+        super().__init__(log_queue)
+        self.target_handlers = handlers
+        self.listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+        self.process_queue = None
+        self.process_listener = None
+
+    def stop(self):
+        """Vacía las colas y detiene los listeners (se registra con atexit)."""
+        self.listener.stop()
+        if self.process_listener is not None:
+            self.process_listener.stop()
+
+
+def _queue_handler():
+    for logger_ in (logging.getLogger(LOGGER_NAME), logging.getLogger()):
+        for handler in logger_.handlers:
+            if isinstance(handler, PipelineQueueHandler):
+                return handler
+    return None
+
+
+def _enqueue_handlers():
+    """
+    Sustituye los handlers del logger del pipeline y del logger raíz por un PipelineQueueHandler
+    por cada conjunto distinto de handlers (con la configuración por defecto, uno solo).
+    """
+    queue_handlers = {}
+    for logger_ in (logging.getLogger(LOGGER_NAME), logging.getLogger()):
+        handlers = tuple(logger_.handlers)
+        if not handlers:
+            continue
+        if handlers not in queue_handlers:
+            queue_handler = PipelineQueueHandler(queue.SimpleQueue(), handlers)
+            queue_handler.listener.start()
+            atexit.register(queue_handler.stop)
+            queue_handlers[handlers] = queue_handler
+        for handler in handlers:
+            logger_.removeHandler(handler)
+        logger_.addHandler(queue_handlers[handlers])
 
 
 def setup_logging():
+    # Idempotente: el módulo se importa como 'utils.logger' y como 'src.utils.logger'
+    if _queue_handler() is not None:
+        return
+
     # Crear la carpeta de logs si no existe
     if not os.path.exists(LOGS_DIR):
         os.makedirs(LOGS_DIR)
@@ -24,9 +81,48 @@ def setup_logging():
         logging.basicConfig(level=logging.INFO)
         print(f"Advertencia: No se encontró el archivo de configuración de logging en {LOGGING_CONFIG_PATH}.")
 
+    _enqueue_handlers()
+
+
+def worker_log_queue():
+    """
+    Cola de logs para procesos de trabajo (ver `init_worker_logging`). Los registros recibidos
+    se escriben con los handlers del logger del pipeline desde un hilo del proceso principal.
+
+    Returns:
+        multiprocessing.Queue: Cola compartida por todos los procesos de trabajo, o None si el
+        logging no está configurado con colas.
+    """
+    queue_handler = _queue_handler()
+    if queue_handler is None:
+        return None
+    if queue_handler.process_queue is None:
+        # Creada en contexto "spawn" para poder pasarla tanto a procesos "fork" como a los
+        # procesos "spawn" del planificador de Dask
+        queue_handler.process_queue = multiprocessing.get_context("spawn").Queue(-1)
+        queue_handler.process_listener = logging.handlers.QueueListener(
+            queue_handler.process_queue, *queue_handler.target_handlers, respect_handler_level=True)
+        queue_handler.process_listener.start()
+    return queue_handler.process_queue
+
+
+def init_worker_logging(log_queue):
+    """
+    Inicializador de procesos de trabajo: envía sus logs a `log_queue` en lugar de escribir
+    directamente en los handlers heredados o reconfigurados en el proceso hijo.
+    """
+    if log_queue is None:
+        return
+    handler = logging.handlers.QueueHandler(log_queue)
+    for logger_ in (logging.getLogger(LOGGER_NAME), logging.getLogger()):
+        for existing in list(logger_.handlers):
+            logger_.removeHandler(existing)
+        logger_.addHandler(handler)
+    logging.getLogger(LOGGER_NAME).propagate = False
+
 
 # Llamar a esta función en el punto de entrada de tu pipeline para configurar los logs
 setup_logging()
 
 # Crear un logger específico
-logger = logging.getLogger("pipeline_logger")
+logger = logging.getLogger(LOGGER_NAME)
@@ -0,0 +1,168 @@
+# src/utils/partition_store.py
+
+import json
+import os
+import shutil
+import pandas as pd
+from src.utils.logger import logger
+
+
+class DayPartitionStore:
+    STATE_FILE = "_state.json"
+
+    def __init__(self, root_dir):
+        """
+        Inicializa el almacén local de datos particionados por día.
+
+        Cada fuente se guarda como Parquet en `root_dir/<fuente>/day=YYYY-MM-DD/part-0.parquet`.
+        El estado registra las filas y un hash del contenido de cada partición para detectar
+        días nuevos o modificados sin volver a leer las particiones.
+
+        Args:
+            root_dir (str): Directorio raíz del almacén.
+        """
+        self.root_dir = root_dir
+        os.makedirs(self.root_dir, exist_ok=True)
+        self._state_path = os.path.join(self.root_dir, self.STATE_FILE)
+
+    def read_state(self):
+        """Devuelve el estado persistido del almacén."""
+        if not os.path.exists(self._state_path):
+            return {"partitions": {}, "metadata": {}}
+        with open(self._state_path, "r") as f:
+            return json.load(f)
+
+    def write_state(self, state):
+        """Persiste el estado del almacén de forma atómica."""
+        tmp_path = f"{self._state_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(state, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self._state_path)
+
+    def days(self, source):
+        """
+        Devuelve los días almacenados para una fuente.
+
+        Returns:
+            list[pd.Timestamp]: Días ordenados.
+        """
+        partitions = self.read_state()["partitions"].get(source, {})
+        return sorted(pd.Timestamp(day) for day in partitions)
+
+    def _partition_dir(self, source, day):
+        return os.path.join(self.root_dir, source, f"day={day:%Y-%m-%d}")
+
+    def _write_partitions(self, source, df, day_keys, days, state):
+        partitions = state["partitions"].setdefault(source, {})
+        rows_by_day = {day: group for day, group in df.groupby(day_keys, sort=True)}
+        for day in days:
+            partition_dir = self._partition_dir(source, day)
+            shutil.rmtree(partition_dir, ignore_errors=True)
+            part = rows_by_day.get(day)
+            if part is None or part.empty:
+                partitions.pop(f"{day:%Y-%m-%d}", None)
+                continue
+            os.makedirs(partition_dir, exist_ok=True)
+            part.to_parquet(os.path.join(partition_dir, "part-0.parquet"), index=False)
+            partitions[f"{day:%Y-%m-%d}"] = {"rows": len(part), "hash": self._content_hash(part)}
+
+    @staticmethod
+    def _content_hash(part):
+        """
+        Hash del contenido de una partición, independiente del orden de las filas (la suma de
+        los hashes por fila, módulo 2**64).
+        """
+        return f"{int(pd.util.hash_pandas_object(part, index=False).sum()):016x}"
+
+    def append(self, source, df, date_column, since=None):
+        """
+        Escribe solo los días nuevos o modificados de `df` en el almacén y elimina los días
+        almacenados que ya no están en la fuente.
+
+        Un día se considera modificado si el hash de su contenido difiere del almacenado (una
+        corrección con el mismo número de filas también se detecta). `df` cubre todos los días
+        desde `since`: los días almacenados en ese rango que no aparecen en `df` se eliminan, y
+        los anteriores a `since` no se comparan.
+
+        Args:
+            source (str): Nombre de la fuente ("prints", "taps", "pays"...).
+            df (pd.DataFrame): Datos transformados de la fuente desde `since`.
+            date_column (str): Columna de fecha que define la partición.
+            since (pd.Timestamp, optional): Primer día que cubre `df`; None si cubre toda la historia.
+
+        Returns:
+            list[pd.Timestamp]: Días escritos o eliminados en esta llamada.
+        """
+        day_keys = df[date_column].dt.normalize()
+        state = self.read_state()
+        stored = state["partitions"].get(source, {})
+
+        changed_days = []
+        for day, part in df.groupby(day_keys, sort=True):
+            entry = stored.get(f"{day:%Y-%m-%d}")
+            # Las entradas sin hash (estado anterior, solo con filas) se reescriben una vez
+            if not isinstance(entry, dict) or entry.get("hash") != self._content_hash(part):
+                changed_days.append(day)
+        present = set(day_keys.unique())
+        removed_days = sorted(
+            pd.Timestamp(day) for day in stored
+            if (since is None or pd.Timestamp(day) >= since) and pd.Timestamp(day) not in present
+        )
+
+        written_days = sorted(changed_days + removed_days)
+        if written_days:
+            changed_mask = day_keys.isin(changed_days)
+            self._write_partitions(source, df[changed_mask], day_keys[changed_mask], written_days, state)
+            self.write_state(state)
+
+        logger.info(f"Almacén '{source}': {len(changed_days)} días nuevos o modificados y "
+                    f"{len(removed_days)} eliminados de {len(present)} leídos.")
+        return written_days
+
+    def replace(self, source, df, date_column, days):
+        """
+        Reemplaza por completo las particiones de `days`; los días sin filas en `df` se eliminan.
+
+        Args:
+            source (str): Nombre de la fuente.
+            df (pd.DataFrame): Nuevos datos para esos días.
+            date_column (str): Columna de fecha que define la partición.
+            days (list[pd.Timestamp]): Días a reemplazar.
+        """
+        day_keys = df[date_column].dt.normalize()
+        state = self.read_state()
+        self._write_partitions(source, df, day_keys, sorted(pd.Timestamp(day) for day in days), state)
+        self.write_state(state)
+        logger.info(f"Almacén '{source}': {len(days)} particiones reemplazadas.")
+
+    def load(self, source, start=None, end=None):
+        """
+        Lee las particiones de una fuente cuyo día está en [start, end].
+
+        Returns:
+            pd.DataFrame | None: Datos concatenados, o None si no hay particiones en el rango.
+        """
+        days = [
+            day for day in self.days(source)
+            if (start is None or day >= start) and (end is None or day <= end)
+        ]
+        if not days:
+            return None
+
+        parts = [
+            pd.read_parquet(os.path.join(self._partition_dir(source, day), "part-0.parquet"))
+            for day in days
+        ]
+        df = pd.concat(parts, ignore_index=True)
+        logger.info(f"Almacén '{source}': {len(days)} particiones leídas, {len(df)} registros.")
+        return df
+
+    def get_metadata(self, key, default=None):
+        """Devuelve un valor de metadatos del almacén."""
+        return self.read_state()["metadata"].get(key, default)
+
+    def set_metadata(self, key, value):
+        """Guarda un valor de metadatos del almacén."""
+        state = self.read_state()
+        state["metadata"][key] = value
+        self.write_state(state)
@@ -0,0 +1,154 @@
+# src/utils/profiling.py
+
+import cProfile
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from src.utils.logger import logger
+
+try:
+    import resource
+except ImportError:  # Windows: sin medición de RSS máximo
+    resource = None
+
+
+def _peak_rss_bytes():
+    """RSS máximo del proceso hasta ahora, en bytes (None si la plataforma no lo ofrece)."""
+    if resource is None:
+        return None
+    # ru_maxrss está en kilobytes en Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _frame_bytes(frame, deep=False):
+    # deep=True recorre cada celda de texto u objeto: es O(filas) y solo se usa si se pide
+    return int(frame.memory_usage(index=True, deep=deep).sum())
+
+
+class StageRecord:
+    def __init__(self, name, rows_in=None, deep_memory=False):
+        """
+        Métricas de una etapa del pipeline.
+
+        Args:
+            name (str): Nombre de la etapa.
+            rows_in (int, optional): Filas de entrada de la etapa.
+            deep_memory (bool): Mide la memoria del DataFrame de salida incluyendo el contenido
+                de las celdas de texto u objeto.
+        """
+        self.name = name
+        self._deep_memory = deep_memory
+        self.rows_in = rows_in
+        self.rows_out = None
+        self.frame_bytes = None
+        self.wall_seconds = None
+        self.cpu_seconds = None
+        self.peak_rss_delta_bytes = None
+        self.profile_path = None
+
+    def set_output(self, frame):
+        """Registra las filas y la memoria del DataFrame producido por la etapa."""
+        self.rows_out = len(frame)
+        self.frame_bytes = _frame_bytes(frame, self._deep_memory)
+
+    def to_dict(self):
+        return {key: value for key, value in vars(self).items() if not key.startswith("_")}
+
+
+class StageProfiler:
+    def __init__(self, enabled=True, profile_stages=None, profile_dir=None, deep_memory=False):
+        """
+        Mide cada etapa del pipeline: tiempo real, tiempo de CPU del proceso, incremento del
+        RSS máximo, filas de entrada y salida y memoria del DataFrame resultante.
+
+        Las etapas que se ejecutan a la vez (p. ej. la ingesta en paralelo de las tres
+        fuentes) comparten los contadores del proceso, por lo que su CPU y su RSS se solapan.
+
+        Args:
+            enabled (bool): Si es False, `stage` no mide nada.
+            profile_stages (iterable[str], optional): Etapas a perfilar con cProfile
+                ("all" para todas).
+            profile_dir (str, optional): Directorio de los volcados .prof de cProfile.
+            deep_memory (bool): Incluye en la memoria de cada DataFrame el contenido de las
+                celdas de texto u objeto (`memory_usage(deep=True)`, que recorre todas las
+                filas). Por defecto solo se suman los buffers, sin coste por fila.
+        """
+        self.enabled = enabled
+        self.profile_stages = set(profile_stages or [])
+        self.profile_dir = profile_dir or "./profiles"
+        self.deep_memory = deep_memory
+        self.records = []
+        self.started_at = datetime.now(timezone.utc)
+        self._start = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def _should_profile(self, name):
+        return "all" in self.profile_stages or name in self.profile_stages
+
+    @contextmanager
+    def stage(self, name, rows_in=None):
+        """
+        Mide el bloque como la etapa `name`.
+
+        Yields:
+            StageRecord: Registro de la etapa; el bloque puede llamar a `set_output`.
+        """
+        record = StageRecord(name, rows_in, self.deep_memory)
+        if not self.enabled:
+            yield record
+            return
+
+        profile = cProfile.Profile() if self._should_profile(name) else None
+        rss_before = _peak_rss_bytes()
+        cpu_before = time.process_time()
+        wall_before = time.perf_counter()
+        if profile is not None:
+            profile.enable()
+        try:
+            yield record
+        finally:
+            if profile is not None:
+                profile.disable()
+            record.wall_seconds = round(time.perf_counter() - wall_before, 6)
+            record.cpu_seconds = round(time.process_time() - cpu_before, 6)
+            rss_after = _peak_rss_bytes()
+            if rss_before is not None:
+                record.peak_rss_delta_bytes = rss_after - rss_before
+            if profile is not None:
+                os.makedirs(self.profile_dir, exist_ok=True)
+                record.profile_path = os.path.join(self.profile_dir, f"{name.replace(':', '_')}.prof")
+                profile.dump_stats(record.profile_path)
+            with self._lock:
+                self.records.append(record)
+            logger.info(f"Etapa '{name}': {record.wall_seconds:.3f}s reales, {record.cpu_seconds:.3f}s de CPU, "
+                        f"filas {record.rows_in} -> {record.rows_out}.")
+
+    def report(self):
+        """
+        Devuelve el informe de la ejecución como diccionario serializable a JSON.
+        """
+        return {
+            "started_at": self.started_at.isoformat(),
+            "total_wall_seconds": round(time.perf_counter() - self._start, 6),
+            "peak_rss_bytes": _peak_rss_bytes(),
+            "stages": [record.to_dict() for record in self.records],
+        }
+
+    def write_report(self, report_path):
+        """
+        Escribe el informe JSON de la ejecución.
+
+        Args:
+            report_path (str): Ruta del archivo JSON.
+        """
+        if not self.enabled:
+            return
+        directory = os.path.dirname(report_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(report_path, "w") as file:
+            json.dump(self.report(), file, indent=2)
+        logger.info(f"Informe de la ejecución escrito en {report_path}")
@@ -0,0 +1,170 @@
+# src/utils/transform_cache.py
+
+import hashlib
+import json
+import os
+import threading
+import pandas as pd
+from src.utils.checkpoint import code_version
+from src.utils.logger import logger
+
+_HASH_BLOCK_SIZE = 8 * 1024 * 1024
+
+
+class TransformCache:
+    FORMATS = ("parquet", "feather")
+
+    def __init__(self, cache_dir, max_size_bytes=None, file_format="parquet"):
+        """
+        Inicializa la caché en disco de fuentes transformadas.
+
+        Args:
+            cache_dir (str): Directorio donde se guardan las entradas.
+            max_size_bytes (int, optional): Tamaño máximo de la caché; al superarlo se eliminan
+                las entradas usadas hace más tiempo (LRU). Sin límite si es None.
+            file_format (str): Formato de las entradas: "parquet" o "feather".
+        """
+        if file_format not in self.FORMATS:
+            raise ValueError(f"Formato de caché '{file_format}' no soportado. Opciones: {self.FORMATS}.")
+
+        self.cache_dir = cache_dir
+        self.max_size_bytes = max_size_bytes
+        self.file_format = file_format
+        self._lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def __getstate__(self):
+        # El lock no se puede serializar: los loaders con caché se envían a procesos de trabajo
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def fingerprint(self, file_path, transformer, extra=None):
+        """
+        Calcula la clave de caché de un archivo fuente y el transformador que lo procesa.
+
+        La clave combina tamaño, fecha de modificación y hash del contenido del archivo con la
+        clase del transformador, su esquema y la versión del código (hash de los módulos del
+        paquete, ver `checkpoint.code_version`): cualquier cambio en la ingesta o los
+        transformadores invalida las entradas sin tener que actualizar una versión a mano.
+
+        Args:
+            file_path (str): Ruta del archivo fuente.
+            transformer (BaseTransformer): Transformador aplicado al archivo.
+            extra (dict, optional): Parámetros adicionales que afectan al resultado.
+
+        Returns:
+            str: Clave hexadecimal de la entrada.
+        """
+        stat = os.stat(file_path)
+        content_hash = hashlib.blake2b(digest_size=16)
+        with open(file_path, "rb") as f:
+            for block in iter(lambda: f.read(_HASH_BLOCK_SIZE), b""):
+                content_hash.update(block)
+
+        key_parts = {
+            "code_version": code_version(),
+            "file_size": stat.st_size,
+            "file_mtime_ns": stat.st_mtime_ns,
+            "file_hash": content_hash.hexdigest(),
+            "transformer": f"{type(transformer).__module__}.{type(transformer).__qualname__}",
+            "schema": transformer.schema,
+            "event_data_fields": getattr(transformer, "event_data_fields", {}),
+            "date_columns": getattr(transformer, "date_columns", []),
+            "extra": extra or {},
+        }
+        serialized = json.dumps(key_parts, sort_keys=True, default=str).encode("utf-8")
+        return hashlib.blake2b(serialized, digest_size=16).hexdigest()
+
+    def _entry_path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.{self.file_format}")
+
+    def get(self, key):
+        """
+        Devuelve el DataFrame guardado bajo `key`, o None si no existe.
+        """
+        path = self._entry_path(key)
+        with self._lock:
+            if not os.path.exists(path):
+                logger.info(f"Caché sin entrada para la clave {key}.")
+                return None
+            # Actualizar la fecha de uso para la política LRU
+            os.utime(path)
+
+        try:
+            if self.file_format == "parquet":
+                df = pd.read_parquet(path)
+            else:
+                df = pd.read_feather(path)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Entrada de caché ilegible en {path}, se descarta: {e}")
+            self._remove(path)
+            return None
+
+        logger.info(f"Entrada de caché encontrada para la clave {key}: {df.shape} registros.")
+        return df
+
+    def put(self, key, df):
+        """
+        Guarda `df` bajo `key` de forma atómica y aplica la política de desalojo.
+        """
+        path = self._entry_path(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            if self.file_format == "parquet":
+                df.to_parquet(tmp_path, index=False)
+            else:
+                df.reset_index(drop=True).to_feather(tmp_path)
+            os.replace(tmp_path, path)
+            logger.info(f"Entrada de caché guardada en {path}.")
+        except (OSError, ValueError) as e:
+            logger.warning(f"No se pudo guardar la entrada de caché en {path}: {e}")
+            self._remove(tmp_path)
+            return
+
+        self.evict()
+
+    def evict(self):
+        """
+        Elimina las entradas usadas hace más tiempo hasta respetar `max_size_bytes`.
+        """
+        if self.max_size_bytes is None:
+            return
+
+        with self._lock:
+            entries = []
+            for name in os.listdir(self.cache_dir):
+                if name.endswith(f".{self.file_format}"):
+                    entry_stat = os.stat(os.path.join(self.cache_dir, name))
+                    entries.append((entry_stat.st_mtime, entry_stat.st_size, name))
+
+            total_size = sum(size for _, size, _ in entries)
+            for _, size, name in sorted(entries):
+                if total_size <= self.max_size_bytes:
+                    break
+                self._remove(os.path.join(self.cache_dir, name))
+                total_size -= size
+                logger.info(f"Entrada de caché {name} desalojada ({size} bytes).")
+
+    def clear(self):
+        """
+        Elimina todas las entradas de la caché y sus temporales; el resto de archivos del
+        directorio se conserva.
+        """
+        with self._lock:
+            for name in os.listdir(self.cache_dir):
+                if name.endswith(tuple(f".{file_format}" for file_format in self.FORMATS)) or \
+                        (name.endswith(".tmp") and any(f".{file_format}." in name for file_format in self.FORMATS)):
+                    self._remove(os.path.join(self.cache_dir, name))
+        logger.info(f"Caché de transformaciones vaciada en {self.cache_dir}.")
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
@@ -1,8 +1,11 @@
 # tests/test_base_transformer.py
 
 import pytest
+import numpy as np
 import pandas as pd
 from src.transform.base_transformer import BaseTransformer
+from src.utils.data_cleaner import DataCleaner
+from src.utils.data_validation import SchemaValidationError
 
 # Crear un esquema general que usarán las pruebas de base
 GENERAL_SCHEMA = {
@@ -53,6 +56,23 @@ def test_impute_non_critical_missing():
     assert result_df["event_data.value_prop"].iloc[1] == "desconocido", \
         "Debe imputar los valores nulos en columnas no críticas con 'desconocido'."
 
+def test_clean_drops_imputes_and_counts_nulls_in_one_pass():
+    df = pd.DataFrame({
+        "day": ["2020-11-01", None, "2020-11-03", "2020-11-04"],
+        "user_id": [1, 2, None, 4],
+        "value_prop": ["prepaid", None, None, "point"],
+    }, index=[10, 11, 12, 13])
+    cleaner = DataCleaner(critical_columns=["day", "user_id"], non_critical_columns=["value_prop"])
+
+    result_df = cleaner.clean(df)
+
+    assert result_df.index.tolist() == [10, 13]
+    assert cleaner.null_counts.to_dict() == {"day": 1, "user_id": 1, "value_prop": 2}
+
+    df.loc[13, "value_prop"] = None
+    result_df = cleaner.clean(df)
+    assert result_df["value_prop"].tolist() == ["prepaid", "desconocido"]
+
 def test_enforce_schema():
     data = {
         "day": ["2020-11-01", "2020-11-02"],
@@ -70,3 +90,57 @@ def test_enforce_schema():
     assert result_df["user_id"].dtype == 'int64', "El tipo de 'user_id' debe ser int64."
     assert result_df["event_data.position"].dtype == 'int64', "El tipo de 'event_data.position' debe ser int64."
     assert result_df["event_data.value_prop"].dtype == 'object', "El tipo de 'event_data.value_prop' debe ser object."
+
+def test_enforce_schema_leaves_matching_columns_untouched():
+    user_ids = np.array([98702, 98703], dtype="int64")
+    df = pd.DataFrame({
+        "day": pd.to_datetime(["2020-11-01", "2020-11-02"]),
+        "user_id": user_ids,
+        "event_data.position": [0, 1],
+        "event_data.value_prop": pd.Series(["cellphone_recharge", "prepaid"], dtype=object),
+    })
+
+    result_df = GeneralTransformer().schema_validator.enforce_schema(df)
+
+    assert np.shares_memory(result_df["user_id"].to_numpy(), df["user_id"].to_numpy())
+
+def test_enforce_schema_reports_every_offending_value():
+    df = pd.DataFrame({
+        "day": ["2020-11-01", "no es fecha"],
+        "user_id": ["98702", "abc"],
+        "event_data.position": [0.5, 1],
+        "event_data.value_prop": ["cellphone_recharge", "prepaid"],
+    }, index=[10, 11])
+
+    with pytest.raises(SchemaValidationError) as error:
+        GeneralTransformer().schema_validator.enforce_schema(df)
+
+    report = error.value.report
+    assert report[["column", "row"]].values.tolist() == [
+        ["day", 11], ["user_id", 11], ["event_data.position", 10]
+    ]
+    assert report["value"].tolist() == ["no es fecha", "abc", 0.5]
+
+def test_expand_event_data_vectorized_matches_json_normalize():
+    data = {
+        "day": ["2020-11-01", "2020-11-01", "2020-11-02"],
+        "user_id": [98702, 98703, 98704],
+        "event_data": [
+            {"position": 0, "value_prop": "cellphone_recharge"},
+            None,
+            {"value_prop": "prepaid"},
+        ]
+    }
+    df = pd.DataFrame(data, index=[10, 11, 12])
+
+    transformer = GeneralTransformer()
+    transformer.event_data_fields = {"position": "int64", "value_prop": "object"}
+
+    result_df = transformer.expand_event_data(df.copy())
+    expected_df = transformer._expand_event_data_chunked(df.copy(), "event_data", chunk_size=2)
+
+    assert result_df.columns.tolist() == ["day", "user_id", "position", "value_prop"]
+    assert result_df["position"].tolist()[0] == 0
+    assert result_df["position"].isna().tolist() == expected_df["position"].isna().tolist()
+    assert result_df["value_prop"].isna().tolist() == expected_df["value_prop"].isna().tolist()
+    assert result_df["value_prop"].iloc[2] == "prepaid"
@@ -0,0 +1,47 @@
+# tests/test_categories.py
+
+import pandas as pd
+from src.ingest.load_pays import PaysLoader
+from src.utils.categories import align_categories, concat_aligned
+
+
+def test_align_categories_shares_dictionary_across_sources():
+    data = {
+        "prints": pd.DataFrame({"user_id": [1, 2], "value_prop": pd.Categorical(["prepaid", "cellphone"])}),
+        "taps": pd.DataFrame({"user_id": [1], "value_prop": pd.Categorical(["prepaid"])}),
+        "pays": pd.DataFrame({"user_id": [3], "value_prop": pd.Categorical(["link_cobro"])}),
+    }
+
+    align_categories(data, ["value_prop"])
+
+    dtypes = {df["value_prop"].dtype for df in data.values()}
+    assert len(dtypes) == 1
+    assert list(dtypes.pop().categories) == ["cellphone", "link_cobro", "prepaid"]
+    assert data["prints"]["value_prop"].tolist() == ["prepaid", "cellphone"]
+
+    # El join sobre claves alineadas conserva el tipo categórico
+    merged = pd.merge(data["prints"], data["taps"], on=["user_id", "value_prop"])
+    assert isinstance(merged["value_prop"].dtype, pd.CategoricalDtype)
+
+
+def test_concat_aligned_keeps_categorical_dtype():
+    chunks = [
+        pd.DataFrame({"value_prop": pd.Categorical(["prepaid"])}),
+        pd.DataFrame({"value_prop": pd.Categorical(["point"])}),
+    ]
+
+    combined = concat_aligned(chunks, ignore_index=True)
+
+    assert isinstance(combined["value_prop"].dtype, pd.CategoricalDtype)
+    assert combined["value_prop"].tolist() == ["prepaid", "point"]
+
+
+def test_loaders_produce_categorical_value_prop(tmp_path):
+    pays_file = tmp_path / "pays.csv"
+    pays_file.write_text("pay_date,total,user_id,value_prop\n2020-11-01,7.04,35994,link_cobro\n")
+
+    pandas_df = PaysLoader(str(pays_file), engine="pandas").load_and_transform()
+    arrow_df = PaysLoader(str(pays_file), engine="arrow").load_and_transform()
+
+    assert isinstance(pandas_df["value_prop"].dtype, pd.CategoricalDtype)
+    assert pandas_df["value_prop"].dtype == arrow_df["value_prop"].dtype
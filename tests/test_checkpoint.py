@@ -0,0 +1,85 @@
+# tests/test_checkpoint.py
+
+import os
+import numpy as np
+import pandas as pd
+from src.utils import checkpoint
+from src.utils.checkpoint import CheckpointStore, code_version, run_key
+from src.utils.dag import StageGraph
+
+
+def _master():
+    return pd.DataFrame({
+        "user_id": [1, 2, 3],
+        "value_prop": pd.Categorical(["prepaid", "point", "prepaid"]),
+        "day_prints": pd.to_datetime(["2020-11-01", "2020-11-02", "2020-11-03"]),
+        "total": [7.5, np.nan, 1.0],
+    })
+
+
+def test_checkpoint_round_trip_is_memory_mapped(tmp_path):
+    store = CheckpointStore(str(tmp_path / "run"), key="a")
+    store.save("master", _master())
+    store.mark_completed("master")
+
+    loaded = store.load("master")
+
+    pd.testing.assert_frame_equal(loaded, _master())
+    # Las columnas numéricas sin nulos apuntan al archivo mapeado, sin copia
+    assert not loaded["user_id"].to_numpy().flags.writeable
+
+
+def _run_graph(run_dir, key, resume, calls):
+    def join():
+        calls.append("join")
+        return _master()
+
+    def metrics(master):
+        calls.append("metrics")
+        return master.assign(view_count=master["user_id"] * 2)
+
+    checkpoints = CheckpointStore(run_dir, key=key, values=["master"], resume=resume)
+    graph = StageGraph(checkpoints=checkpoints)
+    graph.add_stage("join", join, outputs=["master"])
+    graph.add_stage("metrics", metrics, inputs=["master"], outputs=["final"])
+    return graph.run(["final"])["final"]
+
+
+def test_resume_skips_stages_whose_outputs_are_checkpointed(tmp_path):
+    run_dir = str(tmp_path / "run")
+    calls = []
+
+    first = _run_graph(run_dir, "a", resume=False, calls=calls)
+    resumed = _run_graph(run_dir, "a", resume=True, calls=calls)
+    assert calls == ["join", "metrics", "metrics"]
+    pd.testing.assert_frame_equal(resumed, first)
+
+    # Con otra configuración o fuentes distintas los checkpoints se descartan
+    _run_graph(run_dir, "b", resume=True, calls=calls)
+    assert calls[3:] == ["join", "metrics"]
+
+
+def test_starting_over_only_removes_checkpoint_files(tmp_path):
+    run_dir = tmp_path / "run"
+    store = CheckpointStore(str(run_dir), key="a")
+    store.save("master", _master())
+    store.mark_completed("master")
+    (run_dir / "master.arrow.123.tmp").write_bytes(b"")
+    (run_dir / "notes.txt").write_text("no es un checkpoint")
+
+    CheckpointStore(str(run_dir), key="b", resume=True)
+
+    assert sorted(os.listdir(run_dir)) == ["manifest.json", "notes.txt"]
+
+
+def test_run_key_changes_with_the_code(tmp_path, monkeypatch):
+    (tmp_path / "stage.py").write_text("VERSION = 1\n")
+    first_version = code_version(str(tmp_path))
+    (tmp_path / "stage.py").write_text("VERSION = 2\n")
+    assert code_version(str(tmp_path)) != first_version
+
+    config = {"join": {"mode": "key"}}
+    monkeypatch.setattr(checkpoint, "code_version", lambda: "v1")
+    first_key = run_key(config)
+    monkeypatch.setattr(checkpoint, "code_version", lambda: "v2")
+    assert run_key(config) != first_key
@@ -0,0 +1,100 @@
+# tests/test_dag.py
+
+import gc
+import threading
+import time
+import weakref
+import pandas as pd
+import pytest
+from src.utils.dag import StageGraph
+from src.utils.profiling import StageProfiler
+
+
+def _load_pays():
+    return pd.DataFrame({"total": [1.5, 2.0]})
+
+
+def _double(df):
+    return df * 2
+
+
+def _slow_load():
+    time.sleep(30)
+    return pd.DataFrame({"total": [1.0]})
+
+
+def test_independent_stages_run_concurrently():
+    # Si las dos ramas se ejecutaran una tras otra, la barrera nunca se completaría
+    barrier = threading.Barrier(2, timeout=5)
+
+    def branch(value):
+        barrier.wait()
+        return value
+
+    graph = StageGraph(max_workers=2)
+    graph.add_stage("left", lambda: branch(1), outputs=["left"])
+    graph.add_stage("right", lambda: branch(2), outputs=["right"])
+    graph.add_stage("sum", lambda left, right: left + right, inputs=["left", "right"], outputs=["total"])
+
+    assert graph.run(["total"]) == {"total": 3}
+
+
+def test_intermediates_are_released_after_their_last_consumer():
+    profiler = StageProfiler()
+    released = {}
+
+    def make_master():
+        master = pd.DataFrame({"user_id": range(10)})
+        released["master"] = weakref.ref(master)
+        return master
+
+    def check_released(rows):
+        gc.collect()
+        return released["master"]() is None, rows
+
+    graph = StageGraph(profiler=profiler)
+    graph.add_stage("join", make_master, outputs=["master"])
+    graph.add_stage("metrics", len, inputs=["master"], outputs=["rows"])
+    graph.add_stage("export", check_released, inputs=["rows"], outputs=["result"])
+
+    assert graph.run(["result"]) == {"result": (True, 10)}
+    assert [record.name for record in profiler.records] == ["join", "metrics", "export"]
+    assert profiler.records[0].rows_out == 10
+
+
+def test_process_executor_runs_stages_in_worker_processes():
+    profiler = StageProfiler()
+    graph = StageGraph(executor="process", max_workers=1, profiler=profiler)
+    graph.add_stage("ingest:pays", _load_pays, outputs=["pays"])
+    graph.add_stage("double", _double, inputs=["pays"], outputs=["doubled"])
+
+    result = graph.run(["doubled"])
+
+    pd.testing.assert_frame_equal(result["doubled"], pd.DataFrame({"total": [3.0, 4.0]}))
+    assert [(record.name, record.rows_in) for record in profiler.records] == [("ingest:pays", None), ("double", 2)]
+
+
+def test_process_executor_fails_fast_on_unpicklable_stages():
+    graph = StageGraph(executor="process", max_workers=2)
+    graph.add_stage("ingest:prints", _slow_load, outputs=["prints"])
+    graph.add_stage("ingest:taps", lambda: pd.DataFrame(), outputs=["taps"])
+
+    # El error termina la ejecución sin esperar a la etapa en curso
+    start = time.perf_counter()
+    with pytest.raises(TypeError, match="no se puede enviar"):
+        graph.run(["prints", "taps"])
+    assert time.perf_counter() - start < 20
+
+
+def test_invalid_graphs_are_rejected():
+    graph = StageGraph()
+    graph.add_stage("join", lambda prints: prints, inputs=["prints"], outputs=["master"])
+    with pytest.raises(ValueError, match="Ninguna etapa produce"):
+        graph.run(["master"])
+
+    graph.add_stage("cycle", lambda master: master, inputs=["master"], outputs=["prints"])
+    with pytest.raises(ValueError, match="ciclo"):
+        graph.run(["master"])
+
+    with pytest.raises(ValueError, match="ya las produce"):
+        graph.add_stage("other", lambda: None, outputs=["master"])
@@ -2,6 +2,8 @@
 
 import pytest
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
 from src.utils.data_loader import DataLoader
 
 def test_load_json_successful(tmp_path):
@@ -71,3 +73,25 @@ def test_load_csv_empty_file(tmp_path):
     loader = DataLoader(str(empty_csv))
     with pytest.raises(ValueError, match="Archivo CSV vacío"):
         loader.load_csv()
+
+
+def test_row_filter_is_applied_to_each_block_while_reading():
+    batches = [pa.record_batch({"user_id": [1, 2, 3]}), pa.record_batch({"user_id": [4, 5, 6]})]
+    reader = pa.RecordBatchReader.from_batches(batches[0].schema, batches)
+
+    table = DataLoader._read_filtered(reader, pc.field("user_id") > 4)
+
+    assert table.column("user_id").to_pylist() == [5, 6]
+    assert table.num_rows == table.to_batches()[0].num_rows
+
+
+def test_csv_arrow_streaming_filter_keeps_the_schema_when_no_rows_match(tmp_path):
+    csv_file = tmp_path / "pays.csv"
+    csv_file.write_text("pay_date,total,user_id,value_prop\n2020-11-01,7.04,1,prepaid\n")
+    loader = DataLoader(str(csv_file))
+
+    december = pa.scalar(pd.Timestamp("2020-12-01").as_unit("ns").to_datetime64())
+    df = loader.load_csv_arrow({"pay_date": pa.timestamp("ns")}, row_filter=pc.field("pay_date") > december)
+
+    assert df.empty
+    assert list(df.columns) == ["pay_date", "total", "user_id", "value_prop"]
@@ -0,0 +1,31 @@
+# tests/test_date_parsing.py
+
+import pandas as pd
+from src.utils.date_parsing import convert_dates, to_datetime_memoized
+
+
+def test_memoized_parsing_matches_to_datetime():
+    series = pd.Series(["2020-11-01", None, "2020-11-02", "no es fecha", "2020-11-01"], index=[5, 6, 7, 8, 9])
+
+    result = to_datetime_memoized(series, format="ISO8601")
+
+    expected = pd.to_datetime(series, format="ISO8601", errors="coerce").astype("datetime64[ns]")
+    pd.testing.assert_series_equal(result, expected)
+
+
+def test_categorical_and_datetime_columns():
+    categorical = pd.Series(pd.Categorical(["2020-11-02", "2020-11-01", "2020-11-02"]))
+    assert to_datetime_memoized(categorical).tolist() == [pd.Timestamp("2020-11-02"), pd.Timestamp("2020-11-01"),
+                                                          pd.Timestamp("2020-11-02")]
+
+    dates = pd.Series(pd.to_datetime(["2020-11-01"]))
+    assert to_datetime_memoized(dates) is dates
+
+
+def test_convert_dates_uses_the_column_format():
+    df = pd.DataFrame({"day": ["01/11/2020", "02/11/2020"], "pay_date": ["2020-11-03", "2020-11-04"]})
+
+    convert_dates(df, ["day", "pay_date"], formats={"day": "%d/%m/%Y"})
+
+    assert df["day"].tolist() == [pd.Timestamp("2020-11-01"), pd.Timestamp("2020-11-02")]
+    assert df["pay_date"].dtype == "datetime64[ns]"
@@ -0,0 +1,81 @@
+# tests/test_execution.py
+
+import numpy as np
+import pandas as pd
+import pytest
+from src.preprocess.aggregate_metrics import MetricsAggregator
+from src.preprocess.filter_last_week import LastWeekFilter
+from src.transform.join_data import DataJoiner
+from src.utils.execution import ExecutionBackend, hash_shards
+
+
+def _random_sources(seed=0, rows=200):
+    rng = np.random.default_rng(seed)
+    days = pd.date_range("2020-10-20", "2020-11-30")
+
+    def events(size):
+        return pd.DataFrame({
+            "day": rng.choice(days, size=size),
+            "user_id": rng.integers(1, 30, size=size),
+            "position": rng.integers(0, 4, size=size),
+            "value_prop": rng.choice(["prepaid", "point", "link_cobro"], size=size),
+        })
+
+    pays = pd.DataFrame({
+        "pay_date": rng.choice(days, size=rows // 2),
+        "total": rng.random(rows // 2) * 100,
+        "user_id": rng.integers(1, 30, size=rows // 2),
+        "value_prop": rng.choice(["prepaid", "point", "link_cobro"], size=rows // 2),
+    })
+    return events(rows), events(rows // 2), pays
+
+
+def _run_stages(backend, mode):
+    prints, taps, pays = _random_sources()
+    master = DataJoiner(mode=mode, backend=backend).join_data(prints, taps, pays)
+    prints_last_week = master[master["day_prints"] >= master["day_prints"].max() - pd.Timedelta(weeks=1)]
+    metrics = MetricsAggregator(backend=backend).calculate_metrics(master, prints_last_week, pays, weeks=3)
+    return master, metrics
+
+
+def _sorted(df):
+    return df.sort_values(df.columns.tolist()).reset_index(drop=True)
+
+
+@pytest.mark.parametrize("mode", ["key", "time_aware"])
+@pytest.mark.parametrize("backend_name", ["dask-threads", "dask-processes"])
+def test_backends_produce_equivalent_output(backend_name, mode):
+    expected_master, expected_metrics = _run_stages(ExecutionBackend("pandas"), mode)
+
+    backend = ExecutionBackend(backend_name, npartitions=3)
+    try:
+        master, metrics = _run_stages(backend, mode)
+    finally:
+        backend.close()
+
+    pd.testing.assert_frame_equal(_sorted(master), _sorted(expected_master))
+    pd.testing.assert_frame_equal(_sorted(metrics), _sorted(expected_metrics))
+
+
+def test_unknown_backend_raises():
+    with pytest.raises(ValueError):
+        ExecutionBackend("spark")
+
+
+def test_user_shards_with_global_reference_date_match_full_run():
+    prints, taps, pays = _random_sources()
+
+    reference_date = prints["day"].max()
+    sources = {"prints": prints, "taps": taps, "pays": pays}
+    shard_ids = {name: hash_shards(df["user_id"], 4) for name, df in sources.items()}
+    shard_results = []
+    for shard in range(4):
+        shard_prints, shard_taps, shard_pays = (df[shard_ids[name] == shard] for name, df in sources.items())
+        master = DataJoiner().join_data(shard_prints, shard_taps, shard_pays)
+        prints_last_week = LastWeekFilter("day_prints").filter(master, reference_date=reference_date)
+        shard_results.append(MetricsAggregator().calculate_metrics(master, prints_last_week, shard_pays,
+                                                                   reference_date=reference_date))
+
+    _, expected_metrics = _run_stages(ExecutionBackend("pandas"), "key")
+    sharded_metrics = pd.concat(shard_results, ignore_index=True)
+    pd.testing.assert_frame_equal(_sorted(sharded_metrics), _sorted(expected_metrics))
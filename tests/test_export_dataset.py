@@ -0,0 +1,141 @@
+# tests/test_export_dataset.py
+
+import io
+import os
+import pytest
+import dask.dataframe as dd
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from src.load.export_dataset import DatasetExporter
+
+
+def _final_df(rows=10):
+    return pd.DataFrame({
+        "user_id": range(rows),
+        "value_prop": pd.Categorical(["prepaid", "point"] * (rows // 2)),
+        "day_prints": pd.to_datetime(["2020-11-29", "2020-11-30"] * (rows // 2)),
+        "clicked": [1, 0] * (rows // 2),
+    })
+
+
+def test_parquet_export_writes_hive_partitions(tmp_path):
+    dataset_path = tmp_path / "final_dataset"
+    exporter = DatasetExporter(parquet_options={"partition_by": ["day_prints"], "batch_size": 3,
+                                                "compression": "zstd"})
+
+    exporter.export(_final_df(), str(dataset_path), format="parquet")
+
+    assert sorted(os.listdir(dataset_path)) == ["day_prints=2020-11-29", "day_prints=2020-11-30"]
+    result = pd.read_parquet(dataset_path).sort_values("user_id").reset_index(drop=True)
+    assert result["user_id"].tolist() == list(range(10))
+    assert result["day_prints"].astype(str).tolist() == ["2020-11-29", "2020-11-30"] * 5
+
+
+def test_parquet_dataset_replaces_the_previous_one_only_when_complete(tmp_path):
+    dataset_path = tmp_path / "final_dataset"
+    dataset_path.mkdir()
+    (dataset_path / "stale.parquet").write_bytes(b"")
+    exporter = DatasetExporter(parquet_options={"partition_by": ["day_prints"]})
+
+    def failing_batches():
+        yield from exporter._iter_record_batches(_final_df())
+        raise OSError("disco lleno")
+
+    with pytest.raises(OSError):
+        exporter.write_parquet_dataset(failing_batches(), str(dataset_path), exporter._arrow_schema(_final_df()))
+    assert os.listdir(tmp_path) == ["final_dataset"]
+    assert os.listdir(dataset_path) == ["stale.parquet"]
+
+    exporter.export(_final_df(), str(dataset_path), format="parquet")
+    assert os.listdir(tmp_path) == ["final_dataset"]
+    assert sorted(os.listdir(dataset_path)) == ["day_prints=2020-11-29", "day_prints=2020-11-30"]
+
+
+
+def test_previous_dataset_is_restored_when_the_swap_fails(tmp_path, monkeypatch):
+    dataset_path = tmp_path / "final_dataset"
+    dataset_path.mkdir()
+    (dataset_path / "previous.parquet").write_bytes(b"")
+    exporter = DatasetExporter(parquet_options={"partition_by": ["day_prints"]})
+
+    real_replace = os.replace
+
+    def failing_replace(source, destination):
+        # Falla al mover el dataset nuevo a su sitio, tras apartar el anterior
+        if ".tmp-" in str(source):
+            raise OSError("rename interrumpido")
+        real_replace(source, destination)
+
+    monkeypatch.setattr(os, "replace", failing_replace)
+    with pytest.raises(OSError):
+        exporter.export(_final_df(), str(dataset_path), format="parquet")
+
+    assert os.listdir(tmp_path) == ["final_dataset"]
+    assert os.listdir(dataset_path) == ["previous.parquet"]
+
+def test_partitioned_dask_export_matches_the_in_memory_layout(tmp_path):
+    exporter = DatasetExporter(parquet_options={"partition_by": ["day_prints"]})
+    exporter.export(_final_df(), str(tmp_path / "in_memory"), format="parquet")
+    exporter.export_partitioned(dd.from_pandas(_final_df(), npartitions=2), str(tmp_path / "out_of_core"))
+
+    def partition_types(directory):
+        schemas = [pq.read_schema(os.path.join(root, name))
+                   for root, _, names in os.walk(directory) for name in names]
+        return {column["numpy_type"] for schema in schemas for column in schema.pandas_metadata["columns"]
+                if column["name"] == "day_prints"}
+
+    assert sorted(os.listdir(tmp_path / "out_of_core")) == sorted(os.listdir(tmp_path / "in_memory"))
+    assert partition_types(tmp_path / "out_of_core") == partition_types(tmp_path / "in_memory")
+    assert len(partition_types(tmp_path / "in_memory")) == 1
+
+def test_parquet_export_streams_row_groups_into_one_file(tmp_path):
+    file_path = tmp_path / "final_dataset.parquet"
+    exporter = DatasetExporter(parquet_options={"batch_size": 4, "row_group_size": 2})
+
+    exporter.export(_final_df(), str(file_path), format="parquet")
+
+    metadata = pq.ParquetFile(file_path).metadata
+    assert metadata.num_rows == 10
+    assert metadata.num_row_groups == 5
+    pd.testing.assert_frame_equal(pd.read_parquet(file_path), _final_df())
+
+
+def test_single_file_export_creates_the_directory_and_replaces_a_partitioned_dataset(tmp_path):
+    file_path = tmp_path / "final" / "final_dataset.parquet"
+    DatasetExporter(parquet_options={"partition_by": ["day_prints"]}).export(_final_df(), str(file_path),
+                                                                             format="parquet")
+    assert file_path.is_dir()
+
+    DatasetExporter().export(_final_df(), str(file_path), format="parquet")
+
+    assert os.listdir(tmp_path / "final") == ["final_dataset.parquet"]
+    pd.testing.assert_frame_equal(pd.read_parquet(file_path), _final_df())
+
+@pytest.mark.parametrize("export_format, compression, reader", [
+    ("csv", "gzip", lambda path: pd.read_csv(path, parse_dates=["day_prints"])),
+    ("json", "zstd", lambda path: pd.read_json(io.BytesIO(pa.CompressedInputStream(str(path), "zstd").read()),
+                                               lines=True)),
+])
+def test_text_export_is_chunked_compressed_and_atomic(tmp_path, export_format, compression, reader):
+    file_path = tmp_path / f"final_dataset.{export_format}"
+    exporter = DatasetExporter(text_options={"compression": compression, "chunk_size": 3, "max_workers": 2})
+
+    exporter.export(_final_df(), str(file_path), format=export_format)
+
+    written = tmp_path / f"final_dataset.{export_format}{'.gz' if compression == 'gzip' else '.zst'}"
+    assert os.listdir(tmp_path) == [written.name]
+    result = reader(written)
+    assert result["user_id"].tolist() == list(range(10))
+    assert result["clicked"].tolist() == [1, 0] * 5
+    assert result["value_prop"].tolist() == ["prepaid", "point"] * 5
+
+
+def test_partitioned_text_export_uses_the_text_options(tmp_path):
+    exporter = DatasetExporter(text_options={"compression": "gzip", "chunk_size": 2})
+
+    exporter.export_partitioned(dd.from_pandas(_final_df(), npartitions=2), str(tmp_path), format="csv")
+
+    assert sorted(os.listdir(tmp_path)) == ["part-00000.csv.gz", "part-00001.csv.gz"]
+    result = pd.concat([pd.read_csv(tmp_path / name) for name in sorted(os.listdir(tmp_path))])
+    assert result["user_id"].tolist() == list(range(10))
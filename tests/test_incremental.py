@@ -0,0 +1,60 @@
+# tests/test_incremental.py
+
+import pandas as pd
+from src.preprocess.incremental import IncrementalPlanner
+from src.utils.partition_store import DayPartitionStore
+
+
+def test_store_appends_only_new_or_changed_days(tmp_path):
+    store = DayPartitionStore(str(tmp_path / "store"))
+    prints_df = pd.DataFrame({
+        "day": pd.to_datetime(["2020-11-01", "2020-11-01", "2020-11-02"]),
+        "user_id": [1, 2, 3],
+    })
+
+    assert store.append("prints", prints_df, "day") == [pd.Timestamp("2020-11-01"), pd.Timestamp("2020-11-02")]
+    assert store.append("prints", prints_df, "day") == []
+
+    new_day = pd.DataFrame({"day": pd.to_datetime(["2020-11-03"]), "user_id": [4]})
+    assert store.append("prints", pd.concat([prints_df, new_day]), "day") == [pd.Timestamp("2020-11-03")]
+
+    loaded = store.load("prints", start=pd.Timestamp("2020-11-02"))
+    assert loaded["user_id"].tolist() == [3, 4]
+
+
+def test_store_detects_corrections_with_the_same_row_count_and_removed_days(tmp_path):
+    store = DayPartitionStore(str(tmp_path / "store"))
+    pays_df = pd.DataFrame({
+        "pay_date": pd.to_datetime(["2020-11-01", "2020-11-02", "2020-11-03"]),
+        "total": [10.01, 20.0, 30.0],
+    })
+    store.append("pays", pays_df, "pay_date")
+
+    corrected = pays_df.assign(total=[10.01, 25.0, 30.0])
+    assert store.append("pays", corrected, "pay_date") == [pd.Timestamp("2020-11-02")]
+
+    # Solo se leyó desde el 2 de noviembre: el día 1 se conserva y el 3, que falta, se elimina
+    assert store.append("pays", corrected.iloc[[1]], "pay_date", since=pd.Timestamp("2020-11-02")) == \
+        [pd.Timestamp("2020-11-03")]
+    assert store.load("pays")["total"].tolist() == [10.01, 25.0]
+
+
+def test_planner_recomputes_only_days_whose_lookback_touches_changes():
+    planner = IncrementalPlanner(lookback_weeks=3, window_weeks=1)
+    print_days = list(pd.date_range("2020-10-01", "2020-11-30"))
+
+    affected = planner.affected_print_days(
+        print_days, [pd.Timestamp("2020-11-27")], previous_max_day="2020-11-30"
+    )
+
+    assert affected == list(pd.date_range("2020-11-27", "2020-11-30"))
+    assert planner.load_window(affected, max(print_days)) == (pd.Timestamp("2020-11-06"), pd.Timestamp("2020-11-30"))
+
+
+def test_planner_recomputes_whole_window_when_max_day_moves():
+    planner = IncrementalPlanner(lookback_weeks=3, window_weeks=1)
+    print_days = list(pd.date_range("2020-10-01", "2020-11-30"))
+
+    affected = planner.affected_print_days(print_days, [pd.Timestamp("2020-11-30")], previous_max_day="2020-11-29")
+
+    assert affected == list(pd.date_range("2020-11-23", "2020-11-30"))
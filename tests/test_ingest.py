@@ -0,0 +1,77 @@
+# tests/test_ingest.py
+
+import pytest
+import pandas as pd
+from src.ingest.load_prints import PrintsLoader
+from src.ingest.load_taps import TapsLoader
+from src.ingest.load_pays import PaysLoader
+
+PRINTS_LINES = [
+    '{"day":"2020-11-01","event_data":{"position":0,"value_prop":"cellphone_recharge"},"user_id":98702}',
+    '{"day":"2020-11-02","event_data":{"position":1,"value_prop":"prepaid"},"user_id":98703}',
+    '{"day":"2020-11-03","event_data":{"position":2},"user_id":98704}',
+]
+
+PAYS_CSV = "pay_date,total,user_id,value_prop\n2020-11-01,7.04,35994,link_cobro\n2020-11-02,37.36,79066,prepaid\n"
+
+
+@pytest.mark.parametrize("loader_class, file_name, content", [
+    (PrintsLoader, "prints.json", "\n".join(PRINTS_LINES)),
+    (TapsLoader, "taps.json", '{"day":"2020-11-01","position":1,"value_prop":"prepaid","user_id":98702}'),
+    (PaysLoader, "pays.csv", PAYS_CSV),
+])
+def test_arrow_engine_matches_pandas_engine(tmp_path, loader_class, file_name, content):
+    data_file = tmp_path / file_name
+    data_file.write_text(content)
+
+    pandas_df = loader_class(str(data_file), engine="pandas").load_and_transform()
+    arrow_df = loader_class(str(data_file), engine="arrow").load_and_transform()
+
+    # Los campos no declarados en el esquema de Arrow se añaden al final
+    pd.testing.assert_frame_equal(arrow_df, pandas_df, check_like=True)
+
+
+def test_unknown_engine_is_rejected(tmp_path):
+    with pytest.raises(ValueError, match="no soportado"):
+        PrintsLoader(str(tmp_path / "prints.json"), engine="polars")
+
+
+@pytest.mark.parametrize("loader_class, file_name, content", [
+    (PrintsLoader, "prints.json", "\n".join(PRINTS_LINES * 50)),
+    (PaysLoader, "pays.csv", PAYS_CSV + "2020-11-03,1.00,1,prepaid\n" * 100),
+])
+def test_dask_loader_matches_in_memory_load(tmp_path, loader_class, file_name, content):
+    data_file = tmp_path / file_name
+    data_file.write_text(content)
+
+    expected = loader_class(str(data_file)).load_and_transform()
+    ddf = loader_class(str(data_file)).load_dask(blocksize=1024)
+
+    assert ddf.npartitions > 1
+    pd.testing.assert_frame_equal(ddf.compute().reset_index(drop=True), expected.reset_index(drop=True))
+
+
+@pytest.mark.parametrize("engine, chunk_size", [("arrow", None), ("pandas", None), ("pandas", 2)])
+def test_date_window_drops_rows_while_reading(tmp_path, engine, chunk_size):
+    data_file = tmp_path / "prints.json"
+    data_file.write_text("\n".join(PRINTS_LINES))
+    loader = PrintsLoader(str(data_file), engine=engine, chunk_size=chunk_size,
+                          date_window=(pd.Timestamp("2020-11-02"), pd.Timestamp("2020-11-03")))
+
+    df = loader.load_and_transform()
+
+    # 98702 queda fuera de la ventana; 98704 no tiene value_prop y la limpieza lo descarta
+    assert loader.max_date() == pd.Timestamp("2020-11-03")
+    assert df["user_id"].tolist() == [98703]
+
+
+@pytest.mark.parametrize("engine", ["arrow", "pandas"])
+def test_open_date_window_without_rows_keeps_the_schema(tmp_path, engine):
+    data_file = tmp_path / "prints.json"
+    data_file.write_text("\n".join(PRINTS_LINES))
+    loader = PrintsLoader(str(data_file), engine=engine, date_window=(pd.Timestamp("2020-12-01"), None))
+
+    df = loader.load_and_transform()
+
+    assert df.empty
+    assert list(df.columns) == ["day", "user_id", "position", "value_prop"]
@@ -0,0 +1,31 @@
+# tests/test_logger.py
+
+import concurrent.futures
+import logging
+import multiprocessing
+from src.utils.logger import LOGGER_NAME, PipelineQueueHandler, init_worker_logging, logger, setup_logging
+
+
+def _log_from_worker(value):
+    logger.info("Mensaje desde el proceso de trabajo: %d", value)
+
+
+def test_setup_logging_is_idempotent():
+    setup_logging()
+    setup_logging()
+
+    handlers = logging.getLogger(LOGGER_NAME).handlers
+    assert len(handlers) == 1
+    assert isinstance(handlers[0], PipelineQueueHandler)
+
+
+def test_worker_processes_log_through_the_queue():
+    log_queue = multiprocessing.Queue()
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=1, initializer=init_worker_logging,
+                                                initargs=(log_queue,)) as executor:
+        executor.submit(_log_from_worker, 7).result()
+
+    record = log_queue.get(timeout=10)
+    assert record.name == LOGGER_NAME
+    assert record.getMessage() == "Mensaje desde el proceso de trabajo: 7"
@@ -1,5 +1,7 @@
+import numpy as np
 import pandas as pd
 from src.preprocess.aggregate_metrics import MetricsAggregator
+from src.preprocess.window_engine import SortedWindowIndex
 
 def test_metrics_aggregate():
     # DataFrame de prueba para prints_df
@@ -33,3 +35,117 @@ def test_metrics_aggregate():
     assert not click_indicator_df.empty, "El resultado de click indicator debería tener datos."
     expected_columns = {metrics_aggregator.user_id_col, metrics_aggregator.value_prop_col, "day_prints", "clicked"}
     assert set(click_indicator_df.columns) == expected_columns, f"Las columnas del resultado no son las esperadas: {click_indicator_df.columns}"
+
+
+def _random_master(seed=0, rows=300):
+    rng = np.random.default_rng(seed)
+    days = pd.date_range("2020-10-20", "2020-11-30")
+    master = pd.DataFrame({
+        "user_id": rng.integers(1, 6, size=rows),
+        "value_prop": rng.choice(["prepaid", "point", "link_cobro"], size=rows),
+        "day_prints": rng.choice(days, size=rows),
+        "day_taps": rng.choice(days, size=rows),
+    })
+    master.loc[rng.random(rows) < 0.4, "day_taps"] = pd.NaT
+    prints_last_week = master[master["day_prints"] >= master["day_prints"].max() - pd.Timedelta(weeks=1)]
+    return master, prints_last_week
+
+
+def _legacy_window_counts(master, prints_last_week, time_column, count_column, weeks=3):
+    # Implementación de referencia: merge evento × print, filtro y conteo
+    last_date = master["day_prints"].max()
+    start_date = last_date - pd.Timedelta(weeks=weeks)
+    recent = master[(master[time_column] >= start_date) & (master[time_column] <= last_date)]
+    merged = recent.merge(prints_last_week[["user_id", "value_prop", "day_prints"]],
+                          on=["user_id", "value_prop"], suffixes=("", "_print_last_week"))
+    merged = merged[merged[time_column] < merged["day_prints_print_last_week"]]
+    return (merged.groupby(["user_id", "value_prop", "day_prints_print_last_week"]).size()
+            .reset_index(name=count_column)
+            .rename(columns={"day_prints_print_last_week": "day_prints"}))
+
+
+def _sorted(df):
+    return df.sort_values(["user_id", "value_prop", "day_prints"]).reset_index(drop=True)
+
+
+def test_view_and_click_counts_match_merge_implementation():
+    master, prints_last_week = _random_master()
+    metrics_aggregator = MetricsAggregator()
+
+    view_counts = metrics_aggregator.calculate_view_counts(master, prints_last_week, 3)
+    click_counts = metrics_aggregator.calculate_click_counts_per_value_prop(master, prints_last_week, 3)
+
+    pd.testing.assert_frame_equal(
+        _sorted(view_counts), _sorted(_legacy_window_counts(master, prints_last_week, "day_prints", "view_count")))
+    pd.testing.assert_frame_equal(
+        _sorted(click_counts), _sorted(_legacy_window_counts(master, prints_last_week, "day_taps", "click_count")))
+
+
+def test_cumulative_payment_amounts_match_join_implementation():
+    master, _ = _random_master(seed=1)
+    rng = np.random.default_rng(2)
+    pays_df = pd.DataFrame({
+        "pay_date": rng.choice(pd.date_range("2020-10-01", "2020-11-30"), size=200),
+        "total": rng.uniform(1, 100, size=200).round(2),
+        "user_id": rng.integers(1, 7, size=200),
+        "value_prop": rng.choice(["prepaid", "point", "send_money"], size=200),
+    })
+
+    result = MetricsAggregator().calculate_cumulative_payment_amounts(master, pays_df, 3)
+
+    # Implementación de referencia: join pagos × filas del maestro, filtro y suma
+    master = master.assign(three_weeks_ago=master["day_prints"] - pd.Timedelta(weeks=3))
+    merged = pays_df.merge(master[["user_id", "value_prop", "day_prints", "three_weeks_ago"]],
+                           on=["user_id", "value_prop"])
+    merged = merged[(merged["pay_date"] >= merged["three_weeks_ago"]) & (merged["pay_date"] < merged["day_prints"])]
+    expected = (merged.groupby(["user_id", "value_prop", "day_prints"])["total"].sum()
+                .reset_index(name="cumulative_payment_amount"))
+
+    pd.testing.assert_frame_equal(_sorted(result), _sorted(expected))
+
+
+
+def test_window_sums_do_not_carry_rounding_from_other_keys():
+    # Muchos importes grandes en la primera clave: un acumulado global pierde los céntimos
+    days = pd.date_range("2020-11-01", periods=1000, freq="h").repeat(100)
+    users = np.r_[np.zeros(len(days), dtype=np.int64), [1, 1]]
+    times = pd.Series(days.append(pd.DatetimeIndex(["2020-11-10", "2020-11-12"])))
+    totals = pd.Series(np.r_[np.full(len(days), 123456.78), [10.01, 20.02]])
+    index = SortedWindowIndex([users], times, totals)
+
+    sums, counts = index.sum([np.array([1, 1, 2])],
+                             pd.to_datetime(["2020-11-01", "2020-11-11", "2020-11-01"]),
+                             pd.to_datetime(["2020-11-11", "2020-11-20", "2020-11-20"]))
+
+    assert sums.tolist() == [10.01, 20.02, 0.0]
+    assert counts.tolist() == [1, 1, 0]
+
+def test_fused_metrics_match_separate_metrics_and_merges():
+    master, prints_last_week = _random_master(seed=3)
+    rng = np.random.default_rng(4)
+    pays_df = pd.DataFrame({
+        "pay_date": rng.choice(pd.date_range("2020-10-01", "2020-11-30"), size=100),
+        "total": rng.uniform(1, 100, size=100).round(2),
+        "user_id": rng.integers(1, 6, size=100),
+        "value_prop": rng.choice(["prepaid", "point"], size=100),
+    })
+    metrics_aggregator = MetricsAggregator()
+    keys = ["user_id", "value_prop", "day_prints"]
+
+    # Flujo anterior: cada métrica por separado unida con un merge
+    expected = prints_last_week[keys].copy()
+    expected = expected.merge(metrics_aggregator.calculate_click_indicator(master, prints_last_week), on=keys, how="left")
+    expected = expected.merge(metrics_aggregator.calculate_view_counts(master, prints_last_week, 3), on=keys, how="left")
+    expected = expected.merge(
+        metrics_aggregator.calculate_click_counts_per_value_prop(master, prints_last_week, 3), on=keys, how="left")
+    expected = expected.merge(
+        metrics_aggregator.calculate_cumulative_payment_amounts(master, pays_df, 3), on=keys, how="left")
+
+    result = metrics_aggregator.calculate_metrics(master, prints_last_week, pays_df, 3)
+
+    columns = keys + ["clicked", "view_count", "click_count", "cumulative_payment_amount"]
+    assert result.columns.tolist() == columns
+    pd.testing.assert_frame_equal(
+        result.sort_values(columns).reset_index(drop=True),
+        expected[columns].sort_values(columns).reset_index(drop=True),
+        check_dtype=False)
@@ -0,0 +1,44 @@
+# tests/test_optimize_data.py
+
+import numpy as np
+import pandas as pd
+from src.transform.optimize_data import DatasetOptimizer
+
+
+def _final_df():
+    return pd.DataFrame({
+        "user_id": [1, 2, 3, 4],
+        "value_prop": ["prepaid", "point", "prepaid", "point"],
+        "day_prints": pd.to_datetime(["2020-11-30"] * 4),
+        "clicked": ["Sí", "No", "No", "Sí"],
+        "view_count": [300.0, np.nan, 3.0, 1.0],
+        "click_count": [np.nan, 1.0, 2.0, np.nan],
+        "cumulative_payment_amount": [10.5, 5.0, 0.0, np.nan],
+    })
+
+
+def test_optimize_downcasts_and_filters():
+    optimizer = DatasetOptimizer(_final_df(), payment_dtype="float32")
+
+    result = optimizer.optimize()
+
+    # La fila con clicked = 0 y sin pagos se elimina; los pagos nulos se rellenan con 0
+    assert result["user_id"].tolist() == [1, 2, 4]
+    assert result["clicked"].dtype == np.int8
+    assert result["clicked"].tolist() == [1, 0, 1]
+    assert result["view_count"].dtype == np.int16
+    assert result["click_count"].dtype == np.int8
+    assert result["click_count"].tolist() == [0, 1, 0]
+    assert result["monto_total_pagos"].dtype == np.float32
+    assert isinstance(result["value_prop"].dtype, pd.CategoricalDtype)
+
+    report = optimizer.memory_report
+    assert report.loc["total", "bytes_after"] < report.loc["total", "bytes_before"]
+    assert report.loc["clicked", "bytes_after"] < report.loc["clicked", "bytes_before"]
+
+
+def test_fixed_count_dtype_is_used_for_partitioned_output():
+    result = DatasetOptimizer(_final_df(), count_dtype="int32").optimize()
+
+    assert result["view_count"].dtype == np.int32
+    assert result["click_count"].dtype == np.int32
@@ -0,0 +1,111 @@
+# tests/test_pipeline.py
+
+import os
+import sys
+import pandas as pd
+
+# pipeline.py se ejecuta como script desde src/ e importa sus módulos sin el prefijo 'src.'
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+import pipeline  # noqa: E402
+from src.utils.dag import StageGraph  # noqa: E402
+from src.utils.transform_cache import TransformCache  # noqa: E402
+
+PRINTS_LINES = [
+    '{"day":"2020-11-01","event_data":{"position":0,"value_prop":"cellphone_recharge"},"user_id":1}',
+    '{"day":"2020-11-02","event_data":{"position":1,"value_prop":"prepaid"},"user_id":2}',
+    '{"day":"2020-11-08","event_data":{"position":2,"value_prop":"prepaid"},"user_id":1}',
+]
+TAPS_LINES = ['{"day":"2020-11-08","event_data":{"position":2,"value_prop":"prepaid"},"user_id":1}']
+PAYS_CSV = "pay_date,total,user_id,value_prop\n2020-11-02,7.04,1,prepaid\n2020-11-03,37.36,2,prepaid\n"
+
+
+def write_sources(directory):
+    raw_dir = directory / "raw"
+    raw_dir.mkdir()
+    (raw_dir / "prints.json").write_text("\n".join(PRINTS_LINES))
+    (raw_dir / "taps.json").write_text("\n".join(TAPS_LINES))
+    (raw_dir / "pays.csv").write_text(PAYS_CSV)
+    return {"prints": str(raw_dir / "prints.json"), "taps": str(raw_dir / "taps.json"),
+            "pays": str(raw_dir / "pays.csv")}
+
+
+def build_loaders(data_paths, cache=None):
+    return {
+        "prints": pipeline.PrintsLoader(data_paths["prints"], cache=cache),
+        "taps": pipeline.TapsLoader(data_paths["taps"], cache=cache),
+        "pays": pipeline.PaysLoader(data_paths["pays"], cache=cache),
+    }
+
+
+def test_ingest_stages_run_on_the_process_executor_with_cache(tmp_path):
+    data_paths = write_sources(tmp_path)
+    results = {}
+    for executor in ("thread", "process"):
+        graph = StageGraph(executor=executor, max_workers=3)
+        pipeline.add_ingest_stages(graph, build_loaders(data_paths, TransformCache(str(tmp_path / executor))))
+        results[executor] = graph.run(pipeline.SOURCES)
+
+    for name in pipeline.SOURCES:
+        pd.testing.assert_frame_equal(results["process"][name], results["thread"][name])
+    # Los procesos de trabajo escriben en la misma caché
+    assert len(os.listdir(tmp_path / "process")) == 3
+
+
+def test_run_sharded_writes_the_same_rows_as_a_single_shard(tmp_path):
+    data_paths = write_sources(tmp_path)
+    config = {
+        "output_paths": {"final": str(tmp_path / "final"), "export_format": "parquet"},
+        "sharding": {"num_shards": 2, "max_workers": 1, "spill_dir": str(tmp_path / "shards")},
+    }
+    loaders = build_loaders(data_paths)
+    for loader in loaders.values():
+        loader.chunk_size = 2
+
+    rows = pipeline.run_sharded(loaders, config)
+
+    graph = StageGraph()
+    pipeline.add_ingest_stages(graph, build_loaders(data_paths))
+    data = graph.run(pipeline.SOURCES)
+    expected = pipeline.process_shard(data, config, data["prints"]["day"].max())
+
+    result = pd.read_parquet(tmp_path / "final")
+    assert rows == len(expected) == len(result)
+    columns = ["user_id", "day_prints", "value_prop"]
+    pd.testing.assert_frame_equal(
+        result.astype({"value_prop": str}).sort_values(columns).reset_index(drop=True),
+        expected.astype({"value_prop": str}).sort_values(columns).reset_index(drop=True),
+        check_dtype=False)
+    # Los trozos de cada shard se borran al terminar
+    assert not (tmp_path / "shards").exists()
+
+
+def test_incremental_key_join_matches_a_full_recompute(tmp_path):
+    data_paths = write_sources(tmp_path)
+    config = {"incremental": {"store_dir": str(tmp_path / "store"), "full_history": False},
+              "join": {"mode": "key"}}
+
+    def run(loaders, since=None):
+        graph = StageGraph()
+        pipeline.add_ingest_stages(graph, loaders)
+        data = graph.run(pipeline.SOURCES)
+        return data, pipeline.run_incremental(loaders, data, config, since=since)
+
+    run(build_loaders(data_paths))
+    # Un print nuevo: la segunda ejecución solo lee los días recientes de las fuentes
+    with open(data_paths["prints"], "a") as file:
+        file.write('\n{"day":"2020-11-30","event_data":{"position":0,"value_prop":"prepaid"},"user_id":1}')
+    since = pipeline.incremental_since(config)
+    loaders = build_loaders(data_paths)
+    for loader in loaders.values():
+        loader.date_window = (since, None)
+    _, result = run(loaders, since)
+
+    data, _ = run(build_loaders(data_paths))
+    master = pipeline.join_data(data["prints"], data["taps"], data["pays"], config["join"])
+    expected = pipeline.calculate_metrics_parallel(master, pipeline.filter_data_last_week(master), data["pays"])
+    columns = ["user_id", "day_prints", "value_prop"]
+    pd.testing.assert_frame_equal(
+        result.astype({"value_prop": str}).sort_values(columns).reset_index(drop=True),
+        expected.astype({"value_prop": str}).sort_values(columns).reset_index(drop=True),
+        check_dtype=False, check_like=True)
@@ -24,3 +24,18 @@ def test_prints_expansion(tmp_path):
     assert "value_prop" in result_df.columns  # Ajustado para el nombre sin prefijo
     assert result_df["position"].iloc[0] == 0
     assert result_df["value_prop"].iloc[0] == "cellphone_recharge"
+
+def test_prints_chunked_matches_full_load(tmp_path):
+    # Cinco registros leídos en lotes de dos líneas
+    json_data = [
+        f'{{"day":"2020-11-0{i}","event_data":{{"position":{i % 3},"value_prop":"prepaid"}},"user_id":{98700 + i}}}'
+        for i in range(1, 6)
+    ]
+    json_file = tmp_path / "prints.json"
+    json_file.write_text("\n".join(json_data))
+
+    full_df = PrintsLoader(file_path=str(json_file)).load_and_transform()
+    chunked_loader = PrintsLoader(file_path=str(json_file), chunk_size=2)
+
+    assert [len(chunk) for chunk in chunked_loader.iter_transformed_chunks()] == [2, 2, 1]
+    pd.testing.assert_frame_equal(chunked_loader.load_and_transform(), full_df)
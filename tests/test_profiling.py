@@ -0,0 +1,64 @@
+# tests/test_profiling.py
+
+import json
+import pandas as pd
+import pytest
+from src.utils.profiling import StageProfiler
+
+
+def test_stage_records_rows_memory_and_timings(tmp_path):
+    profiler = StageProfiler()
+    df = pd.DataFrame({"user_id": [1, 2, 3], "value_prop": ["a", "b", "c"]})
+
+    with profiler.stage("filter_last_week", rows_in=len(df)) as stage:
+        stage.set_output(df[df["user_id"] > 1])
+
+    record = profiler.records[0]
+    assert record.name == "filter_last_week"
+    assert (record.rows_in, record.rows_out) == (3, 2)
+    assert record.frame_bytes > 0
+    assert record.wall_seconds >= 0 and record.cpu_seconds >= 0
+
+    report_path = tmp_path / "final" / "run_report.json"
+    profiler.write_report(str(report_path))
+    report = json.loads(report_path.read_text())
+    assert [stage["name"] for stage in report["stages"]] == ["filter_last_week"]
+    assert report["stages"][0]["rows_out"] == 2
+
+
+def test_stage_is_recorded_when_it_fails_and_dumps_cprofile(tmp_path):
+    profiler = StageProfiler(profile_stages=["join"], profile_dir=str(tmp_path))
+
+    with pytest.raises(KeyError):
+        with profiler.stage("join"):
+            {}["user_id"]
+
+    record = profiler.records[0]
+    assert record.rows_out is None
+    assert record.profile_path == str(tmp_path / "join.prof")
+    assert (tmp_path / "join.prof").exists()
+
+
+def test_disabled_profiler_writes_nothing(tmp_path):
+    profiler = StageProfiler(enabled=False)
+    with profiler.stage("export"):
+        pass
+
+    profiler.write_report(str(tmp_path / "run_report.json"))
+    assert profiler.records == []
+    assert not (tmp_path / "run_report.json").exists()
+
+
+def test_frame_memory_is_shallow_unless_deep_memory_is_enabled():
+    df = pd.DataFrame({"value_prop": ["x" * 200] * 100}, dtype=object)
+
+    sizes = {}
+    for deep_memory in (False, True):
+        profiler = StageProfiler(deep_memory=deep_memory)
+        with profiler.stage("metrics") as stage:
+            stage.set_output(df)
+        sizes[deep_memory] = profiler.records[0].frame_bytes
+        assert "_deep_memory" not in profiler.records[0].to_dict()
+
+    assert sizes[False] == int(df.memory_usage(index=True, deep=False).sum())
+    assert sizes[True] > sizes[False]
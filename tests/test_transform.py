@@ -0,0 +1,49 @@
+# tests/test_transform.py
+
+import pytest
+import pandas as pd
+from src.transform.join_data import DataJoiner
+
+
+def _heavy_user_frames():
+    # Un usuario con 20 prints, 10 taps y 5 pagos del mismo value_prop
+    days = pd.date_range("2020-11-01", periods=20)
+    prints_df = pd.DataFrame({"day": days, "user_id": 1, "position": 0, "value_prop": "prepaid"})
+    taps_df = pd.DataFrame({"day": days[::2], "user_id": 1, "position": 0, "value_prop": "prepaid"})
+    pays_df = pd.DataFrame({"pay_date": days[::4], "total": [10.0, 20.0, 30.0, 40.0, 50.0],
+                            "user_id": 1, "value_prop": "prepaid"})
+    return prints_df, taps_df, pays_df
+
+
+def test_key_join_estimate_matches_cartesian_rows():
+    prints_df, taps_df, pays_df = _heavy_user_frames()
+    joiner = DataJoiner(mode="key")
+
+    master_df = joiner.join_data(prints_df, taps_df, pays_df)
+
+    assert len(master_df) == 20 * 10 * 5
+    assert joiner.estimate_join_rows(prints_df, taps_df, pays_df) == len(master_df)
+
+
+def test_time_aware_join_keeps_one_row_per_print():
+    prints_df, taps_df, pays_df = _heavy_user_frames()
+    joiner = DataJoiner(mode="time_aware", payment_window_weeks=3)
+
+    master_df = joiner.join_data(prints_df, taps_df, pays_df)
+
+    assert len(master_df) == 20
+    assert {"day_prints", "day_taps", "position_prints", "position_taps", "total"} <= set(master_df.columns)
+    first_days = master_df.set_index("day_prints")
+    # Tap del mismo día y último pago estrictamente anterior al print
+    assert first_days.loc["2020-11-03", "day_taps"] == pd.Timestamp("2020-11-03")
+    assert pd.isna(first_days.loc["2020-11-02", "day_taps"])
+    assert pd.isna(first_days.loc["2020-11-01", "total"])
+    assert first_days.loc["2020-11-06", "total"] == 20.0
+
+
+def test_expansion_guard_aborts_when_configured():
+    prints_df, taps_df, pays_df = _heavy_user_frames()
+    joiner = DataJoiner(mode="key", max_expansion_factor=10, on_expansion="raise")
+
+    with pytest.raises(ValueError, match="generaría 1000 filas"):
+        joiner.join_data(prints_df, taps_df, pays_df)
@@ -0,0 +1,75 @@
+# tests/test_transform_cache.py
+
+import os
+import pandas as pd
+from src.ingest.load_pays import PaysLoader
+from src.utils import transform_cache
+from src.utils.transform_cache import TransformCache
+
+PAYS_CSV = "pay_date,total,user_id,value_prop\n2020-11-01,7.04,35994,link_cobro\n2020-11-02,37.36,79066,prepaid\n"
+
+
+def test_cache_hit_skips_parse_and_transform(tmp_path, monkeypatch):
+    pays_file = tmp_path / "pays.csv"
+    pays_file.write_text(PAYS_CSV)
+    cache = TransformCache(str(tmp_path / "cache"))
+
+    first_df = PaysLoader(str(pays_file), cache=cache).load_and_transform()
+
+    # En la segunda ejecución no debe leerse ni transformarse el archivo
+    cached_loader = PaysLoader(str(pays_file), cache=cache)
+    monkeypatch.setattr(cached_loader, "load_data", lambda: (_ for _ in ()).throw(AssertionError("load_data")))
+    cached_df = cached_loader.load_and_transform()
+
+    pd.testing.assert_frame_equal(cached_df, first_df)
+
+
+def test_cache_key_changes_with_file_content(tmp_path):
+    pays_file = tmp_path / "pays.csv"
+    pays_file.write_text(PAYS_CSV)
+    cache = TransformCache(str(tmp_path / "cache"))
+    transformer = PaysLoader(str(pays_file)).transformer
+
+    key_before = cache.fingerprint(str(pays_file), transformer)
+    pays_file.write_text(PAYS_CSV + "2020-11-03,1.00,1,prepaid\n")
+
+    assert cache.fingerprint(str(pays_file), transformer) != key_before
+
+
+
+def test_cache_key_changes_with_the_code(tmp_path, monkeypatch):
+    pays_file = tmp_path / "pays.csv"
+    pays_file.write_text(PAYS_CSV)
+    cache = TransformCache(str(tmp_path / "cache"))
+    transformer = PaysLoader(str(pays_file)).transformer
+
+    monkeypatch.setattr(transform_cache, "code_version", lambda: "v1")
+    key_before = cache.fingerprint(str(pays_file), transformer)
+    monkeypatch.setattr(transform_cache, "code_version", lambda: "v2")
+
+    assert cache.fingerprint(str(pays_file), transformer) != key_before
+
+
+def test_clear_only_removes_cache_entries(tmp_path):
+    cache = TransformCache(str(tmp_path / "cache"))
+    cache.put("a", pd.DataFrame({"user_id": [1, 2]}))
+    (tmp_path / "cache" / "b.parquet.123.tmp").write_bytes(b"")
+    (tmp_path / "cache" / "notes.txt").write_text("no es una entrada")
+
+    cache.clear()
+
+    assert os.listdir(tmp_path / "cache") == ["notes.txt"]
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    cache = TransformCache(str(tmp_path / "cache"))
+    df = pd.DataFrame({"user_id": range(1000)})
+    cache.put("old", df)
+    cache.put("new", df)
+    entry_size = os.path.getsize(tmp_path / "cache" / "new.parquet")
+    os.utime(tmp_path / "cache" / "old.parquet", (0, 0))
+
+    cache.max_size_bytes = entry_size
+    cache.evict()
+
+    assert cache.get("old") is None
+    assert cache.get("new") is not None